@@ -14,5 +14,12 @@ sys.path.append(pymf_path)
 from src.ui import MinecraftToSourceUI
 
 if __name__ == "__main__":
+    if "--purge-cache" in sys.argv:
+        # Stage- und Scan-Cache leeren, ohne die GUI zu starten
+        from src.stage_cache import purge, DEFAULT_CACHE_DIR
+        from src.scan_cache import DEFAULT_CACHE_DIR as SCAN_CACHE_DIR
+        for directory in (DEFAULT_CACHE_DIR, SCAN_CACHE_DIR):
+            purge(directory)
+        sys.exit(0)
     app = MinecraftToSourceUI()
     app.run()
\ No newline at end of file
@@ -0,0 +1,401 @@
+"""Schneller, nur lesender Zugriff auf Java-Welten (Anvil .mca Region-Dateien)
+
+amulet dekodiert jeden Chunk vollständig ins Universal-Format (inkl. Entities,
+Block-Entities und History). Für den Scan werden nur Block-States gebraucht:
+  1. Region-Datei per mmap öffnen und die Offset-Tabelle lesen
+  2. Nur den angefragten Chunk dekomprimieren (zlib/gzip/unkomprimiert)
+  3. NBT minimal parsen, die bit-gepackten block_states per NumPy entpacken
+
+Unterstützt werden Chunks ab 1.16 (DataVersion >= 2529, nicht-überlappende
+Packung), sowohl "sections/block_states" (1.18+) als auch "Level/Sections".
+Alles andere (ältere Chunks, LZ4-Kompression, ...) wird über amulet gelesen.
+"""
+
+import gzip
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+import numpy as np
+from .exposed_blocks import BlockProperties
+from .world_source import WorldSource, AmuletWorldSource, BlockState, AIR
+
+log = logging.getLogger(__name__)
+
+# Ab dieser DataVersion (1.16) überspannen gepackte Einträge keine Long-Grenzen mehr
+MIN_DATA_VERSION = 2529
+
+_DIMENSION_DIRS = {
+    "minecraft:overworld": "",
+    "minecraft:the_nether": "DIM-1",
+    "minecraft:the_end": "DIM1",
+}
+
+
+class UnsupportedChunk(Exception):
+    """Chunk-Format wird vom schnellen Leser nicht unterstützt"""
+
+
+# --- NBT ---
+
+def _read_payload(data, pos, tag):
+    """Liest den Wert eines NBT-Tags ab pos. Returns (value, neue Position)"""
+    if tag == 1:
+        return data[pos] - 256 if data[pos] > 127 else data[pos], pos + 1
+    if tag == 2:
+        return struct.unpack_from(">h", data, pos)[0], pos + 2
+    if tag == 3:
+        return struct.unpack_from(">i", data, pos)[0], pos + 4
+    if tag == 4:
+        return struct.unpack_from(">q", data, pos)[0], pos + 8
+    if tag == 5:
+        return struct.unpack_from(">f", data, pos)[0], pos + 4
+    if tag == 6:
+        return struct.unpack_from(">d", data, pos)[0], pos + 8
+    if tag == 7:
+        n = struct.unpack_from(">i", data, pos)[0]
+        return np.frombuffer(data, dtype=np.int8, count=n, offset=pos + 4), pos + 4 + n
+    if tag == 8:
+        n = struct.unpack_from(">H", data, pos)[0]
+        return bytes(data[pos + 2:pos + 2 + n]).decode("utf-8", errors="replace"), pos + 2 + n
+    if tag == 9:
+        item_tag, n = data[pos], struct.unpack_from(">i", data, pos + 1)[0]
+        pos += 5
+        items = []
+        for _ in range(n):
+            value, pos = _read_payload(data, pos, item_tag)
+            items.append(value)
+        return items, pos
+    if tag == 10:
+        compound = {}
+        while True:
+            child = data[pos]
+            if child == 0:
+                return compound, pos + 1
+            n = struct.unpack_from(">H", data, pos + 1)[0]
+            name = bytes(data[pos + 3:pos + 3 + n]).decode("utf-8", errors="replace")
+            compound[name], pos = _read_payload(data, pos + 3 + n, child)
+    if tag == 11:
+        n = struct.unpack_from(">i", data, pos)[0]
+        return np.frombuffer(data, dtype=">i4", count=n, offset=pos + 4), pos + 4 + 4 * n
+    if tag == 12:
+        n = struct.unpack_from(">i", data, pos)[0]
+        return np.frombuffer(data, dtype=">i8", count=n, offset=pos + 4), pos + 4 + 8 * n
+    raise ValueError(f"Unknown NBT tag {tag}")
+
+
+def parse_nbt(data):
+    """Parst ein unkomprimiertes NBT-Dokument (Compound als Wurzel) in dicts/lists/NumPy-Arrays"""
+    if data[0] != 10:
+        raise ValueError("NBT root is not a compound")
+    n = struct.unpack_from(">H", data, 1)[0]
+    return _read_payload(data, 3 + n, 10)[0]
+
+
+# --- Block-States ---
+
+def unpack_block_states(data, palette_size, count=4096):
+    """
+    Entpackt bit-gepackte Palette-Indizes (nicht-überlappende Packung ab 1.16).
+
+    Args:
+        data: Long-Array (big-endian int64)
+        palette_size: Anzahl Palette-Einträge
+        count: Anzahl Einträge (4096 pro Sub-Chunk)
+
+    Returns:
+        np.ndarray (int64) der Länge count
+    """
+    if palette_size <= 1 or data is None or len(data) == 0:
+        return np.zeros(count, dtype=np.int64)
+    bits = max(4, (palette_size - 1).bit_length())
+    per_long = 64 // bits
+    longs = np.asarray(data).astype(np.uint64)
+    shifts = (np.arange(per_long, dtype=np.uint64) * np.uint64(bits))
+    values = (longs[:, None] >> shifts[None, :]) & np.uint64((1 << bits) - 1)
+    return values.reshape(-1)[:count].astype(np.int64)
+
+
+def _palette_entry(entry):
+    return BlockState(entry.get("Name", "minecraft:air"),
+                      BlockProperties.intern({k: str(v) for k, v in entry.get("Properties", {}).items()}))
+
+
+def _sections(root):
+    """(y, palette, data) je Sub-Chunk mit Block-States"""
+    if "sections" in root:
+        for section in root["sections"]:
+            states = section.get("block_states")
+            if states and states.get("palette"):
+                yield section["Y"], states["palette"], states.get("data")
+    elif "Level" in root:
+        for section in root["Level"].get("Sections", []):
+            if section.get("Palette"):
+                yield section["Y"], section["Palette"], section.get("BlockStates")
+
+
+def decode_chunk(root, y_lo, y_hi):
+    """
+    Übersetzt einen geparsten Chunk in Palette-Indizes.
+
+    Returns:
+        (indices, y_base, palette) wie read_chunk_column; palette[0] ist Luft
+    """
+    if root.get("DataVersion", 0) < MIN_DATA_VERSION:
+        raise UnsupportedChunk(f"DataVersion {root.get('DataVersion')}")
+    palette = [AIR]
+    parts = []
+    for cy, section_palette, data in _sections(root):
+        if not y_lo >> 4 <= cy <= y_hi >> 4:
+            continue
+        entries = [_palette_entry(entry) for entry in section_palette]
+        if all(entry.name.endswith(":air") for entry in entries):
+            continue
+        # Index-Reihenfolge im Sub-Chunk: y * 256 + z * 16 + x
+        indices = unpack_block_states(data, len(entries)).reshape(16, 16, 16).transpose(2, 1, 0)
+        parts.append((cy, indices + len(palette)))
+        palette.extend(entries)
+    if not parts or y_hi < y_lo:
+        return np.zeros((16, 16, 0), dtype=np.int64), y_lo, palette
+
+    parts.sort(key=lambda part: part[0])
+    cy_lo, cy_hi = parts[0][0], parts[-1][0]
+    column = np.zeros((16, 16, (cy_hi - cy_lo + 1) * 16), dtype=np.int64)
+    for cy, indices in parts:
+        offset = (cy - cy_lo) * 16
+        column[:, :, offset:offset + 16] = indices
+    y_base = max(y_lo, cy_lo * 16)
+    y_top = min(y_hi, cy_hi * 16 + 15)
+    start = y_base - cy_lo * 16
+    return column[:, :, start:start + max(0, y_top - y_base + 1)], y_base, palette
+
+
+def _heightmap(root, name):
+    """
+    Entpackte Heightmap eines Chunks [x, z] (Höhe über dem Weltboden, 0 = leere
+    Spalte) und der Weltboden, oder None, wenn sie fehlt oder nicht eindeutig ist.
+    """
+    if "sections" in root:
+        heightmaps, floor = root.get("Heightmaps", {}), root.get("yPos")
+    else:
+        heightmaps, floor = root.get("Level", {}).get("Heightmaps", {}), 0
+    data = heightmaps.get(name)
+    if data is None or floor is None or len(data) == 0:
+        return None
+    # Bits pro Eintrag aus der Länge (256 Einträge, nicht-überlappend gepackt)
+    bits = [b for b in range(1, 33) if -(-256 // (64 // b)) == len(data)]
+    if len(bits) != 1:
+        return None
+    heights = unpack_block_states(data, 1 << bits[0], 256).reshape(16, 16).T
+    return heights, floor * 16
+
+
+def content_extent(root, y_lo, y_hi):
+    """
+    Ausdehnung der Blöcke eines geparsten Chunks aus Sub-Chunk-Paletten und der
+    WORLD_SURFACE-Heightmap, ohne Block-States zu entpacken.
+
+    Returns:
+        (columns, y_bottom, y_top) wie WorldSource.content_extent
+    """
+    if root.get("DataVersion", 0) < MIN_DATA_VERSION:
+        raise UnsupportedChunk(f"DataVersion {root.get('DataVersion')}")
+    sections = [
+        cy for cy, section_palette, _ in _sections(root)
+        if y_lo >> 4 <= cy <= y_hi >> 4
+        and not all(entry.get("Name", "minecraft:air").endswith(":air") for entry in section_palette)
+    ]
+    columns = np.ones((16, 16), dtype=bool)
+    if not sections:
+        return ~columns, y_lo, y_lo - 1
+    y_bottom = max(y_lo, min(sections) * 16)
+    y_top = min(y_hi, max(sections) * 16 + 15)
+    heightmap = _heightmap(root, "WORLD_SURFACE")
+    if heightmap is not None:
+        heights, floor = heightmap
+        columns = heights > 0
+        if columns.any():
+            y_top = min(y_top, floor + int(heights.max()) - 1)
+    return columns, y_bottom, y_top
+
+
+# --- Region-Dateien ---
+
+def region_dir(path, dimension):
+    """Region-Verzeichnis einer Dimension in einer Java-Welt"""
+    if dimension in _DIMENSION_DIRS:
+        return os.path.join(path, _DIMENSION_DIRS[dimension], "region")
+    namespace, _, name = dimension.partition(":")
+    return os.path.join(path, "dimensions", namespace, name, "region")
+
+
+def region_timestamp(path, dimension, cx, cz):
+    """
+    Letzte Änderung eines Chunks laut Region-Header, ohne die Region zu mappen.
+
+    Returns:
+        Unix-Zeit in Sekunden, 0 wenn der Chunk nicht existiert,
+        None wenn die Welt keine Region-Dateien hat (keine Java-Welt)
+    """
+    directory = region_dir(path, dimension)
+    if not os.path.isdir(directory):
+        return None
+    region = os.path.join(directory, f"r.{cx >> 5}.{cz >> 5}.mca")
+    if not os.path.isfile(region):
+        return 0
+    with open(region, "rb") as f:
+        f.seek(4096 + 4 * ((cx & 31) + (cz & 31) * 32))
+        data = f.read(4)
+    return struct.unpack(">I", data)[0] if len(data) == 4 else 0
+
+
+class _RegionFile:
+    """Per mmap geöffnete .mca-Datei"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Leere Datei
+            self._map = None
+        if self._map is not None and len(self._map) >= 8192:
+            # Kopien, damit die mmap ohne exportierte Puffer geschlossen werden kann
+            self.locations = np.frombuffer(self._map, dtype=">u4", count=1024).copy()
+            self.timestamps = np.frombuffer(self._map, dtype=">u4", count=1024, offset=4096).copy()
+        else:
+            self.locations = np.zeros(1024, dtype=">u4")
+            self.timestamps = np.zeros(1024, dtype=">u4")
+
+    def has_chunk(self, cx, cz):
+        return bool(self.locations[(cx & 31) + (cz & 31) * 32])
+
+    def timestamp(self, cx, cz):
+        if not self.has_chunk(cx, cz):
+            return 0
+        return int(self.timestamps[(cx & 31) + (cz & 31) * 32])
+
+    def read(self, cx, cz):
+        """Dekomprimierte NBT-Daten eines Chunks oder None"""
+        location = int(self.locations[(cx & 31) + (cz & 31) * 32])
+        if not location:
+            return None
+        offset = (location >> 8) * 4096
+        length, compression = struct.unpack_from(">iB", self._map, offset)
+        if compression & 128:
+            # Chunk liegt in externer Datei c.<x>.<z>.mcc
+            external = os.path.join(os.path.dirname(self.path), f"c.{cx}.{cz}.mcc")
+            with open(external, "rb") as f:
+                payload = f.read()
+        else:
+            payload = self._map[offset + 5:offset + 4 + length]
+        compression &= 127
+        if compression == 2:
+            return zlib.decompress(payload)
+        if compression == 1:
+            return gzip.decompress(payload)
+        if compression == 3:
+            return bytes(payload)
+        raise UnsupportedChunk(f"compression type {compression}")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+
+class AnvilWorld(WorldSource):
+    """
+    Nur lesende Java-Welt auf Basis der Region-Dateien (WorldSource).
+
+    Nicht unterstützte Chunks werden transparent über amulet gelesen.
+    read_chunk ist thread-sicher (mmap-Zugriffe sind rein lesend, Region-Tabelle
+    und amulet-Rückfall sind per Lock geschützt).
+    """
+
+    thread_safe = True
+
+    def __init__(self, path):
+        self.path = path
+        self._regions = {}
+        self._fallback = None
+        self.fallback_chunks = 0
+        self._lock = threading.Lock()
+        self._fallback_lock = threading.Lock()
+
+    @staticmethod
+    def is_supported(path):
+        """Java-Welt ab 1.16 mit Region-Verzeichnis?"""
+        level_dat = os.path.join(path, "level.dat")
+        if not os.path.isfile(level_dat) or not os.path.isdir(os.path.join(path, "region")):
+            return False
+        try:
+            with gzip.open(level_dat, "rb") as f:
+                root = parse_nbt(f.read())
+            return root.get("Data", {}).get("DataVersion", 0) >= MIN_DATA_VERSION
+        except Exception:
+            return False
+
+    def _region(self, cx, cz, dimension):
+        key = (dimension, cx >> 5, cz >> 5)
+        with self._lock:
+            if key not in self._regions:
+                path = os.path.join(region_dir(self.path, dimension), f"r.{cx >> 5}.{cz >> 5}.mca")
+                self._regions[key] = _RegionFile(path) if os.path.isfile(path) else None
+            return self._regions[key]
+
+    def has_chunk(self, cx, cz, dimension):
+        region = self._region(cx, cz, dimension)
+        return region is not None and region.has_chunk(cx, cz)
+
+    def chunk_timestamp(self, cx, cz, dimension):
+        region = self._region(cx, cz, dimension)
+        return 0 if region is None else region.timestamp(cx, cz)
+
+    def read_chunk(self, cx, cz, dimension, y_lo, y_hi):
+        """
+        Liest die Block-States eines Chunks.
+
+        Returns:
+            (indices, y_base, palette) wie read_chunk_column, palette indizierbar
+            mit jedem Index; None, wenn der Chunk nicht existiert
+        """
+        region = self._region(cx, cz, dimension)
+        if region is None or not region.has_chunk(cx, cz):
+            return None
+        try:
+            return decode_chunk(parse_nbt(region.read(cx, cz)), y_lo, y_hi)
+        except UnsupportedChunk as e:
+            log.debug(f"Chunk {cx}, {cz}: {e} -> amulet")
+            return self._read_with_amulet(cx, cz, dimension, y_lo, y_hi)
+
+    def content_extent(self, cx, cz, dimension, y_lo, y_hi):
+        region = self._region(cx, cz, dimension)
+        if region is None or not region.has_chunk(cx, cz):
+            return None
+        try:
+            return content_extent(parse_nbt(region.read(cx, cz)), y_lo, y_hi)
+        except UnsupportedChunk:
+            return None
+
+    def _read_with_amulet(self, cx, cz, dimension, y_lo, y_hi):
+        from .world_loader import load_level
+        with self._fallback_lock:
+            if self._fallback is None:
+                self._fallback = AmuletWorldSource(load_level(self.path))
+            self.fallback_chunks += 1
+            column = self._fallback.read_chunk(cx, cz, dimension, y_lo, y_hi)
+            self._fallback.release(dimension)
+            return column
+
+    def close(self):
+        for region in self._regions.values():
+            if region is not None:
+                region.close()
+        self._regions.clear()
+        if self._fallback is not None:
+            self._fallback.close()
+            self._fallback = None
@@ -0,0 +1,94 @@
+"""Auto-Crop - Auswahl vor dem Scan auf den tatsächlichen Inhalt zuschneiden
+
+Großzügige Auswahlen (z.B. y -64..320 oder ein Rechteck um eine L-förmige
+Stadt) kosten beim Scan Zeit für leere Chunks und Spalten. Der Vorlauf liest
+pro Chunk nur Metadaten (Existenz, Sub-Chunk-Präsenz, WORLD_SURFACE-Heightmap,
+siehe WorldSource.content_extent) und bestimmt daraus den Quader, in dem
+innerhalb der Auswahl Blöcke liegen. Quellen ohne billige Metadaten (amulet,
+MemoryWorldSource) lesen den Chunk dafür vollständig.
+
+Beschnitten wird auf diesen Quader plus einen Block Rand: Die Randzellen sind
+Luft wie zuvor, sodass boundary_mode und Flood-Fill für den Inhalt dieselben
+Nachbarn sehen wie ohne Beschnitt.
+"""
+
+import logging
+import numpy as np
+from .block_registry import BlockStateRegistry, SHAPE_AIR
+
+log = logging.getLogger(__name__)
+
+
+def _read_extent(world, registry, cx, cz, dimension, y_lo, y_hi):
+    """content_extent durch Lesen des Chunks (für Quellen ohne Metadaten)"""
+    column = world.read_chunk(cx, cz, dimension, y_lo, y_hi)
+    if column is None:
+        return None
+    indices, y_base, palette = column
+    states = registry.palette_lookup(palette, indices)[indices]
+    solid = registry.shapes[states] != SHAPE_AIR
+    layers = np.nonzero(solid.any(axis=(0, 1)))[0]
+    if len(layers) == 0:
+        return np.zeros((16, 16), dtype=bool), y_lo, y_lo - 1
+    return solid.any(axis=2), y_base + int(layers[0]), y_base + int(layers[-1])
+
+
+def content_bounds(world, selection, dimension):
+    """
+    Quader um alle Blöcke innerhalb der Auswahl (aus Chunk-Metadaten, eher zu groß).
+
+    Args:
+        world: WorldSource
+        selection: selection.Selection
+
+    Returns:
+        (x1, z1, x2, z2, y_min, y_max) oder None, wenn die Auswahl leer ist
+    """
+    registry = BlockStateRegistry()
+    bounds = None
+    metadata = 0
+    for cx, cz in selection.chunks():
+        if not world.has_chunk(cx, cz, dimension):
+            continue
+        y_lo, y_hi = selection.y_range(cx * 16, cz * 16, 16, 16)
+        extent = world.content_extent(cx, cz, dimension, y_lo, y_hi)
+        if extent is None:
+            extent = _read_extent(world, registry, cx, cz, dimension, y_lo, y_hi)
+            if extent is None:
+                continue
+        else:
+            metadata += 1
+        columns, y_bottom, y_top = extent
+        columns = columns & selection.columns(cx * 16, cz * 16, 16, 16)
+        if y_top < y_bottom or not columns.any():
+            continue
+        xs = np.nonzero(columns.any(axis=1))[0]
+        zs = np.nonzero(columns.any(axis=0))[0]
+        chunk = (cx * 16 + int(xs[0]), cz * 16 + int(zs[0]), cx * 16 + int(xs[-1]), cz * 16 + int(zs[-1]),
+                 y_bottom, y_top)
+        bounds = chunk if bounds is None else (
+            tuple(min(a, b) for a, b in zip(bounds[:2], chunk[:2]))
+            + tuple(max(a, b) for a, b in zip(bounds[2:4], chunk[2:4]))
+            + (min(bounds[4], chunk[4]), max(bounds[5], chunk[5]))
+        )
+    log.info(f"Auto-Crop: {len(selection.chunks())} Chunks geprüft, {metadata} aus Metadaten")
+    return bounds
+
+
+def crop_to_content(world, selection, dimension):
+    """
+    Beschneidet die Auswahl auf den Inhalt plus einen Block Rand.
+
+    Returns:
+        (Selection, bounds): beschnittene Auswahl und Inhalts-Quader;
+        (None, None), wenn die Auswahl keine Blöcke enthält
+    """
+    bounds = content_bounds(world, selection, dimension)
+    if bounds is None:
+        log.info("Auto-Crop: keine Blöcke in der Auswahl")
+        return None, None
+    before = selection.bounds()
+    x1, z1, x2, z2, y_min, y_max = bounds
+    log.info(f"Auto-Crop: Inhalt x {x1}..{x2}, z {z1}..{z2}, y {y_min}..{y_max} "
+             f"(Auswahl x {before[0]}..{before[2]}, z {before[1]}..{before[3]}, y {before[4]}..{before[5]})")
+    return selection.crop(x1 - 1, z1 - 1, x2 + 1, z2 + 1, y_min - 1, y_max + 1), bounds
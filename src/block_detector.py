@@ -1,157 +1,651 @@
 """Block detection and face visibility detection"""
 
 import logging
-from amulet.api.errors import ChunkDoesNotExist
-from .world_loader import load_level, get_full_block_name
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .world_loader import open_world, READER_AMULET
+from .block_registry import (
+    BlockStateRegistry, MISSING_STATE, AIR_STATE, SOLID_STATE,
+    SHAPE_AIR, SHAPE_FULL, SHAPE_FENCE, SHAPE_SLAB, SHAPE_STAIRS, SHAPE_CARPET,
+    OCCLUDER_CARPET,
+)
+from .chunk_cache import ChunkCache
+from .exposed_blocks import ExposedBlockSet, StateTable
+from .visibility import find_cavities, cavity_mask
+from .scan_cache import ScanCache
+from .prefetch import PrefetchingSource
+from .selection import Selection
+from .auto_crop import crop_to_content
+from .faces import (
+    ALL_FACES, FACE_OFFSETS, FACE_NORTH, FACE_SOUTH, FACE_EAST, FACE_WEST, FACE_TOP, FACE_BOTTOM,
+)
 
 log = logging.getLogger(__name__)
 
+# Umgang mit Blöcken außerhalb der Auswahl
+BOUNDARY_LOAD_NEIGHBOURS = "load_neighbours"  # Nachbar-Chunks laden, echte Nachbarn prüfen
+BOUNDARY_AIR = "air"                           # außerhalb ist Luft -> Rand-Faces sichtbar
+BOUNDARY_SOLID = "solid"                       # außerhalb ist massiv -> Rand-Faces verdeckt
+BOUNDARY_MODES = (BOUNDARY_LOAD_NEIGHBOURS, BOUNDARY_AIR, BOUNDARY_SOLID)
 
-def is_air_or_transparent(block_name):
-    """Check if a block is transparent or air"""
-    return block_name in ["air", "cave_air", "void_air", "water", "lava"]
 
-def is_fence_or_bars(block_name):
-    return ("_fence" in block_name or "bars" in block_name or "glass_pane" in block_name)
+def _load_states(world, registry, cx, cz, dimension, y_lo, y_hi):
+    """
+    Lädt einen Chunk aus der WorldSource und übersetzt ihn in State-IDs. Der
+    Höhenbereich wird auf die Ebenen mit Nicht-Luft-Blöcken zugeschnitten.
+
+    Returns:
+        (states, y_base) wie world_source.read_chunk_column, oder None wenn der Chunk fehlt
+    """
+    column = world.read_chunk(cx, cz, dimension, y_lo, y_hi)
+    if column is None:
+        return None
+    indices, y_base, palette = column
+    states = registry.palette_lookup(palette, indices)[indices]
+    layers = np.nonzero((registry.shapes[states] != SHAPE_AIR).any(axis=(0, 1)))[0]
+    if len(layers) == 0:
+        return states[:, :, :0], y_base
+    return states[:, :, layers[0]:layers[-1] + 1], y_base + int(layers[0])
+
+
+def _column_range(entry, xz, y_from, y_to, fill=AIR_STATE, missing=MISSING_STATE, dtype=np.uint16):
+    """
+    Schneidet den Bereich [y_from, y_to) aus einer gecachten Chunk-Spalte.
+    Außerhalb der gespeicherten Höhe ist Luft, fehlende Chunks sind MISSING_STATE.
+
+    Args:
+        entry: (states, y_base) oder None
+        xz: Index-Tupel für die X/Z-Achsen
+        fill, missing, dtype: Füllwerte für andere Spalten-Arrays (z.B. Hohlraum-Masken)
+    """
+    if entry is None:
+        shape = np.empty((16, 16, 0))[xz].shape[:-1]
+        return np.full(shape + (y_to - y_from,), missing, dtype=dtype)
+    states, y_base = entry
+    part = states[xz]
+    out = np.full(part.shape[:-1] + (y_to - y_from,), fill, dtype=dtype)
+    lo, hi = max(y_from, y_base), min(y_to, y_base + part.shape[-1])
+    if hi > lo:
+        out[..., lo - y_from:hi - y_from] = part[..., lo - y_base:hi - y_base]
+    return out
+
+
+# Halo-Ebenen der vier Nachbar-Chunks: (dx, dz) -> (Ziel im Rand-Array, Quelle im Nachbarn)
+_HALO = {
+    (-1, 0): ((0, slice(1, 17)), (15, slice(None))),
+    (1, 0): ((17, slice(1, 17)), (0, slice(None))),
+    (0, -1): ((slice(1, 17), 0), (slice(None), 15)),
+    (0, 1): ((slice(1, 17), 17), (slice(None), 0)),
+}
+
+
+def _with_halo(column, cx, cz, y_from, y_to, fill=AIR_STATE, missing=MISSING_STATE, dtype=np.uint16):
+    """
+    Setzt den Bereich [y_from, y_to) eines Chunks und den Rand aus den vier
+    Nachbar-Chunks zu einem Array (18, 18, y_to - y_from) zusammen.
+
+    Args:
+        column: Funktion (cx, cz) -> gecachter Eintrag oder None
+    """
+    padded = np.full((18, 18, y_to - y_from), missing, dtype=dtype)
+    padded[1:17, 1:17] = _column_range(column(cx, cz), (slice(None), slice(None)), y_from, y_to,
+                                       fill, missing, dtype)
+    for (dx, dz), (dst, src) in _HALO.items():
+        padded[dst] = _column_range(column(cx + dx, cz + dz), src, y_from, y_to, fill, missing, dtype)
+    return padded
+
+
+def _selection_only(column, settings):
+    """
+    Beschränkt einen Spalten-Loader auf die Chunks der Auswahl; Chunks
+    außerhalb werden nie geladen (gelten als fehlend).
+    """
+    chunks = set(settings['selection'].chunks())
+
+    def selected(cx, cz):
+        if (cx, cz) not in chunks:
+            return None
+        return column(cx, cz)
+    return selected
+
+
+def _column_loader(world, registry, chunk_cache, settings):
+    """
+    Funktion (cx, cz) -> (states, y_base) oder None, gepuffert im ChunkCache.
+    Außer bei BOUNDARY_LOAD_NEIGHBOURS werden nur Chunks der Auswahl geladen.
+    """
+    dimension, y_min, y_max = settings['dimension'], settings['y_min'], settings['y_max']
+
+    def column(cx, cz):
+        return chunk_cache.get(
+            (cx, cz),
+            lambda: _load_states(world, registry, cx, cz, dimension, y_min - 1, y_max + 1)
+        )
+    if settings['boundary_mode'] != BOUNDARY_LOAD_NEIGHBOURS:
+        return _selection_only(column, settings)
+    return column
+
+
+def _request_order(chunks, settings):
+    """
+    Reihenfolge, in der Scan und Flood-Fill die Chunks anfordern: jeder Chunk,
+    danach seine vier Nachbarn (Halo) in der Reihenfolge von _HALO.
+    Außer bei BOUNDARY_LOAD_NEIGHBOURS nur Chunks der Auswahl.
+    """
+    selected = set(settings['selection'].chunks())
+    selection_only = settings['boundary_mode'] != BOUNDARY_LOAD_NEIGHBOURS
+    order = []
+    for cx, cz in chunks:
+        order.append((cx, cz))
+        for dx, dz in _HALO:
+            if not selection_only or (cx + dx, cz + dz) in selected:
+                order.append((cx + dx, cz + dz))
+    return order
+
+
+def _prefetching(world, chunk_cache, chunks, settings, passes=1):
+    """
+    Umhüllt eine thread-sichere WorldSource mit einem PrefetchingSource, der die
+    Chunks in Request-Reihenfolge vorausliest (passes: Anzahl Durchläufe, z.B.
+    Flood-Fill + Scan). Gibt sonst die Quelle unverändert zurück.
+    """
+    if settings['prefetch'] <= 0 or not world.thread_safe:
+        return world
+    source = PrefetchingSource(
+        world, settings['dimension'], settings['y_min'] - 1, settings['y_max'] + 1,
+        threads=min(4, os.cpu_count() or 1), depth=settings['prefetch'],
+        skip=lambda cx, cz: (cx, cz) in chunk_cache,
+    )
+    source.prefetch(_request_order(chunks, settings) * passes)
+    return source
+
+
+def _padded_column(column, cx, cz, y_min, y_max):
+    """
+    Baut das State-ID-Array eines Chunks inklusive einem Block Rand (Halo)
+    aus den vier Nachbar-Chunks sowie oberhalb/unterhalb des Höhenbereichs.
+    Die dekodierten Spalten aller Chunks liegen im ChunkCache.
+
+    Der Höhenbereich wird auf die Ebenen des Chunks begrenzt, die überhaupt
+    Blöcke enthalten (Sub-Chunk-Präsenz, Heightmap, leere Ebenen).
+
+    Args:
+        column: Funktion (cx, cz) -> gecachte Spalte (siehe _column_loader)
+
+    Returns:
+        (states, y0): np.ndarray (18, 18, h + 2), indiziert [x + 1, z + 1, y - y0 + 1].
+        Zellen aus fehlenden Chunks enthalten MISSING_STATE.
+        None, wenn der Chunk nicht existiert oder keine Blöcke im Bereich hat.
+    """
+    center = column(cx, cz)
+    if center is None:
+        return None
+    y0 = max(y_min, center[1])
+    y1 = min(y_max, center[1] + center[0].shape[2] - 1)
+    if y1 < y0:
+        return None
+    return _with_halo(column, cx, cz, y0 - 1, y1 + 2), y0
+
+
+def _chunk_window(cx, cz, settings):
+    """Lokale Spalten (start_x, end_x, start_z, end_z) des Rechtecks um die Auswahl im Chunk"""
+    return settings['selection'].chunk_window(cx, cz)
+
+
+def _apply_boundary(window, selected, settings):
+    """
+    Ersetzt die Blöcke eines Auswahlfensters, die außerhalb der Auswahl liegen
+    und seitlich an einen ausgewählten Block grenzen, gemäß boundary_mode durch
+    Luft bzw. massive Pseudo-Blöcke. Über und unter der Auswahl bleibt die Welt.
+
+    Args:
+        selected: bool-Maske der Auswahl in der Form von window (siehe Selection.mask)
+    """
+    fill = AIR_STATE if settings['boundary_mode'] == BOUNDARY_AIR else SOLID_STATE
+    beside = np.zeros_like(selected)
+    beside[1:] |= selected[:-1]
+    beside[:-1] |= selected[1:]
+    beside[:, 1:] |= selected[:, :-1]
+    beside[:, :-1] |= selected[:, 1:]
+    window[beside & ~selected] = fill
+
+
+def _neighbor_slice(shape, dx, dy, dz):
+    """Index des um (dx, dy, dz) verschobenen Kerns in einem Array mit Rand"""
+    sx, sz, sy = (n - 2 for n in shape)
+    return slice(1 + dx, 1 + dx + sx), slice(1 + dz, 1 + dz + sz), slice(1 + dy, 1 + dy + sy)
+
+
+def _generic_face_masks(states, registry, forced_faces, cavities=None):
+    """Face-Bitmasken für beliebigen Inhalt (siehe compute_face_masks)"""
+    occluders = registry.occluders[states]
+    shapes = registry.shapes[states[1:-1, 1:-1, 1:-1]]
+    partial = (shapes == SHAPE_SLAB) | (shapes == SHAPE_STAIRS) | (shapes == SHAPE_CARPET)
+    hides_full = occluders >= OCCLUDER_CARPET
+    hides_partial = occluders == OCCLUDER_CARPET
+
+    masks = np.full(shapes.shape, forced_faces, dtype=np.uint8)
+    for bit, (dx, dy, dz) in FACE_OFFSETS.items():
+        neighbor = _neighbor_slice(states.shape, dx, dy, dz)
+        hidden = np.where(partial, hides_partial[neighbor], hides_full[neighbor])
+        if cavities is not None:
+            hidden |= cavities[neighbor]
+        masks[~hidden] |= bit
+    masks[shapes == SHAPE_FENCE] = ALL_FACES
+    masks[shapes == SHAPE_AIR] = 0
+    if cavities is not None:
+        masks[cavities[1:-1, 1:-1, 1:-1]] = 0
+    return masks
+
+
+def _solid_section_face_masks(states, registry, forced_faces, cavities=None):
+    """
+    Face-Bitmasken für einen Abschnitt, der nur aus einem Vollblock-State besteht.
+    Innen verdecken sich die Blöcke gegenseitig, daher werden nur die sechs
+    Randebenen gegen die Nachbarn geprüft.
+    """
+    sx, sz, sy = (n - 2 for n in states.shape)
+    masks = np.full((sx, sz, sy), forced_faces, dtype=np.uint8)
+    boundary = {
+        FACE_EAST: ((-1, slice(None), slice(None)), (sx + 1, slice(1, -1), slice(1, -1))),
+        FACE_WEST: ((0, slice(None), slice(None)), (0, slice(1, -1), slice(1, -1))),
+        FACE_SOUTH: ((slice(None), -1, slice(None)), (slice(1, -1), sz + 1, slice(1, -1))),
+        FACE_NORTH: ((slice(None), 0, slice(None)), (slice(1, -1), 0, slice(1, -1))),
+        FACE_TOP: ((slice(None), slice(None), -1), (slice(1, -1), slice(1, -1), sy + 1)),
+        FACE_BOTTOM: ((slice(None), slice(None), 0), (slice(1, -1), slice(1, -1), 0)),
+    }
+    for bit, (plane, neighbor) in boundary.items():
+        hidden = registry.occluders[states[neighbor]] >= OCCLUDER_CARPET
+        if cavities is not None:
+            hidden |= cavities[neighbor]
+        masks[plane][~hidden] |= bit
+    return masks
+
+
+def compute_face_masks(states, registry, forced_faces=0, y0=0, cavities=None):
+    """
+    Berechnet die sichtbaren Faces aller Blöcke eines Arrays auf einmal.
+
+    Für jede der sechs Richtungen wird das um eins verschobene Nachbar-Array
+    mit dem Kern verglichen:
+      - Vollblöcke u.ä.: Face sichtbar, wenn der Nachbar kein Vollblock/Teppich ist
+      - Slabs/Treppen/Teppiche: Face sichtbar, solange der Nachbar kein Teppich ist
+      - Zäune/Gitter: alle Faces sichtbar
+      - Luft: keine Faces
+      - Faces zu abgeschlossenen Hohlräumen (cavities) sind unsichtbar, Blöcke
+        in einem Hohlraum selbst entfallen
+
+    Gearbeitet wird pro 16er-Sub-Chunk-Abschnitt: Abschnitte aus nur einem State
+    werden bei Luft übersprungen und bei Vollblöcken nur an den Randebenen geprüft.
+
+    Args:
+        states: State-ID-Array mit einem Block Rand in jeder Richtung, indiziert [x, z, y]
+        registry: BlockStateRegistry
+        forced_faces: Bitmaske immer sichtbarer Faces (force_ns/force_ew)
+        y0: Welt-Y der ersten Kern-Ebene (für die Ausrichtung an Sub-Chunks)
+        cavities: optionale bool-Maske gleicher Form wie states (siehe visibility.py)
 
-def is_slab(block_name):
-    return block_name.endswith("_slab")
+    Returns:
+        np.ndarray (uint8) der Größe states.shape - 2 mit Face-Bitmasken
+    """
+    sx, sz, sy = (n - 2 for n in states.shape)
+    masks = np.zeros((sx, sz, sy), dtype=np.uint8)
+    shapes = registry.shapes
+    start = 0
+    while start < sy:
+        end = min(sy, start + 16 - (y0 + start) % 16)
+        section = states[:, :, start:end + 2]
+        section_cavities = None if cavities is None else cavities[:, :, start:end + 2]
+        core = section[1:-1, 1:-1, 1:-1]
+        first = core.flat[0]
+        if (core == first).all():
+            if shapes[first] == SHAPE_AIR:
+                start = end
+                continue
+            if shapes[first] == SHAPE_FULL:
+                masks[:, :, start:end] = _solid_section_face_masks(section, registry, forced_faces,
+                                                                    section_cavities)
+                start = end
+                continue
+        masks[:, :, start:end] = _generic_face_masks(section, registry, forced_faces, section_cavities)
+        start = end
+    return masks
+
+
+def _padded_cavities(column, cavity_cache, registry, cx, cz, y_from, y_to, settings):
+    """
+    Hohlraum-Maske eines Chunks mit Rand, passend zu _padded_column.
+    Die Masken der Chunks werden im cavity_cache gepuffert.
+    """
+    cavities = settings['cavities']
+    y_min, y_max = settings['y_min'], settings['y_max']
+
+    def mask(ncx, ncz):
+        if (ncx, ncz) not in cavities:
+            return None
+        return cavity_cache.get(
+            (ncx, ncz),
+            lambda: (cavity_mask(column(ncx, ncz), _chunk_window(ncx, ncz, settings),
+                                 y_min, y_max, registry, cavities[(ncx, ncz)]), y_min)
+        )
+
+    return _with_halo(mask, cx, cz, y_from, y_to, fill=False, missing=False, dtype=bool)
+
+
+def _scan_chunk(column, registry, cavity_cache, cx, cz, settings):
+    """
+    Findet alle sichtbaren Blöcke eines Chunks innerhalb der Auswahl.
+
+    Returns:
+        (xs, ys, zs, states, masks) mit Registry-State-IDs und Face-Bitmasken,
+        oder None, wenn der Chunk fehlt oder leer ist
+    """
+    selection = settings['selection']
+    start_x, end_x, start_z, end_z = _chunk_window(cx, cz, settings)
+    x0, z0 = cx * 16 + start_x, cz * 16 + start_z
+    y_lo, y_hi = selection.y_range(x0, z0, end_x - start_x, end_z - start_z)
+    padded = _padded_column(column, cx, cz, y_lo, y_hi)
+    if padded is None:
+        return None
+    states, y0 = padded
+
+    window = states[start_x:end_x + 2, start_z:end_z + 2]
+    selected = selection.mask(x0 - 1, z0 - 1, y0 - 1, *window.shape)
+    if settings['boundary_mode'] != BOUNDARY_LOAD_NEIGHBOURS:
+        _apply_boundary(window, selected, settings)
+    cavities = None
+    if settings['cull_cavities']:
+        cavities = _padded_cavities(column, cavity_cache, registry, cx, cz,
+                                    y0 - 1, y0 + states.shape[2] - 1, settings)
+        cavities = cavities[start_x:end_x + 2, start_z:end_z + 2]
+    masks = compute_face_masks(window, registry, settings['forced_faces'], y0, cavities)
+    masks[~selected[1:-1, 1:-1, 1:-1]] = 0
+
+    # Reihenfolge x, z, y absteigend
+    lx, lz, ly = np.nonzero(masks[:, :, ::-1])
+    ly = masks.shape[2] - 1 - ly
+    return (lx + cx * 16 + start_x, ly + y0, lz + cz * 16 + start_z,
+            window[lx + 1, lz + 1, ly + 1], masks[lx, lz, ly])
 
-def is_stairs(block_name):
-    return block_name.endswith("_stairs")
 
-def is_carpet(block_name):
-    return block_name.endswith("_carpet")
+def _exposed_set(scanned, registry, table, table_ids):
+    """
+    Überführt das Scan-Ergebnis eines Chunks in ein ExposedBlockSet. Name und
+    Properties jedes Block-States werden nur einmal in die StateTable übernommen.
+
+    Args:
+        scanned: (xs, ys, zs, states, masks) aus _scan_chunk oder None
+        table_ids: Dict Registry-State-ID -> StateTable-ID (wird ergänzt)
+    """
+    if scanned is None:
+        return ExposedBlockSet.empty(table)
+    xs, ys, zs, states, masks = scanned
+    unique, inverse = np.unique(states, return_inverse=True)
+    for state in unique.tolist():
+        if state not in table_ids:
+            table_ids[state] = table.add(registry.names[state], registry.properties[state])
+    lookup = np.array([table_ids[state] for state in unique.tolist()], dtype=np.uint16)
+    return ExposedBlockSet(xs, ys, zs, lookup[inverse], masks, table)
+
+
+def _unload_outside_cache(world, dimension, chunk_cache):
+    """
+    on_evict-Callback: gibt in der WorldSource (z.B. amulet) alle Chunks frei,
+    die außerhalb des Bereichs der noch gecachten Chunks liegen.
+    """
+    def on_evict(key, value):
+        keys = list(chunk_cache.keys())
+        if not keys:
+            world.release(dimension)
+            return
+        cxs = [cx for cx, _ in keys]
+        czs = [cz for _, cz in keys]
+        world.release(dimension, (min(cxs), min(czs), max(cxs), max(czs)))
+    return on_evict
+
+
+def _find_cavities(column, registry, chunks, settings):
+    """Flood-Fill-Vorlauf über alle Chunks der Auswahl (siehe visibility.find_cavities)"""
+    return find_cavities(
+        chunks, column, lambda cx, cz: _chunk_window(cx, cz, settings),
+        settings['y_min'], settings['y_max'], registry,
+        open_boundary=settings['boundary_mode'] != BOUNDARY_SOLID
+    )
+
+
+def _iter_chunk_batches(world_path, chunks, settings):
+    """
+    Scannt die Chunks nacheinander mit eigener Welt-Instanz. Eine übergebene
+    WorldSource wird direkt verwendet und nicht geschlossen.
+
+    Ist cull_cavities gesetzt und wurden die Hohlräume noch nicht bestimmt,
+    läuft vorher der Flood-Fill über genau diese Chunks.
+
+    Mit scan_cache werden unveränderte Chunks aus dem Scan-Cache übernommen
+    und neu gescannte dort abgelegt (siehe scan_cache.py).
+
+    Yields:
+        Pro Chunk ein ExposedBlockSet
+    """
+    world = open_world(world_path, settings['reader'])
+    registry = BlockStateRegistry()
+    chunk_cache = ChunkCache(settings['chunk_cache_size'])
+    chunk_cache.on_evict = _unload_outside_cache(world, settings['dimension'], chunk_cache)
+    cavity_cache = ChunkCache(settings['chunk_cache_size'])
+    table, table_ids = StateTable(), {}
+    find = settings['cull_cavities'] and 'cavities' not in settings
+    source = _prefetching(world, chunk_cache, chunks, settings, passes=2 if find else 1)
+    column = _column_loader(source, registry, chunk_cache, settings)
+    scan_cache = ScanCache.open(world_path, world, settings)
+    try:
+        if find:
+            settings = dict(settings, cavities=_find_cavities(column, registry, chunks, settings))
+        for cx, cz in chunks:
+            key = scan_cache.key(world, cx, cz) if scan_cache is not None else None
+            if key is not None:
+                cached = scan_cache.load(cx, cz, key, table)
+                if cached is not None:
+                    yield cached
+                    continue
+            scanned = _scan_chunk(column, registry, cavity_cache, cx, cz, settings)
+            exposed = _exposed_set(scanned, registry, table, table_ids)
+            if key is not None:
+                scan_cache.store(cx, cz, key, exposed)
+            yield exposed
+        chunk_cache.log_stats()
+        if scan_cache is not None:
+            scan_cache.log_stats()
+    finally:
+        if source is not world:
+            source.close()
+        if world is not world_path:
+            world.close()
+
+
+def _scan_chunk_batch(world_path, chunks, settings):
+    """
+    Scannt eine Liste von Chunks in einem Worker-Prozess.
+
+    Returns:
+        Liste der Ergebnisse pro Chunk in Chunk-Reihenfolge
+    """
+    return list(_iter_chunk_batches(world_path, chunks, settings))
+
+
+def _split_batches(chunks, workers):
+    """Teilt die Chunks in zusammenhängende Batches (mehrere pro Worker für Lastverteilung)"""
+    batch_size = max(1, -(-len(chunks) // (workers * 4)))
+    return [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+
+
+def iter_exposed_blocks(world_path, x1, z1, x2, z2, y_min=-64, y_max=320,
+                        dimension='minecraft:overworld', force_ns=False, force_ew=False,
+                        workers=1, chunk_cache_size=256, cull_cavities=False,
+                        boundary_mode=BOUNDARY_LOAD_NEIGHBOURS, reader=READER_AMULET, scan_cache=None,
+                        prefetch=16, selection=None, auto_crop=False):
+    """
+    Streaming-Variante von get_exposed_blocks: liefert die sichtbaren Blöcke
+    Chunk für Chunk, sodass nachgelagerte Schritte inkrementell arbeiten können.
+
+    Jeder Chunk wird einmal als Palette-Array gelesen (inkl. Halo aus den
+    Nachbar-Chunks) und über die BlockStateRegistry in State-IDs übersetzt;
+    Block- und Nachbarabfragen sind danach reine Integer-Vergleiche.
+
+    Mit workers > 1 werden die Chunks in Batches auf Worker-Prozesse verteilt.
+    Jeder Worker öffnet die Welt selbst; die Ergebnisse werden in Chunk-Reihenfolge
+    geliefert und sind damit identisch zum seriellen Scan. Es sind höchstens
+    2 * workers Batches gleichzeitig unterwegs, damit der Speicher begrenzt bleibt.
+
+    Mit cull_cavities werden vorab per Flood-Fill alle Hohlräume bestimmt, die
+    weder mit dem Himmel noch mit der offenen Auswahlgrenze verbunden sind
+    (Höhlen, eingeschlossene Luft). Faces zu solchen Hohlräumen werden nicht
+    ausgegeben, Blöcke darin entfallen.
+
+    boundary_mode legt fest, wie Blöcke außerhalb der Auswahl behandelt werden:
+      - "load_neighbours": Nachbar-Chunks werden geladen und echt geprüft
+      - "air": außerhalb ist Luft, Faces am Auswahlrand sind sichtbar
+      - "solid": außerhalb ist massiv, Faces am Auswahlrand entfallen
+    Die beiden letzten Modi laden nie Chunks außerhalb der Auswahl; das Ergebnis
+    einer Kachel hängt damit nur von ihrem eigenen Inhalt ab.
+
+    Mit reader="anvil" werden Java-Welten (ab 1.16) direkt aus den Region-Dateien
+    gelesen (siehe anvil_reader.py); Block-Namen sind dann die Java-Namen.
+    Statt eines Pfads kann auch eine WorldSource übergeben werden, z.B. eine
+    MemoryWorldSource aus synthetic_worlds.py; für workers > 1 muss sie
+    picklebar sein.
+
+    Mit scan_cache (Verzeichnis) werden die Ergebnisse pro Chunk auf der Platte
+    abgelegt. Ein erneuter Export scannt nur Chunks neu, die selbst oder deren
+    direkte Nachbarn sich laut Region-Header seitdem geändert haben.
+
+    Bei thread-sicheren Quellen (Anvil-Leser, MemoryWorldSource) werden die
+    nächsten prefetch Chunks der Sweep-Reihenfolge in Threads vorausgelesen,
+    während der aktuelle Chunk gescannt wird (siehe prefetch.py).
+
+    Statt des Rechtecks x1/z1/x2/z2 mit y_min/y_max kann eine beliebige Auswahl
+    (selection.Selection: Boxen mit eigenem Höhenbereich, Polygone, Chunk-Listen)
+    übergeben werden. Gelesen werden nur Chunks mit ausgewählten Spalten,
+    geliefert nur Blöcke innerhalb der Auswahl; boundary_mode gilt für alle
+    Blöcke, die seitlich an die Auswahl grenzen. Der Flood-Fill von
+    cull_cavities arbeitet pro Chunk auf dem Rechteck um die Auswahl.
+
+    Mit auto_crop wird die Auswahl vorab auf den Quader um ihren Inhalt (plus
+    einen Block Rand) beschnitten; dafür werden nur Chunk-Metadaten gelesen
+    (siehe auto_crop.py). Das Ergebnis ist dasselbe wie ohne Beschnitt.
+
+    Args:
+        world_path: Path to Minecraft world or a WorldSource
+        x1, z1, x2, z2: Region coordinates
+        y_min, y_max: Height range
+        dimension: Minecraft dimension
+        force_ns: Force north/south faces visible
+        force_ew: Force east/west faces visible
+        workers: Number of worker processes (1 = serial)
+        chunk_cache_size: Maximum number of decoded chunks kept per scanner (LRU)
+        cull_cavities: Drop faces facing sealed cavities (flood fill from the open boundary)
+        boundary_mode: "load_neighbours", "air" or "solid" (see above)
+        reader: "amulet" or "anvil" (fast read-only region file reader, falls back to amulet)
+        scan_cache: Directory for per-chunk scan results (None = no incremental rescan)
+        prefetch: Number of chunks read ahead in background threads (0 = off)
+        selection: Selection (see selection.py); replaces x1/z1/x2/z2 and y_min/y_max
+        auto_crop: Shrink the selection to its content bounds before scanning
+
+    Yields:
+        Pro Chunk ein ExposedBlockSet
+    """
+    if boundary_mode not in BOUNDARY_MODES:
+        raise ValueError(f"Unknown boundary mode: {boundary_mode}")
+    if selection is None:
+        selection = Selection.box(x1, z1, x2, z2, y_min, y_max)
+    if auto_crop:
+        world = open_world(world_path, reader)
+        try:
+            selection, _ = crop_to_content(world, selection, dimension)
+        finally:
+            if world is not world_path:
+                world.close()
+        if selection is None:
+            return
+    _, _, _, _, y_min, y_max = selection.bounds()
+    settings = {
+        'selection': selection,
+        'y_min': y_min, 'y_max': y_max,
+        'dimension': dimension,
+        'forced_faces': (FACE_NORTH | FACE_SOUTH if force_ns else 0) | (FACE_EAST | FACE_WEST if force_ew else 0),
+        'chunk_cache_size': chunk_cache_size,
+        'cull_cavities': cull_cavities,
+        'boundary_mode': boundary_mode,
+        'reader': reader,
+        'scan_cache': scan_cache,
+        'prefetch': prefetch,
+    }
+    chunks = selection.chunks()
+
+    if workers <= 1 or len(chunks) < 2:
+        yield from _iter_chunk_batches(world_path, chunks, settings)
+        return
+
+    if cull_cavities:
+        # Der Flood-Fill braucht die ganze Auswahl -> einmal vorab im Hauptprozess
+        world = open_world(world_path, settings['reader'])
+        registry = BlockStateRegistry()
+        chunk_cache = ChunkCache(chunk_cache_size)
+        chunk_cache.on_evict = _unload_outside_cache(world, dimension, chunk_cache)
+        source = _prefetching(world, chunk_cache, chunks, settings)
+        try:
+            column = _column_loader(source, registry, chunk_cache, settings)
+            settings['cavities'] = _find_cavities(column, registry, chunks, settings)
+        finally:
+            if source is not world:
+                source.close()
+            if world is not world_path:
+                world.close()
+
+    batches = _split_batches(chunks, workers)
+    log.info(f"Parallel scan: {len(chunks)} chunks in {len(batches)} batches on {workers} workers")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(_scan_chunk_batch, world_path, batch, settings))
+            # Ergebnisse in Eingabereihenfolge abholen -> deterministisch
+            while len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
 
 
 def get_exposed_blocks(world_path, x1, z1, x2, z2, y_min=-64, y_max=320, 
-                       dimension='minecraft:overworld', force_ns=False, force_ew=False):
+                       dimension='minecraft:overworld', force_ns=False, force_ew=False,
+                       workers=1, chunk_cache_size=256, cull_cavities=False,
+                       boundary_mode=BOUNDARY_LOAD_NEIGHBOURS, reader=READER_AMULET, scan_cache=None,
+                       prefetch=16, selection=None, auto_crop=False):
     """
-    Find all visible blocks in a region
+    Find all visible blocks in a region (siehe iter_exposed_blocks)
     
     Args:
-        world_path: Path to Minecraft world
+        world_path: Path to Minecraft world or a WorldSource
         x1, z1, x2, z2: Region coordinates
         y_min, y_max: Height range
         dimension: Minecraft dimension
         force_ns: Force north/south faces visible
         force_ew: Force east/west faces visible
+        workers: Number of worker processes (1 = serial)
+        chunk_cache_size: Maximum number of decoded chunks kept per scanner (LRU)
+        cull_cavities: Drop faces facing sealed cavities (flood fill from the open boundary)
+        boundary_mode: "load_neighbours", "air" or "solid" (blocks outside the region)
+        reader: "amulet" or "anvil" (fast read-only region file reader)
+        scan_cache: Directory for per-chunk scan results (None = no incremental rescan)
+        prefetch: Number of chunks read ahead in background threads (0 = off)
+        selection: Selection (see selection.py); replaces x1/z1/x2/z2 and y_min/y_max
+        auto_crop: Shrink the selection to its content bounds before scanning
     
     Returns:
-        List of (x, y, z, block_type, exposed_faces, properties)
-    """
-    world = load_level(world_path)
-    exposed_blocks = []
-    cx1, cz1, cx2, cz2 = x1 // 16, z1 // 16, x2 // 16, z2 // 16
-    chunk_cache = {}
-
-    for cx in range(min(cx1, cx2), max(cx1, cx2) + 1):
-        for cz in range(min(cz1, cz2), max(cz1, cz2) + 1):
-            try:
-                chunk = world.get_chunk(cx, cz, dimension)
-                chunk_cache[(cx, cz)] = chunk
-                
-                start_x = max(0, x1 - cx * 16) if cx == cx1 else 0
-                end_x = min(16, x2 - cx * 16 + 1) if cx == cx2 else 16
-                start_z = max(0, z1 - cz * 16) if cz == cz1 else 0
-                end_z = min(16, z2 - cz * 16 + 1) if cz == cz2 else 16
-
-                for x in range(start_x, end_x):
-                    for z in range(start_z, end_z):
-                        for y in range(y_max, y_min - 1, -1):
-                            try:
-                                block = chunk.get_block(x, y, z)
-                                block_name = get_full_block_name(block)
-                                
-                                if is_air_or_transparent(block_name):
-                                    continue
-                                
-                                world_x, world_z = cx * 16 + x, cz * 16 + z
-                                exposed_faces = []
-                                neighbors = [
-                                    (0, 1, 0, "top"), (0, -1, 0, "bottom"),
-                                    (1, 0, 0, "east"), (-1, 0, 0, "west"),
-                                    (0, 0, 1, "south"), (0, 0, -1, "north")
-                                ]
-                                
-                                for dx, dy, dz, face_name in neighbors:
-                                    nx, ny, nz = x + dx, y + dy, z + dz
-                                    neighbor_cx = cx + (nx // 16) if nx < 0 or nx >= 16 else cx
-                                    neighbor_cz = cz + (nz // 16) if nz < 0 or nz >= 16 else cz
-                                    neighbor_x, neighbor_z = nx % 16, nz % 16
-                                    try:
-                                        if (neighbor_cx, neighbor_cz) not in chunk_cache:
-                                            chunk_cache[(neighbor_cx, neighbor_cz)] = world.get_chunk(
-                                                neighbor_cx, neighbor_cz, dimension
-                                            )
-                                        neighbor_block = chunk_cache[(neighbor_cx, neighbor_cz)].get_block(
-                                            neighbor_x, ny, neighbor_z
-                                        )
-                                        neighbor_name = get_full_block_name(neighbor_block)
-                                        # Visible if air/transparent, fence/bars, slab, stairs, or trapdoor
-                                        is_visible = (
-                                            is_air_or_transparent(neighbor_name)
-                                            or is_fence_or_bars(neighbor_name)
-                                            or is_slab(neighbor_name)
-                                            or is_stairs(neighbor_name)
-                                            or neighbor_name.endswith("_trapdoor")
-                                        )
-                                        # Faces on fences/bars/slabs/stairs/trapdoors always visible
-                                        if force_ns and face_name in ["north", "south"]:
-                                            is_visible = True
-                                        if force_ew and face_name in ["east", "west"]:
-                                            is_visible = True
-                                        if is_visible:
-                                            exposed_faces.append(face_name)
-                                    except:
-                                        # Chunk/block missing: face visible
-                                        exposed_faces.append(face_name)
-
-                                # Special case: fence/bars — all faces visible
-                                if is_fence_or_bars(block_name):
-                                    exposed_faces = ["top", "bottom", "north", "south", "east", "west"]
-                                # Special case: slab/stairs/carpet — faces to neighbor blocks always visible
-                                elif is_slab(block_name) or is_stairs(block_name) or is_carpet(block_name):
-                                    for dx, dy, dz, face_name in neighbors:
-                                        nx, ny, nz = x + dx, y + dy, z + dz
-                                        neighbor_cx = cx + (nx // 16) if nx < 0 or nx >= 16 else cx
-                                        neighbor_cz = cz + (nz // 16) if nz < 0 or nz >= 16 else cz
-                                        neighbor_x, neighbor_z = nx % 16, nz % 16
-                                        try:
-                                            if (neighbor_cx, neighbor_cz) not in chunk_cache:
-                                                chunk_cache[(neighbor_cx, neighbor_cz)] = world.get_chunk(
-                                                    neighbor_cx, neighbor_cz, dimension
-                                                )
-                                            neighbor_block = chunk_cache[(neighbor_cx, neighbor_cz)].get_block(
-                                                neighbor_x, ny, neighbor_z
-                                            )
-                                            neighbor_name = get_full_block_name(neighbor_block)
-                                            # If neighbor is a block (not fence/bars/slab/stairs/carpet/air), face visible
-                                            if not (
-                                                is_air_or_transparent(neighbor_name)
-                                                or is_fence_or_bars(neighbor_name)
-                                                or is_slab(neighbor_name)
-                                                or is_stairs(neighbor_name)
-                                                or is_carpet(neighbor_name)
-                                            ):
-                                                if face_name not in exposed_faces:
-                                                    exposed_faces.append(face_name)
-                                        except:
-                                            if face_name not in exposed_faces:
-                                                exposed_faces.append(face_name)
-                                if exposed_faces:
-                                    block_props = None
-                                    try:
-                                        # Convert all property values to plain strings if possible
-                                        block_props = {k: str(v) for k, v in block.properties.items()}
-                                    except:
-                                        pass
-                                    exposed_blocks.append((
-                                        world_x, y, world_z, block_name, exposed_faces, block_props
-                                    ))
-                            except:
-                                continue
-            except ChunkDoesNotExist:
-                continue
-    world.close()
-    return exposed_blocks
\ No newline at end of file
+        ExposedBlockSet aller sichtbaren Blöcke
+    """
+    return ExposedBlockSet.concatenate(
+        iter_exposed_blocks(world_path, x1, z1, x2, z2, y_min, y_max, dimension, force_ns, force_ew,
+                            workers, chunk_cache_size, cull_cavities, boundary_mode, reader, scan_cache,
+                            prefetch, selection, auto_crop)
+    )
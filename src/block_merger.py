@@ -5,12 +5,35 @@ Fehler wie Portal-Fehler, T-Junction-Fehler und verbessert die Kompilierzeit.
 
 Algorithmus:
   1. Nur volle Blöcke werden zusammengeführt (keine Treppen, Slabs, Zäune, etc.)
-  2. Blöcke werden nach Typ gruppiert (gleiche Textur = zusammenführbar)
+  2. Blöcke werden nach Typ gruppiert (gleiche Textur = zusammenführbar);
+     optional nach den aufgelösten Texturen je Face (textures.face_textures),
+     sodass z.B. waxed_/oxidized_-Varianten oder chest/trapped_chest gemeinsam
+     zusammengeführt werden
   3. 3D Greedy Meshing: Erweitere in X, dann Z, dann Y zu maximalen Quadern
   4. Berechne sichtbare Faces für die zusammengeführte Region
+
+Das Meshing (greedy_boxes) arbeitet pro Gruppe auf einem dichten bool-Gitter
+statt auf Mengen von Positions-Tupeln; Slabs und Treppen nutzen es ebenfalls.
+
+Mit cross_type bilden alle Vollblöcke eine Gruppe (greedy_boxes_by_faces):
+Quader dürfen Block-Typen mischen, solange alle ins Innere fallenden Faces
+verdeckt sind und jede Seite nur ein Material zeigt.
+
+Mit axis_search probiert greedy_mesh_3d pro Gruppe alle sechs Reihenfolgen der
+Wachstums-Achsen (AXIS_ORDERS) und behält die mit den wenigsten Regionen;
+große Gruppen laufen dabei auf Worker-Prozessen.
+
+Mit exact (Max-Qualität) kommt je Gruppe die exakte Rechteck-Zerlegung jeder
+Schicht entlang Y, X und Z hinzu (layer_boxes, rect_partition.py); Slabs und
+Treppen werden damit pro Schicht minimal zerlegt.
 """
 
 import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .textures import face_textures
+from .rect_partition import min_rectangles
+from .faces import FACE_NORTH, FACE_SOUTH, FACE_EAST, FACE_WEST, FACE_TOP, FACE_BOTTOM
 
 log = logging.getLogger(__name__)
 
@@ -29,191 +52,723 @@ def is_mergeable_block(block_type):
     return not any(tag in block_type for tag in non_mergeable)
 
 
-def greedy_mesh_3d(blocks_info):
+def group_blocks(blocks, state_keys):
     """
-    3D Greedy Meshing - Verbindet benachbarte Blöcke gleichen Typs zu Quadern.
-
-    Algorithmus:
-      - Sortiere alle Positionen
-      - Für jede noch nicht verbrauchte Position:
-        1. Erweitere maximal in X-Richtung
-        2. Erweitere maximal in Z-Richtung (volle X-Breite muss vorhanden sein)
-        3. Erweitere maximal in Y-Richtung (volle X×Z-Fläche muss vorhanden sein)
-      - Markiere alle verwendeten Positionen als verbraucht
+    Gruppiert Blöcke nach einem Schlüssel pro Block-State.
 
     Args:
-        blocks_info: dict mapping (x, y, z) -> {
-            'block_type': str,
-            'exposed_faces': list[str],
-            'properties': dict or None
-        }
+        blocks: ExposedBlockSet
+        state_keys: Schlüssel je State-ID (None = Block gehört zu keiner Gruppe)
 
     Returns:
-        merged_regions: list of dicts mit Regionsinformationen
-        non_mergeable_blocks: list of (x, y, z, block_type, exposed_faces, properties)
+        list of (key, indices): Gruppen in der Reihenfolge ihres ersten Blocks,
+        indices aufsteigend (Indizes im ExposedBlockSet)
     """
-    mergeable = {}
-    non_mergeable_blocks = []
+    keys = {}
+    state_groups = np.array([-1 if key is None else keys.setdefault(key, len(keys)) for key in state_keys],
+                            dtype=np.int64)
+    groups = state_groups[blocks.states] if keys else np.full(len(blocks), -1)
+    candidates = np.nonzero(groups >= 0)[0]
+    if len(candidates) == 0:
+        return []
+    groups = groups[candidates]
+    order = np.argsort(groups, kind='stable')
+    ids, first, counts = np.unique(groups, return_index=True, return_counts=True)
+    members = np.split(candidates[order], np.cumsum(counts)[:-1])
+    key_list = list(keys)
+    return [(key_list[ids[g]], members[g]) for g in np.argsort(first)]
+
+
+class _PlaneWindow:
+    """
+    Belegungsgitter [x, y, z] für greedy_boxes, als Fenster über X-Ebenen.
 
-    for (x, y, z), info in blocks_info.items():
-        if is_mergeable_block(info['block_type']):
-            mergeable[(x, y, z)] = info
-        else:
-            non_mergeable_blocks.append((
-                x, y, z,
-                info['block_type'],
-                info['exposed_faces'],
-                info['properties']
-            ))
-
-    # Gruppiere nach Block-Typ (nur gleiche Typen können zusammengeführt werden)
-    type_groups = {}
-    for (x, y, z), info in mergeable.items():
-        bt = info['block_type']
-        if bt not in type_groups:
-            type_groups[bt] = {}
-        type_groups[bt][(x, y, z)] = info
+    Ebenen werden erst gefüllt, wenn ein Quader sie erreicht, und verworfen,
+    sobald die Startpunkte an ihnen vorbei sind. Mit index=True wird zu jeder
+    Zelle auch der Index der Position (in xs) gespeichert.
+    """
 
-    merged_regions = []
-    total_before = len(mergeable)
-    total_after = 0
+    def __init__(self, xs, ly, lz, ny, nz, depth=16, index=False):
+        plane_x, starts = np.unique(xs, return_index=True)
+        ends = np.append(starts[1:], len(xs))
+        self._planes = dict(zip(plane_x.tolist(), zip(starts.tolist(), ends.tolist())))
+        self._ly, self._lz = ly, lz
+        self.x_max = int(plane_x[-1])
+        self.depth = depth
+        self.cells = np.zeros((4 * depth, ny, nz), dtype=bool)
+        self.index = np.zeros((4 * depth, ny, nz), dtype=np.int32) if index else None
+        self.offset = 0             # Index der Ebene base in cells
+        self.base = int(plane_x[0])
+        self.size = 0               # Gefüllte Ebenen ab base
+        self.cover(self.base + depth - 1)
+
+    @property
+    def occupied(self):
+        """Freie Positionen der Ebenen base .. base + size - 1"""
+        return self.cells[self.offset:self.offset + self.size]
+
+    @property
+    def positions(self):
+        """Positions-Indizes der Ebenen base .. base + size - 1 (nur für belegte Zellen gültig)"""
+        return self.index[self.offset:self.offset + self.size]
+
+    def advance(self, x):
+        """Verschiebt das Fenster auf Ebene x (alles davor ist verbraucht)"""
+        shift = x - self.base
+        self.offset += min(shift, self.size)
+        self.size = max(0, self.size - shift)
+        self.base = x
+        self.cover(x + self.depth - 1)
+
+    def _compact(self, array, capacity):
+        """Gefüllte Ebenen an den Anfang von array (bzw. eines größeren Arrays)"""
+        target = array if capacity == len(array) else np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+        target[:self.size] = array[self.offset:self.offset + self.size]
+        return target
+
+    def cover(self, x_to):
+        """
+        Füllt das Fenster bis einschließlich Ebene x_to.
+
+        Returns:
+            bool: False, wenn es keine weiteren Ebenen gibt
+        """
+        x_to = min(x_to, self.x_max)
+        need = x_to - self.base + 1
+        if need <= self.size:
+            return False
+        if self.offset + need > len(self.cells):
+            capacity = len(self.cells)
+            while capacity < need:
+                capacity *= 2
+            self.cells = self._compact(self.cells, capacity)
+            if self.index is not None:
+                self.index = self._compact(self.index, capacity)
+            self.offset = 0
+        for x in range(self.base + self.size, x_to + 1):
+            plane = self.cells[self.offset + x - self.base]
+            plane[:] = False
+            span = self._planes.get(x)
+            if span is not None:
+                ly, lz = self._ly[span[0]:span[1]], self._lz[span[0]:span[1]]
+                plane[ly, lz] = True
+                if self.index is not None:
+                    self.index[self.offset + x - self.base, ly, lz] = np.arange(span[0], span[1])
+        self.size = need
+        return True
+
+
+_STEP = 16  # Ebenen pro Vergleich beim Erweitern in Z und Y
+
+
+def _run_length(line):
+    """Anzahl True am Anfang eines bool-Arrays"""
+    if len(line) == 0:
+        return 0
+    k = int(line.argmin())
+    return len(line) if k == 0 and line[0] else k
+
+
+def greedy_boxes(xs, ys, zs, extend_y=True):
+    """
+    Greedy Meshing einer Positionsmenge auf einem dichten Belegungsgitter.
 
-    for block_type, positions_info in type_groups.items():
-        remaining = set(positions_info.keys())
+    Startpunkte sind die Positionen in sortierter Reihenfolge (x, y, z); von
+    jedem noch freien Startpunkt aus wird maximal in X, dann Z, dann Y
+    erweitert. Geprüft wird per Lauflänge und Slice-Vergleich auf einem
+    bool-Gitter über dem Y/Z-Rechteck der Positionen. Quader wachsen nur in
+    positive Richtung, daher genügt ein Fenster von X-Ebenen ab dem aktuellen
+    Startpunkt (_PlaneWindow).
 
-        # Sortiert durchgehen für deterministische Ergebnisse
-        for pos in sorted(remaining):
-            if pos not in remaining:
-                continue
+    Args:
+        xs, ys, zs: Koordinaten (np.ndarray), jede Position höchstens einmal
+        extend_y: Auch in Y erweitern (Slabs und Treppen: nein)
 
-            x, y, z = pos
-
-            # --- Schritt 1: Erweitere in X-Richtung ---
-            x_end = x
-            while (x_end + 1, y, z) in remaining:
-                x_end += 1
-
-            # --- Schritt 2: Erweitere in Z-Richtung ---
-            # Alle X-Positionen müssen vorhanden sein
-            z_end = z
-            while True:
-                can_extend = True
-                for xi in range(x, x_end + 1):
-                    if (xi, y, z_end + 1) not in remaining:
-                        can_extend = False
-                        break
-                if not can_extend:
-                    break
-                z_end += 1
-
-            # --- Schritt 3: Erweitere in Y-Richtung (Höhe) ---
-            # Volle X×Z-Fläche muss auf der nächsten Y-Ebene vorhanden sein
-            y_end = y
-            while True:
-                can_extend = True
-                for xi in range(x, x_end + 1):
-                    for zi in range(z, z_end + 1):
-                        if (xi, y_end + 1, zi) not in remaining:
-                            can_extend = False
-                            break
-                    if not can_extend:
-                        break
-                if not can_extend:
+    Returns:
+        boxes: np.ndarray (n, 6) mit x, y, z, x_end, y_end, z_end je Quader
+        members: Indizes in xs aller Quader hintereinander, je Quader in der
+            Reihenfolge x, y, z
+        offsets: np.ndarray (n + 1), members[offsets[i]:offsets[i + 1]] gehört zu Quader i
+    """
+    if len(xs) == 0:
+        return np.zeros((0, 6), dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+    order = np.lexsort((zs, ys, xs))
+    xs, ys, zs = xs[order].astype(np.int64), ys[order].astype(np.int64), zs[order].astype(np.int64)
+    x0, y0, z0 = int(xs[0]), int(ys.min()), int(zs.min())
+    ny, nz = int(ys.max()) - y0 + 1, int(zs.max()) - z0 + 1
+    ly, lz = ys - y0, zs - z0
+    window = _PlaneWindow(xs, ly, lz, ny, nz)
+
+    boxes = []
+    for x, y, z in zip(xs.tolist(), ly.tolist(), lz.tolist()):
+        if x != window.base:
+            window.advance(x)
+        occupied = window.occupied
+        if not occupied[0, y, z]:
+            continue
+
+        # --- Schritt 1: Erweitere in X-Richtung (Fenster bei Bedarf verlängern) ---
+        w = 1
+        while True:
+            if w == window.size:
+                if not window.cover(window.base + 2 * w - 1):
                     break
-                y_end += 1
-
-            # Alle Positionen als verbraucht markieren
-            constituent_blocks = []
-            for xi in range(x, x_end + 1):
-                for yi in range(y, y_end + 1):
-                    for zi in range(z, z_end + 1):
-                        remaining.discard((xi, yi, zi))
-                        constituent_blocks.append((xi, yi, zi))
-
-            # Sichtbare Faces für die Region berechnen
-            exposed = _compute_merged_exposed_faces(
-                x, y, z, x_end, y_end, z_end,
-                constituent_blocks, positions_info
-            )
-
-            size_x = x_end - x + 1
-            size_y = y_end - y + 1
-            size_z = z_end - z + 1
+                occupied = window.occupied
+            if not occupied[w, y, z]:
+                break
+            w += _run_length(occupied[w:, y, z])
+            if w < window.size:
+                break
+        occupied = occupied[:w]
 
-            merged_regions.append({
-                'block_type': block_type,
-                'mc_x': x, 'mc_y': y, 'mc_z': z,
-                'size_x': size_x,   # Blöcke in MC X-Richtung
-                'size_y': size_y,   # Blöcke in MC Y-Richtung (Höhe)
-                'size_z': size_z,   # Blöcke in MC Z-Richtung
-                'exposed_faces': exposed,
-                'constituent_blocks': constituent_blocks,
-            })
-            total_after += 1
+        # --- Schritt 2: Erweitere in Z-Richtung (volle X-Breite) ---
+        z_end = z
+        while z_end + 1 < nz and occupied[0, y, z_end + 1]:
+            block = occupied[:, y, z_end + 1:z_end + 1 + _STEP].all(axis=0)
+            run = _run_length(block)
+            z_end += run
+            if run < len(block):
+                break
 
-    if total_before > 0:
-        reduction = (1 - total_after / total_before) * 100
-        log.info(
-            f"Greedy Mesh: {total_before} Vollblöcke -> {total_after} Regionen "
-            f"({reduction:.1f}% Reduktion)"
-        )
-    else:
-        log.info("Greedy Mesh: Keine zusammenführbaren Vollblöcke gefunden")
+        # --- Schritt 3: Erweitere in Y-Richtung (volle X×Z-Fläche) ---
+        y_end = y
+        while extend_y and y_end + 1 < ny and occupied[0, y_end + 1, z]:
+            block = occupied[:, y_end + 1:y_end + 1 + _STEP, z:z_end + 1].all(axis=(0, 2))
+            run = _run_length(block)
+            y_end += run
+            if run < len(block):
+                break
 
-    log.info(f"Nicht-zusammenführbare Blöcke: {len(non_mergeable_blocks)}")
+        occupied[:, y:y_end + 1, z:z_end + 1] = False
+        boxes.append((x, y + y0, z + z0, x + w - 1, y_end + y0, z_end + z0))
+
+    return _box_members(boxes, order, xs, ly, lz, ny, nz, (x0, y0, z0))
+
+
+# Spalten der Face-Labels (greedy_boxes_by_faces): Material je Face in
+# Bitreihenfolge von faces.py (0 = verdeckt), danach die Block-Art
+_NORTH, _SOUTH, _EAST, _WEST, _TOP, _BOTTOM, _KIND = range(7)
+
+
+def _joined(a, b, face_a, face_b):
+    """Dürfen benachbarte Zellen a, b (Labels [..., 7]) im selben Quader liegen?"""
+    return ((a[..., face_a] == 0) & (b[..., face_b] == 0)) | (a[..., _KIND] == b[..., _KIND])
+
+
+def _side(values, current):
+    """
+    Material einer Quaderseite nach Hinzunahme von values.
+
+    Returns:
+        current bzw. der einzige Wert != 0 in values; -1 bei zwei Materialien
+    """
+    values = values[values != 0]
+    if len(values) == 0:
+        return current
+    material = current or int(values.flat[0])
+    return material if (values == material).all() else -1
 
-    return merged_regions, non_mergeable_blocks
 
+def _uniform_run(values):
+    """Länge des Anfangs von values, dessen Werte != 0 alle gleich sind"""
+    nonzero = values != 0
+    if not nonzero.any():
+        return len(values)
+    conflict = nonzero & (values != values[nonzero.argmax()])
+    return int(conflict.argmax()) if conflict.any() else len(values)
 
-def _compute_merged_exposed_faces(x1, y1, z1, x2, y2, z2, blocks, blocks_info):
+
+def greedy_boxes_by_faces(xs, ys, zs, labels):
+    """
+    Greedy Meshing über Block-Arten hinweg, begrenzt durch die sichtbaren Faces.
+
+    Wie greedy_boxes, aber ein Quader darf nur wachsen, solange
+      - jede Face, die ins Innere des Quaders fällt, auf beiden Seiten verdeckt
+        ist (oder beide Zellen dieselbe Block-Art haben, wie beim Meshing pro Typ)
+      - jede Seite des Quaders höchstens ein Material zeigt
+    Verdeckte Faces werden so typunabhängig: Erde, Stein und Erz hinter einer
+    Oberfläche landen im selben Brush, die sichtbaren Seiten bekommen danach
+    ihr Material (box_face_labels).
+
+    Args:
+        xs, ys, zs: Koordinaten (np.ndarray), jede Position höchstens einmal
+        labels: np.ndarray (n, 7): Material-ID je Face (Bitreihenfolge von
+            faces.py, 0 = verdeckt) und Block-Art je Position
+
+    Returns:
+        boxes, members, offsets wie greedy_boxes
+    """
+    if len(xs) == 0:
+        return np.zeros((0, 6), dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+    order = np.lexsort((zs, ys, xs))
+    xs, ys, zs = xs[order].astype(np.int64), ys[order].astype(np.int64), zs[order].astype(np.int64)
+    labels = labels[order]
+    x0, y0, z0 = int(xs[0]), int(ys.min()), int(zs.min())
+    ny, nz = int(ys.max()) - y0 + 1, int(zs.max()) - z0 + 1
+    ly, lz = ys - y0, zs - z0
+    window = _PlaneWindow(xs, ly, lz, ny, nz, index=True)
+
+    boxes = []
+    for x, y, z in zip(xs.tolist(), ly.tolist(), lz.tolist()):
+        if x != window.base:
+            window.advance(x)
+        occupied = window.occupied
+        if not occupied[0, y, z]:
+            continue
+
+        # --- Schritt 1: Erweitere in X-Richtung, dann auf verträgliche Faces kürzen ---
+        w = 1
+        while True:
+            if w == window.size:
+                if not window.cover(window.base + 2 * w - 1):
+                    break
+                occupied = window.occupied
+            if not occupied[w, y, z]:
+                break
+            w += _run_length(occupied[w:, y, z])
+            if w < window.size:
+                break
+        cells = window.positions[:w]
+        line = labels[cells[:, y, z]]
+        if w > 1:
+            w = 1 + _run_length(_joined(line[:-1], line[1:], _EAST, _WEST))
+            for face in (_NORTH, _SOUTH, _TOP, _BOTTOM):
+                w = min(w, _uniform_run(line[:w, face]))
+            line, cells = line[:w], cells[:w]
+        occupied = occupied[:w]
+        # Material je Quaderseite (0 = bisher nur verdeckte Faces)
+        if w == 1:
+            sides = line[0, :6].tolist()
+        else:
+            sides = [_side(line[:, face], 0) for face in (_NORTH, _SOUTH)] + [int(line[-1, _EAST]), int(line[0, _WEST])] \
+                + [_side(line[:, face], 0) for face in (_TOP, _BOTTOM)]
+
+        # --- Schritt 2: Erweitere in Z-Richtung, Reihe für Reihe ---
+        z_end = z
+        while z_end + 1 < nz and occupied[:, y, z_end + 1].all():
+            row, previous = labels[cells[:, y, z_end + 1]], labels[cells[:, y, z_end]]
+            if not (_joined(row[:-1], row[1:], _EAST, _WEST).all() and _joined(previous, row, _SOUTH, _NORTH).all()):
+                break
+            extended = list(sides)
+            for face, values in ((_WEST, row[:1, _WEST]), (_EAST, row[-1:, _EAST]),
+                                 (_TOP, row[:, _TOP]), (_BOTTOM, row[:, _BOTTOM])):
+                extended[face] = _side(values, sides[face])
+            extended[_SOUTH] = _side(row[:, _SOUTH], 0)
+            if -1 in extended:
+                break
+            sides = extended
+            z_end += 1
+
+        # --- Schritt 3: Erweitere in Y-Richtung, Ebene für Ebene ---
+        y_end = y
+        while y_end + 1 < ny and occupied[:, y_end + 1, z:z_end + 1].all():
+            plane, previous = labels[cells[:, y_end + 1, z:z_end + 1]], labels[cells[:, y_end, z:z_end + 1]]
+            if not (_joined(plane[:-1], plane[1:], _EAST, _WEST).all()
+                    and _joined(plane[:, :-1], plane[:, 1:], _SOUTH, _NORTH).all()
+                    and _joined(previous, plane, _TOP, _BOTTOM).all()):
+                break
+            extended = list(sides)
+            for face, values in ((_WEST, plane[0, :, _WEST]), (_EAST, plane[-1, :, _EAST]),
+                                 (_NORTH, plane[:, 0, _NORTH]), (_SOUTH, plane[:, -1, _SOUTH])):
+                extended[face] = _side(values, sides[face])
+            extended[_TOP] = _side(plane[:, :, _TOP], 0)
+            if -1 in extended:
+                break
+            sides = extended
+            y_end += 1
+
+        occupied[:, y:y_end + 1, z:z_end + 1] = False
+        boxes.append((x, y + y0, z + z0, x + w - 1, y_end + y0, z_end + z0))
+
+    return _box_members(boxes, order, xs, ly, lz, ny, nz, (x0, y0, z0))
+
+
+def _box_members(boxes, order, xs, ly, lz, ny, nz, origin):
+    """Positionen der Quader über ihren Schlüssel in der sortierten Reihenfolge suchen"""
+    x0, y0, z0 = origin
+    boxes = np.array(boxes, dtype=np.int64).reshape(-1, 6)
+    size = boxes[:, 3:] - boxes[:, :3] + 1
+    counts = size.prod(axis=1)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    box = np.repeat(np.arange(len(boxes)), counts)
+    t = np.arange(offsets[-1]) - offsets[box]
+    sy, sz = size[box, 1], size[box, 2]
+    cx = boxes[box, 0] + t // (sy * sz) - x0
+    cy = boxes[box, 1] + t // sz % sy - y0
+    cz = boxes[box, 2] + t % sz - z0
+    keys = ((xs - x0) * ny + ly) * nz + lz
+    members = order[np.searchsorted(keys, (cx * ny + cy) * nz + cz)]
+    return boxes, members, offsets
+
+
+def box_exposed_faces(boxes, members, offsets, blocks):
     """
-    Berechnet die sichtbaren Faces einer zusammengeführten Region.
+    Berechnet die sichtbaren Faces zusammengeführter Quader.
 
-    Eine Face der Region ist sichtbar, wenn MINDESTENS ein Block an der
+    Eine Face des Quaders ist sichtbar, wenn MINDESTENS ein Block an der
     jeweiligen Grenzfläche diese Face als sichtbar markiert hat.
 
     In Source Engine wird eine sichtbare Face mit Textur versehen.
     Unsichtbare Faces bekommen toolsnodraw (werden nicht gerendert).
 
     Args:
-        x1, y1, z1: Startkoordinaten der Region (MC-Koordinaten)
-        x2, y2, z2: Endkoordinaten der Region (MC-Koordinaten)
-        blocks: Liste aller Blockpositionen in der Region
-        blocks_info: Dict mit Block-Infos (exposed_faces etc.)
+        boxes, members, offsets: Ergebnis von greedy_boxes, members als
+            Indizes im ExposedBlockSet
+        blocks: ExposedBlockSet
 
     Returns:
-        list[str]: Liste sichtbarer Face-Richtungen
+        np.ndarray: Bitmaske sichtbarer Faces je Quader
     """
-    exposed = set()
+    box = np.repeat(np.arange(len(boxes)), np.diff(offsets))
+    bounds = boxes[box]
+    masks = blocks.masks[members]
+    xs, ys, zs = blocks.xs[members], blocks.ys[members], blocks.zs[members]
+    exposed = np.zeros(len(boxes), dtype=np.int64)
+    # Jede Face zählt nur für die Blöcke an der jeweiligen Grenzfläche
+    for bit, at_boundary in (
+        (FACE_TOP, ys == bounds[:, 4]),
+        (FACE_BOTTOM, ys == bounds[:, 1]),
+        (FACE_NORTH, zs == bounds[:, 2]),   # -Z
+        (FACE_SOUTH, zs == bounds[:, 5]),   # +Z
+        (FACE_EAST, xs == bounds[:, 3]),    # +X
+        (FACE_WEST, xs == bounds[:, 0]),    # -X
+    ):
+        exposed[box[at_boundary & (masks & bit != 0)]] |= bit
+    return exposed
+
+
+def box_face_labels(boxes, members, offsets, blocks, labels):
+    """
+    Material je Seite der Quader aus greedy_boxes_by_faces.
 
-    for bx, by, bz in blocks:
-        info = blocks_info.get((bx, by, bz))
-        if not info:
-            continue
-        block_exposed = info['exposed_faces']
+    Args:
+        boxes, members, offsets: Ergebnis von greedy_boxes_by_faces, members
+            als Indizes im ExposedBlockSet
+        labels: Face-Labels je Block im ExposedBlockSet (n, 7)
+
+    Returns:
+        np.ndarray (n, 6): Material-ID je Seite in Bitreihenfolge von faces.py,
+        0 = alle Faces der Seite verdeckt (nodraw)
+    """
+    box = np.repeat(np.arange(len(boxes)), np.diff(offsets))
+    bounds = boxes[box]
+    labels = labels[members]
+    xs, ys, zs = blocks.xs[members], blocks.ys[members], blocks.zs[members]
+    sides = np.zeros((len(boxes), 6), dtype=np.int64)
+    # Jede Seite zeigt das (einzige) Material ihrer Blöcke an der Grenzfläche
+    for face, at_boundary in (
+        (_NORTH, zs == bounds[:, 2]),
+        (_SOUTH, zs == bounds[:, 5]),
+        (_EAST, xs == bounds[:, 3]),
+        (_WEST, xs == bounds[:, 0]),
+        (_TOP, ys == bounds[:, 4]),
+        (_BOTTOM, ys == bounds[:, 1]),
+    ):
+        visible = at_boundary & (labels[:, face] != 0)
+        sides[box[visible], face] = labels[visible, face]
+    return sides
+
+
+def _face_labels(blocks, mergeable_states):
+    """
+    Face-Labels je Block für greedy_boxes_by_faces.
+
+    Returns:
+        (labels, materials): np.ndarray (n, 7) und die Texturnamen zu den
+        Material-IDs (Index 0 = verdeckt)
+    """
+    names = blocks.state_table.names
+    materials = {None: 0}
+    kinds = {}
+    table = np.zeros((len(names), 7), dtype=np.int64)
+    for state, name in enumerate(names):
+        if mergeable_states[state]:
+            top, side, bottom = (materials.setdefault(texture, len(materials)) for texture in face_textures(name))
+            table[state] = (side, side, side, side, top, bottom, kinds.setdefault(name, len(kinds)))
+    labels = table[blocks.states]
+    # Nur sichtbare Faces zeigen ein Material
+    labels[:, :6] *= (blocks.masks[:, None] >> np.arange(6)) & 1
+    return labels, list(materials)
+
+
+# Wachstumsreihenfolgen der Quader; die erste ist die von greedy_boxes
+AXIS_ORDERS = ("xzy", "xyz", "zxy", "zyx", "yxz", "yzx")
+
+# Gruppen ab dieser Größe werden bei der Achsen-Suche auf Worker-Prozesse verteilt
+_PARALLEL_MIN_BLOCKS = 4096
 
-        # Top: nur Blöcke an der Oberkante (y == y2)
-        if by == y2 and "top" in block_exposed:
-            exposed.add("top")
+# Spalten der Face-Labels je Achse: (+, -)
+_AXIS_FACES = {'x': (_EAST, _WEST), 'y': (_TOP, _BOTTOM), 'z': (_SOUTH, _NORTH)}
 
-        # Bottom: nur Blöcke an der Unterkante (y == y1)
-        if by == y1 and "bottom" in block_exposed:
-            exposed.add("bottom")
 
-        # North (-Z): nur Blöcke an der Nordseite (z == z1)
-        if bz == z1 and "north" in block_exposed:
-            exposed.add("north")
+def greedy_boxes_oriented(xs, ys, zs, axes="xzy", labels=None):
+    """
+    greedy_boxes bzw. greedy_boxes_by_faces mit beliebiger Wachstumsreihenfolge.
+
+    Die Koordinaten (und Face-Labels) werden so vertauscht, dass die Quader
+    zuerst entlang axes[0], dann axes[1], dann axes[2] wachsen; Startpunkte
+    sind sortiert nach (axes[0], axes[2], axes[1]). "xzy" ist greedy_boxes.
+
+    Args:
+        xs, ys, zs: Koordinaten (np.ndarray), jede Position höchstens einmal
+        axes: Wachstumsreihenfolge, eine aus AXIS_ORDERS
+        labels: Face-Labels für greedy_boxes_by_faces (None = greedy_boxes)
+
+    Returns:
+        boxes, members, offsets wie greedy_boxes (Welt-Achsen, members je
+        Quader in der Reihenfolge x, y, z)
+    """
+    coords = {'x': xs, 'y': ys, 'z': zs}
+    # Rollen der Achsen in greedy_boxes: "x" wächst zuerst, dann "z", dann "y"
+    roles = (axes[0], axes[2], axes[1])
+    args = [coords[axis] for axis in roles]
+    if labels is None:
+        boxes, members, offsets = greedy_boxes(*args)
+    else:
+        columns = list(range(7))
+        columns[_EAST], columns[_WEST] = _AXIS_FACES[roles[0]]
+        columns[_TOP], columns[_BOTTOM] = _AXIS_FACES[roles[1]]
+        columns[_SOUTH], columns[_NORTH] = _AXIS_FACES[roles[2]]
+        boxes, members, offsets = greedy_boxes_by_faces(*args, labels[:, columns])
+    if axes == AXIS_ORDERS[0]:
+        return boxes, members, offsets
 
-        # South (+Z): nur Blöcke an der Südseite (z == z2)
-        if bz == z2 and "south" in block_exposed:
-            exposed.add("south")
+    # Zurück in Welt-Achsen, Positionen je Quader wieder in der Reihenfolge x, y, z
+    index = {axis: i for i, axis in enumerate(roles)}
+    boxes = boxes[:, [index['x'], index['y'], index['z'], 3 + index['x'], 3 + index['y'], 3 + index['z']]]
+    box = np.repeat(np.arange(len(boxes)), np.diff(offsets))
+    members = members[np.lexsort((zs[members], ys[members], xs[members], box))]
+    return boxes, members, offsets
 
-        # East (+X): nur Blöcke an der Ostseite (x == x2)
-        if bx == x2 and "east" in block_exposed:
-            exposed.add("east")
 
-        # West (-X): nur Blöcke an der Westseite (x == x1)
-        if bx == x1 and "west" in block_exposed:
-            exposed.add("west")
+# Schicht-Achsen der exakten Zerlegung (layer_boxes) für Vollblöcke
+LAYER_AXES = ("y", "x", "z")
 
-    return list(exposed)
+
+def layer_boxes(xs, ys, zs, axis="y", stack=True):
+    """
+    Quader aus der minimalen Rechteck-Zerlegung jeder Schicht senkrecht zu axis.
+
+    Jede Schicht wird exakt zerlegt (rect_partition.min_rectangles); mit stack
+    werden gleiche Rechtecke aufeinanderfolgender Schichten zu einem Quader
+    gestapelt. Für einschichtige Gruppen (Slabs, Treppen) ist das Ergebnis
+    minimal, für Vollblöcke eine Zerlegung pro Boden bzw. Wand.
+
+    Args:
+        xs, ys, zs: Koordinaten (np.ndarray), jede Position höchstens einmal
+        axis: Achse senkrecht zu den Schichten ("x", "y" oder "z")
+        stack: Rechtecke über Schichten hinweg stapeln
+
+    Returns:
+        boxes, members, offsets wie greedy_boxes
+    """
+    if len(xs) == 0:
+        return np.zeros((0, 6), dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+    coords = {'x': xs.astype(np.int64), 'y': ys.astype(np.int64), 'z': zs.astype(np.int64)}
+    u_axis, v_axis = [other for other in "xyz" if other != axis]
+    layer, u, v = coords[axis], coords[u_axis], coords[v_axis]
+    order = np.lexsort((v, u, layer))
+    layer, u, v = layer[order], u[order], v[order]
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(layer)) + 1, [len(layer)])).tolist()
+
+    # (u, v, u_end, v_end, Schicht) je Rechteck
+    rects = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        lu, lv = u[start:end], v[start:end]
+        u0, v0 = int(lu.min()), int(lv.min())
+        cells = np.zeros((int(lu.max()) - u0 + 1, int(lv.max()) - v0 + 1), dtype=bool)
+        cells[lu - u0, lv - v0] = True
+        found = min_rectangles(cells) + [u0, v0, u0, v0]
+        rects.append(np.column_stack((found, np.full(len(found), layer[start]))))
+    rects = np.concatenate(rects)
+
+    first = last = rects[:, 4]
+    if stack:
+        # Gleiches Rechteck in der direkt folgenden Schicht setzt den Quader fort
+        rects = rects[np.lexsort((rects[:, 4], rects[:, 3], rects[:, 2], rects[:, 1], rects[:, 0]))]
+        new = np.ones(len(rects), dtype=bool)
+        new[1:] = (rects[1:, :4] != rects[:-1, :4]).any(axis=1) | (rects[1:, 4] != rects[:-1, 4] + 1)
+        starts = np.flatnonzero(new)
+        ends = np.concatenate((starts[1:], [len(rects)])) - 1
+        first, last = rects[starts, 4], rects[ends, 4]
+        rects = rects[starts]
+    span = {axis: (first, last), u_axis: (rects[:, 0], rects[:, 2]), v_axis: (rects[:, 1], rects[:, 3])}
+    boxes = np.column_stack([span[a][0] for a in "xyz"] + [span[a][1] for a in "xyz"])
+    boxes = boxes[np.lexsort((boxes[:, 2], boxes[:, 1], boxes[:, 0]))]
+
+    order = np.lexsort((zs, ys, xs))
+    xs, ys, zs = coords['x'][order], coords['y'][order], coords['z'][order]
+    x0, y0, z0 = int(xs[0]), int(ys.min()), int(zs.min())
+    ny, nz = int(ys.max()) - y0 + 1, int(zs.max()) - z0 + 1
+    return _box_members(boxes, order, xs, ys - y0, zs - z0, ny, nz, (x0, y0, z0))
+
+
+def _mesh_candidate(xs, ys, zs, labels, method):
+    """Worker-Funktion der Suche: eine Achsen-Reihenfolge oder eine Schicht-Achse (picklebar)"""
+    if method in LAYER_AXES:
+        return layer_boxes(xs, ys, zs, method)
+    return greedy_boxes_oriented(xs, ys, zs, method, labels)
+
+
+def _textured_faces(boxes, members, offsets, blocks, labels):
+    """Anzahl texturierter Quaderseiten (Tie-Break der Achsen-Suche)"""
+    if labels is not None:
+        return int((box_face_labels(boxes, members, offsets, blocks, labels) != 0).sum())
+    exposed = box_exposed_faces(boxes, members, offsets, blocks)
+    return int(sum(((exposed >> bit) & 1).sum() for bit in range(6)))
+
+
+def _group_name(key):
+    if key is True:
+        return "alle Vollblöcke"
+    return key if isinstance(key, str) else "/".join(key)
+
+
+def _mesh_groups(blocks, groups, labels, axis_search, workers, exact=False):
+    """
+    Greedy Meshing aller Gruppen, mit axis_search in allen Achsen-Reihenfolgen,
+    mit exact zusätzlich als exakte Zerlegung je Schicht (layer_boxes, nur
+    ohne Face-Labels).
+
+    Pro Gruppe gewinnt der Kandidat mit den wenigsten Quadern, bei
+    Gleichstand der mit den wenigsten texturierten Seiten, danach der
+    zuerst probierte. Große Gruppen laufen mit workers > 1 in Worker-
+    Prozessen.
+
+    Returns:
+        list of (boxes, members, offsets) je Gruppe, members als Indizes im ExposedBlockSet
+    """
+    methods = AXIS_ORDERS if axis_search else AXIS_ORDERS[:1]
+    if exact and labels is None:
+        methods = methods + LAYER_AXES
+    names = [f"{method}-Schichten" if method in LAYER_AXES else method for method in methods]
+    search = "Max-Qualität" if exact else "Achsen-Suche"
+    executor = None
+    if len(methods) > 1 and workers > 1 and any(len(indices) >= _PARALLEL_MIN_BLOCKS for _, indices in groups):
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Große Gruppen zuerst einreichen, damit die Worker laufen, während kleine lokal gerechnet werden
+        pending = {}
+        for g, (_, indices) in enumerate(groups):
+            if executor is not None and len(indices) >= _PARALLEL_MIN_BLOCKS:
+                group_labels = labels[indices] if labels is not None else None
+                pending[g] = [executor.submit(_mesh_candidate, blocks.xs[indices], blocks.ys[indices],
+                                              blocks.zs[indices], group_labels, method) for method in methods]
+        results = []
+        totals = [0, 0]
+        for g, (key, indices) in enumerate(groups):
+            group_labels = labels[indices] if labels is not None else None
+            if g in pending:
+                candidates = [future.result() for future in pending.pop(g)]
+            else:
+                candidates = [_mesh_candidate(blocks.xs[indices], blocks.ys[indices], blocks.zs[indices],
+                                              group_labels, method) for method in methods]
+            candidates = [(boxes, indices[members], offsets) for boxes, members, offsets in candidates]
+            if len(candidates) == 1:
+                results.append(candidates[0])
+                continue
+            ranking = [(len(boxes), _textured_faces(boxes, members, offsets, blocks, labels), i)
+                       for i, (boxes, members, offsets) in enumerate(candidates)]
+            best = min(ranking)
+            results.append(candidates[best[2]])
+            totals[0] += ranking[0][0]
+            totals[1] += best[0]
+            log.info(f"{search} {_group_name(key)}: {len(indices)} Blöcke, Regionen "
+                     + ", ".join(f"{name}={count}" for name, (count, _, _) in zip(names, ranking))
+                     + f" -> {names[best[2]]} ({best[0]} Regionen, {best[1]} texturierte Seiten)")
+        if len(methods) > 1:
+            log.info(f"{search}: {totals[0]} -> {totals[1]} Regionen")
+        return results
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def greedy_mesh_3d(blocks, by_material=False, cross_type=False, axis_search=False, workers=1, exact=False):
+    """
+    3D Greedy Meshing - Verbindet benachbarte Blöcke gleichen Typs zu Quadern.
+
+    Algorithmus (greedy_boxes, pro Block-Typ):
+      - Sortiere alle Positionen
+      - Für jede noch nicht verbrauchte Position:
+        1. Erweitere maximal in X-Richtung
+        2. Erweitere maximal in Z-Richtung (volle X-Breite muss vorhanden sein)
+        3. Erweitere maximal in Y-Richtung (volle X×Z-Fläche muss vorhanden sein)
+      - Markiere alle verwendeten Positionen als verbraucht
+
+    Args:
+        blocks: ExposedBlockSet
+        by_material: Gruppen nach Texturen (oben, Seite, unten) statt nach Block-Typ
+            bilden; block_type einer Region ist dann der Typ ihres ersten Blocks
+        cross_type: Alle Vollblöcke bilden eine Gruppe; Quader werden nur durch
+            ihre sichtbaren Faces begrenzt (greedy_boxes_by_faces). Die Regionen
+            haben zusätzlich 'face_textures': Textur je Seite in Bitreihenfolge
+            von faces.py ('' = nodraw)
+        axis_search: Jede Gruppe in allen sechs Achsen-Reihenfolgen meshen
+            (AXIS_ORDERS) und die mit den wenigsten Regionen behalten
+        workers: Worker-Prozesse für die Achsen-Suche (1 = seriell)
+        exact: Max-Qualität: zusätzlich jede Gruppe schichtweise entlang Y, X
+            und Z exakt zerlegen (layer_boxes) und das Ergebnis mit den
+            wenigsten Regionen behalten; nicht mit cross_type
+
+    Returns:
+        merged_regions: list of dicts mit Regionsinformationen
+        non_mergeable_blocks: np.ndarray der Indizes nicht zusammenführbarer Blöcke
+    """
+    names = blocks.state_table.names
+    state_keys = [(True if cross_type else face_textures(name) if by_material else name)
+                  if is_mergeable_block(name) else None for name in names]
+    mergeable_states = np.array([key is not None for key in state_keys], dtype=bool)
+    mergeable = mergeable_states[blocks.states]
+    if cross_type:
+        labels, materials = _face_labels(blocks, mergeable_states)
+    non_mergeable_blocks = np.nonzero(~mergeable)[0]
+
+    merged_regions = []
+    total_before = int(mergeable.sum())
+
+    # Gruppiere nach Block-Typ bzw. Material (nur Gleiches kann zusammengeführt werden)
+    groups = group_blocks(blocks, state_keys)
+    meshes = _mesh_groups(blocks, groups, labels if cross_type else None, axis_search, workers, exact)
+    for (key, indices), (boxes, members, offsets) in zip(groups, meshes):
+        if cross_type:
+            sides = box_face_labels(boxes, members, offsets, blocks, labels)
+            exposed = ((sides != 0) << np.arange(6)).sum(axis=1).tolist()
+            textures = [tuple(materials[m] or '' for m in row) for row in sides.tolist()]
+        else:
+            exposed = box_exposed_faces(boxes, members, offsets, blocks).tolist()
+        positions = list(zip(blocks.xs[members].tolist(), blocks.ys[members].tolist(), blocks.zs[members].tolist()))
+        bounds = offsets.tolist()
+        types = [names[state] for state in blocks.states[members[offsets[:-1]]].tolist()] \
+            if by_material or cross_type else [key] * len(boxes)
+        for i, (x, y, z, x_end, y_end, z_end) in enumerate(boxes.tolist()):
+            start, end = bounds[i], bounds[i + 1]
+            merged_regions.append({
+                'block_type': types[i],
+                'mc_x': x, 'mc_y': y, 'mc_z': z,
+                'size_x': x_end - x + 1,   # Blöcke in MC X-Richtung
+                'size_y': y_end - y + 1,   # Blöcke in MC Y-Richtung (Höhe)
+                'size_z': z_end - z + 1,   # Blöcke in MC Z-Richtung
+                'exposed_faces': exposed[i],
+                'constituent_blocks': positions[start:end],
+                'constituent_indices': members[start:end],
+            })
+            if cross_type:
+                merged_regions[-1]['face_textures'] = textures[i]
+    total_after = len(merged_regions)
+
+    if total_before > 0:
+        reduction = (1 - total_after / total_before) * 100
+        log.info(
+            f"Greedy Mesh: {total_before} Vollblöcke -> {total_after} Regionen "
+            f"({reduction:.1f}% Reduktion)"
+        )
+    else:
+        log.info("Greedy Mesh: Keine zusammenführbaren Vollblöcke gefunden")
+
+    if by_material and not cross_type:
+        types = len({names[state] for state in np.unique(blocks.states[mergeable]).tolist()})
+        log.info(f"Material-Gruppen: {types} Block-Typen in {len(groups)} Gruppen")
+    log.info(f"Nicht-zusammenführbare Blöcke: {len(non_mergeable_blocks)}")
+
+    return merged_regions, non_mergeable_blocks
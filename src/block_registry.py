@@ -0,0 +1,177 @@
+"""Block-State Registry - Klassifiziert jeden Block-State genau einmal
+
+Jeder unterschiedliche Block-State wird beim ersten Auftreten in einer Palette
+in eine ganzzahlige State-ID aufgelöst. Die ID trägt:
+  - den kanonischen Block-Namen (get_full_block_name bzw. Java-Name ohne Namespace)
+  - die Properties als Dict von Strings
+  - die Form (SHAPE_*): Luft, Vollblock, Slab, Treppe, Teppich, Zaun, Falltür
+  - die Verdeckungsklasse (OCCLUDER_*): verdeckt der Block Nachbar-Faces?
+  - ob der Block per Greedy Meshing zusammengeführt werden darf
+
+Der Scanner arbeitet danach nur noch mit Integer-Vergleichen bzw. Lookup-Arrays.
+"""
+
+import numpy as np
+from .world_loader import get_full_block_name
+from .block_merger import is_mergeable_block
+from .world_source import BlockState
+
+# Formen
+SHAPE_AIR = 0
+SHAPE_FULL = 1
+SHAPE_SLAB = 2
+SHAPE_STAIRS = 3
+SHAPE_CARPET = 4
+SHAPE_FENCE = 5      # Zäune, Gitter, Glasscheiben
+SHAPE_TRAPDOOR = 6
+
+# Verdeckungsklassen
+OCCLUDER_NONE = 0    # Luft/Flüssigkeiten (und fehlende Chunks)
+OCCLUDER_THIN = 1    # Zäune, Slabs, Treppen, Falltüren - Nachbar-Faces bleiben sichtbar
+OCCLUDER_CARPET = 2  # Teppich - verdeckt alle Nachbar-Faces
+OCCLUDER_FULL = 3    # Vollblock - verdeckt Faces von Vollblöcken
+
+# Pseudo-States: Zellen in fehlenden Chunks (Face gilt als sichtbar),
+# Zellen außerhalb der gespeicherten Höhe eines Chunks (Luft) und
+# Zellen außerhalb der Auswahl, die als massiv gelten (verdecken wie ein Vollblock)
+MISSING_STATE = 0
+AIR_STATE = 1
+SOLID_STATE = 2
+
+
+def is_air_or_transparent(block_name):
+    """Check if a block is transparent or air"""
+    return block_name in ["air", "cave_air", "void_air", "water", "lava"]
+
+def is_fence_or_bars(block_name):
+    return ("_fence" in block_name or "bars" in block_name or "glass_pane" in block_name)
+
+def is_slab(block_name):
+    return block_name.endswith("_slab")
+
+def is_stairs(block_name):
+    return block_name.endswith("_stairs")
+
+def is_carpet(block_name):
+    return block_name.endswith("_carpet")
+
+def is_trapdoor(block_name):
+    return block_name.endswith("_trapdoor")
+
+
+def classify_block_name(block_name):
+    """
+    Bestimmt Form und Verdeckungsklasse eines Block-Namens.
+
+    Returns:
+        (shape, occluder)
+    """
+    if is_air_or_transparent(block_name):
+        return SHAPE_AIR, OCCLUDER_NONE
+    if is_fence_or_bars(block_name):
+        return SHAPE_FENCE, OCCLUDER_THIN
+    if is_slab(block_name):
+        return SHAPE_SLAB, OCCLUDER_THIN
+    if is_stairs(block_name):
+        return SHAPE_STAIRS, OCCLUDER_THIN
+    if is_carpet(block_name):
+        return SHAPE_CARPET, OCCLUDER_CARPET
+    if is_trapdoor(block_name):
+        return SHAPE_TRAPDOOR, OCCLUDER_THIN
+    return SHAPE_FULL, OCCLUDER_FULL
+
+
+class BlockStateRegistry:
+    """Tabelle aller bisher gesehenen Block-States, indiziert per State-ID"""
+
+    def __init__(self):
+        self.names = []
+        self.blocks = []
+        self.properties = []
+        self._shapes = []
+        self._occluders = []
+        self._mergeable = []
+        self._ids = {}
+        self._arrays = None
+        self._add(None, None, None, SHAPE_AIR, OCCLUDER_NONE, False)
+        self._add(None, "air", None, SHAPE_AIR, OCCLUDER_NONE, False)
+        self._add(None, None, None, SHAPE_AIR, OCCLUDER_FULL, False)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _add(self, block, name, properties, shape, occluder, mergeable):
+        self.names.append(name)
+        self.blocks.append(block)
+        self.properties.append(properties)
+        self._shapes.append(shape)
+        self._occluders.append(occluder)
+        self._mergeable.append(mergeable)
+        self._arrays = None
+        return len(self.names) - 1
+
+    def state_id(self, block):
+        """
+        Gibt die State-ID eines Blocks zurück (legt sie beim ersten Auftreten an).
+
+        Args:
+            block: amulet Block oder BlockState (Anvil-Leser, MemoryWorldSource)
+        """
+        state = self._ids.get(block)
+        if state is None:
+            if isinstance(block, BlockState):
+                name = block.name.split(":", 1)[1] if block.name.startswith("minecraft:") else block.name
+                properties = dict(block.properties)
+            else:
+                name = get_full_block_name(block)
+                properties = None
+                try:
+                    # Convert all property values to plain strings if possible
+                    properties = {k: str(v) for k, v in block.properties.items()}
+                except:
+                    pass
+            shape, occluder = classify_block_name(name)
+            state = self._add(block, name, properties, shape, occluder, is_mergeable_block(name))
+            self._ids[block] = state
+        return state
+
+    def palette_lookup(self, palette, indices):
+        """
+        Baut eine Lookup-Tabelle Palette-Index -> State-ID.
+
+        Args:
+            palette: amulet BlockManager oder Liste von BlockStates
+            indices: Array der vorkommenden Palette-Indizes
+
+        Returns:
+            np.ndarray (uint16), indizierbar mit jedem Wert aus indices
+        """
+        indices = np.unique(indices)
+        lookup = np.zeros(int(indices.max()) + 1 if len(indices) else 1, dtype=np.uint16)
+        for index in indices:
+            lookup[index] = self.state_id(palette[int(index)])
+        return lookup
+
+    def _tables(self):
+        if self._arrays is None:
+            self._arrays = (
+                np.array(self._shapes, dtype=np.uint8),
+                np.array(self._occluders, dtype=np.uint8),
+                np.array(self._mergeable, dtype=bool),
+            )
+        return self._arrays
+
+    @property
+    def shapes(self):
+        """np.ndarray State-ID -> SHAPE_*"""
+        return self._tables()[0]
+
+    @property
+    def occluders(self):
+        """np.ndarray State-ID -> OCCLUDER_*"""
+        return self._tables()[1]
+
+    @property
+    def mergeable(self):
+        """np.ndarray State-ID -> zusammenführbar"""
+        return self._tables()[2]
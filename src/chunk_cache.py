@@ -0,0 +1,80 @@
+"""Größenbegrenzter LRU-Cache für dekodierte Chunks"""
+
+import logging
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+
+class ChunkCache:
+    """
+    LRU-Cache für Chunk-Daten, indiziert per (cx, cz).
+
+    Der Scanner greift in Sweep-Reihenfolge zu, daher fallen zuerst die Chunks
+    heraus, die der Sweep bereits hinter sich gelassen hat. Beim Verdrängen wird
+    on_evict(key, value) aufgerufen, z.B. um den Chunk auch in amulet freizugeben.
+
+    Zähler für Treffer, Fehlzugriffe und Verdrängungen stehen über stats() bereit.
+    """
+
+    def __init__(self, max_chunks=256, on_evict=None):
+        self.max_chunks = max(1, max_chunks)
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def keys(self):
+        return self._entries.keys()
+
+    def get(self, key, loader):
+        """
+        Gibt den Eintrag für key zurück und lädt ihn bei Bedarf per loader().
+
+        Args:
+            key: (cx, cz)
+            loader: Funktion ohne Argumente, die den Wert erzeugt (darf None liefern)
+        """
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self.misses += 1
+        value = loader()
+        self._entries[key] = value
+        while len(self._entries) > self.max_chunks:
+            evicted_key, evicted_value = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted_value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """Zähler als Dict (hits, misses, evictions, size, max_chunks, hit_rate)"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'max_chunks': self.max_chunks,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        log.info(
+            f"Chunk-Cache: {stats['hits']} Treffer, {stats['misses']} Fehlzugriffe, "
+            f"{stats['evictions']} verdrängt (Trefferquote {stats['hit_rate']:.1%}, "
+            f"max. {stats['max_chunks']} Chunks)"
+        )
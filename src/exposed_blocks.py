@@ -0,0 +1,267 @@
+"""Spaltenweise Ablage der sichtbaren Blöcke
+
+Statt einer Liste von Tupeln mit eigener Face-Liste und eigenem Properties-Dict
+pro Block liegen die Daten in wenigen numpy-Arrays:
+  - xs, ys, zs: int32 Koordinaten
+  - states: uint16 ID in einer gemeinsamen StateTable (Name + Properties)
+  - masks: uint8 Face-Bitmaske (siehe faces.py)
+
+Properties liegen als unveränderliche, hashbare BlockProperties vor, die pro
+Inhalt nur einmal existieren (interniert) und von allen Blöcken geteilt werden.
+
+Die Reihenfolge der Blöcke entspricht der des Scanners.
+"""
+
+import json
+from collections.abc import Mapping
+import numpy as np
+from .faces import mask_to_faces
+
+
+class BlockProperties(Mapping):
+    """
+    Unveränderliche, hashbare Block-Properties (Name -> String-Wert).
+
+    Instanzen werden über intern() erzeugt; gleiche Properties liefern immer
+    dasselbe Objekt, z.B. eines für alle "facing=north, half=bottom"-Treppen.
+    """
+
+    __slots__ = ('_items', '_values', '_hash')
+    _interned = {}
+
+    @classmethod
+    def intern(cls, properties):
+        """Gibt die geteilte Instanz für ein Properties-Dict zurück (None bleibt None)"""
+        if properties is None:
+            return None
+        if isinstance(properties, cls):
+            return properties
+        items = tuple(sorted(properties.items()))
+        instance = cls._interned.get(items)
+        if instance is None:
+            instance = object.__new__(cls)
+            instance._items = items
+            instance._values = dict(items)
+            instance._hash = hash(items)
+            cls._interned[items] = instance
+        return instance
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, BlockProperties):
+            return self._items == other._items
+        return Mapping.__eq__(self, other)
+
+    def __repr__(self):
+        return f"BlockProperties({self._values!r})"
+
+    def __reduce__(self):
+        # Beim Entpickeln (Worker-Prozesse) wieder internieren
+        return BlockProperties.intern, (self._values,)
+
+
+class StateTable:
+    """Gemeinsame Tabelle (Block-Name, BlockProperties) je State-ID"""
+
+    def __init__(self):
+        self.names = []
+        self.properties = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, properties):
+        """Gibt die ID für (name, properties) zurück und legt sie bei Bedarf an"""
+        properties = BlockProperties.intern(properties)
+        key = (name, properties)
+        state = self._ids.get(key)
+        if state is None:
+            state = len(self.names)
+            self.names.append(name)
+            self.properties.append(properties)
+            self._ids[key] = state
+        return state
+
+
+class ExposedBlockSet:
+    """
+    Spaltenweise Menge sichtbarer Blöcke.
+
+    Args:
+        xs, ys, zs: Koordinaten (werden nach int32 konvertiert)
+        states: IDs in state_table
+        masks: Face-Bitmasken
+        state_table: StateTable
+    """
+
+    def __init__(self, xs, ys, zs, states, masks, state_table):
+        self.xs = np.asarray(xs, dtype=np.int32)
+        self.ys = np.asarray(ys, dtype=np.int32)
+        self.zs = np.asarray(zs, dtype=np.int32)
+        self.states = np.asarray(states, dtype=np.uint16)
+        self.masks = np.asarray(masks, dtype=np.uint8)
+        self.state_table = state_table
+        self._index = None
+
+    @classmethod
+    def empty(cls, state_table=None):
+        return cls([], [], [], [], [], state_table if state_table is not None else StateTable())
+
+    @classmethod
+    def concatenate(cls, parts):
+        """
+        Fügt mehrere Mengen zusammen. Haben sie verschiedene StateTables
+        (z.B. aus Worker-Prozessen), werden die IDs in eine neue Tabelle übertragen.
+        """
+        parts = list(parts)
+        if not parts:
+            return cls.empty()
+        tables = {id(part.state_table): part.state_table for part in parts}
+        if len(tables) == 1:
+            table = parts[0].state_table
+            states = [part.states for part in parts]
+        else:
+            table = StateTable()
+            remap = {
+                key: np.array([table.add(name, props) for name, props in zip(t.names, t.properties)],
+                              dtype=np.uint16)
+                for key, t in tables.items()
+            }
+            states = [remap[id(part.state_table)][part.states] for part in parts]
+        return cls(
+            np.concatenate([part.xs for part in parts]),
+            np.concatenate([part.ys for part in parts]),
+            np.concatenate([part.zs for part in parts]),
+            np.concatenate(states),
+            np.concatenate([part.masks for part in parts]),
+            table,
+        )
+
+    def save(self, file):
+        """Speichert die Menge als komprimierte .npz (StateTable als JSON)"""
+        table = self.state_table
+        states = [[name, None if properties is None else dict(properties)]
+                  for name, properties in zip(table.names, table.properties)]
+        np.savez_compressed(file, xs=self.xs, ys=self.ys, zs=self.zs, states=self.states, masks=self.masks,
+                            state_table=np.array(json.dumps(states)))
+
+    @classmethod
+    def load(cls, file):
+        """Lädt eine mit save() gespeicherte Menge"""
+        with np.load(file, allow_pickle=False) as data:
+            table = StateTable()
+            for name, properties in json.loads(str(data['state_table'])):
+                table.add(name, properties)
+            return cls(data['xs'], data['ys'], data['zs'], data['states'], data['masks'], table)
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __iter__(self):
+        """Kompatibilität: liefert (x, y, z, block_type, exposed_faces, properties) je Block"""
+        for i in range(len(self)):
+            yield self.block(i)
+
+    # --- Zugriff pro Block ---
+
+    def position(self, i):
+        return int(self.xs[i]), int(self.ys[i]), int(self.zs[i])
+
+    def block_type(self, i):
+        return self.state_table.names[self.states[i]]
+
+    def properties(self, i):
+        return self.state_table.properties[self.states[i]]
+
+    def face_mask(self, i):
+        return int(self.masks[i])
+
+    def exposed_faces(self, i):
+        """Face-Namen eines Blocks (Kompatibilität/Debug; intern werden Bitmasken genutzt)"""
+        return mask_to_faces(int(self.masks[i]))
+
+    def block(self, i):
+        x, y, z = self.position(i)
+        return x, y, z, self.block_type(i), self.exposed_faces(i), self.properties(i)
+
+    # --- Array-Zugriffe ---
+
+    def names_array(self):
+        """np.ndarray (object) der Block-Namen pro Block"""
+        return np.array(self.state_table.names, dtype=object)[self.states]
+
+    def min_corner(self):
+        return int(self.xs.min()), int(self.ys.min()), int(self.zs.min())
+
+    def lowest_mask(self):
+        """bool pro Block: ist er der unterste Block seiner (x, z)-Spalte?"""
+        if not len(self):
+            return np.zeros(0, dtype=bool)
+        columns = (self.xs.astype(np.int64) - self.xs.min()) * (int(self.zs.max()) - int(self.zs.min()) + 1) \
+            + (self.zs - self.zs.min())
+        _, inverse = np.unique(columns, return_inverse=True)
+        lowest = np.full(inverse.max() + 1, np.iinfo(np.int32).max, dtype=np.int32)
+        np.minimum.at(lowest, inverse, self.ys)
+        return self.ys == lowest[inverse]
+
+    # --- Räumliche Abfrage ---
+
+    @staticmethod
+    def _pack(xs, ys, zs, lo, extent):
+        """Position -> eindeutiger Schlüssel innerhalb der Bounding-Box (-1 außerhalb)"""
+        rel = [np.asarray(v, dtype=np.int64) - o for v, o in zip((xs, ys, zs), lo)]
+        inside = np.ones(rel[0].shape, dtype=bool)
+        for r, n in zip(rel, extent):
+            inside &= (r >= 0) & (r < n)
+        keys = (rel[0] * extent[1] + rel[1]) * extent[2] + rel[2]
+        return np.where(inside, keys, -1)
+
+    def _spatial_index(self):
+        if self._index is None:
+            lo = self.min_corner()
+            extent = (int(self.xs.max()) - lo[0] + 1, int(self.ys.max()) - lo[1] + 1,
+                      int(self.zs.max()) - lo[2] + 1)
+            keys = self._pack(self.xs, self.ys, self.zs, lo, extent)
+            order = np.argsort(keys)
+            self._index = (keys[order], order, lo, extent)
+        return self._index
+
+    def lookup(self, xs, ys, zs):
+        """
+        Index der Blöcke an den gegebenen Positionen (vektorisiert).
+
+        Returns:
+            np.ndarray (int64) mit Block-Index oder -1, wenn dort kein Block liegt
+        """
+        if not len(self):
+            return np.full(np.shape(xs), -1, dtype=np.int64)
+        sorted_keys, order, lo, extent = self._spatial_index()
+        keys = self._pack(xs, ys, zs, lo, extent)
+        pos = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        found = (sorted_keys[pos] == keys) & (keys >= 0)
+        return np.where(found, order[pos], -1)
+
+    def index_at(self, x, y, z):
+        """Index des Blocks an (x, y, z) oder None"""
+        index = int(self.lookup(x, y, z))
+        return None if index < 0 else index
+
+    def __contains__(self, pos):
+        return self.index_at(*pos) is not None
+
+    def block_type_at(self, x, y, z):
+        """Block-Name an (x, y, z) oder None, wenn dort kein sichtbarer Block liegt"""
+        index = self.index_at(x, y, z)
+        return None if index is None else self.block_type(index)
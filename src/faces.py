@@ -0,0 +1,79 @@
+"""Face-Bitmasken - ein Bit pro Blockseite
+
+Die Bitreihenfolge entspricht der Reihenfolge der Solid-Seiten beim
+Standard-Face-Mapping (north, south, east, west, top, bottom).
+"""
+
+FACE_NORTH = 1 << 0
+FACE_SOUTH = 1 << 1
+FACE_EAST = 1 << 2
+FACE_WEST = 1 << 3
+FACE_TOP = 1 << 4
+FACE_BOTTOM = 1 << 5
+
+ALL_FACES = 0b111111
+
+FACE_BITS = {
+    "north": FACE_NORTH,
+    "south": FACE_SOUTH,
+    "east": FACE_EAST,
+    "west": FACE_WEST,
+    "top": FACE_TOP,
+    "bottom": FACE_BOTTOM,
+}
+
+# Nachbar-Offsets (dx, dy, dz) je Face
+FACE_OFFSETS = {
+    FACE_NORTH: (0, 0, -1),
+    FACE_SOUTH: (0, 0, 1),
+    FACE_EAST: (1, 0, 0),
+    FACE_WEST: (-1, 0, 0),
+    FACE_TOP: (0, 1, 0),
+    FACE_BOTTOM: (0, -1, 0),
+}
+
+_FACE_NAMES = [
+    tuple(name for name, bit in FACE_BITS.items() if mask & bit)
+    for mask in range(ALL_FACES + 1)
+]
+
+
+def faces_to_mask(face_names):
+    """Liste von Face-Namen -> Bitmaske"""
+    mask = 0
+    for name in face_names:
+        mask |= FACE_BITS[name]
+    return mask
+
+
+def mask_to_faces(mask):
+    """Bitmaske -> Liste von Face-Namen"""
+    return list(_FACE_NAMES[mask])
+
+
+# Face je Solid-Seite (Index 0..5) für die face_mapping-Modi
+FACE_MAPPINGS = {
+    "standard": (FACE_NORTH, FACE_SOUTH, FACE_EAST, FACE_WEST, FACE_TOP, FACE_BOTTOM),
+    "swap_ns": (FACE_SOUTH, FACE_NORTH, FACE_EAST, FACE_WEST, FACE_TOP, FACE_BOTTOM),
+    "swap_ew": (FACE_NORTH, FACE_SOUTH, FACE_WEST, FACE_EAST, FACE_TOP, FACE_BOTTOM),
+    "swap_both": (FACE_SOUTH, FACE_NORTH, FACE_WEST, FACE_EAST, FACE_TOP, FACE_BOTTOM),
+}
+
+# Permutationstabellen: Face-Bitmaske -> Bitmaske in Seitenreihenfolge (Bit i = Seite i)
+_SIDE_MASKS = {
+    mode: tuple(
+        sum(1 << i for i, bit in enumerate(sides) if mask & bit)
+        for mask in range(ALL_FACES + 1)
+    )
+    for mode, sides in FACE_MAPPINGS.items()
+}
+
+
+def side_faces(face_mapping):
+    """Face-Bit je Solid-Seite (unbekannte Modi wie standard)"""
+    return FACE_MAPPINGS.get(face_mapping, FACE_MAPPINGS["standard"])
+
+
+def to_side_mask(mask, face_mapping):
+    """Face-Bitmaske -> Bitmaske der sichtbaren Solid-Seiten (Bit i = solid.side[i])"""
+    return _SIDE_MASKS.get(face_mapping, _SIDE_MASKS["standard"])[mask]
@@ -4,13 +4,13 @@ from pyvmf import SolidGenerator, Vertex
 from ..constants import BLOCK_SIZE
 
 
-def get_bars_connections(block_x, block_y, block_z, blocks_dict):
+def get_bars_connections(block_x, block_y, block_z, blocks):
     """
     Prüft Iron Bars / Glass Pane Verbindungen
     
     Args:
         block_x, block_y, block_z: Position der Bars
-        blocks_dict: Dictionary aller Blöcke
+        blocks: ExposedBlockSet aller Blöcke
     
     Returns:
         Dict mit Verbindungen {'north': bool, 'south': bool, 'east': bool, 'west': bool}
@@ -25,8 +25,8 @@ def get_bars_connections(block_x, block_y, block_z, blocks_dict):
     ]
     
     for nx, ny, nz, direction in neighbors:
-        if (nx, ny, nz) in blocks_dict:
-            neighbor_type = blocks_dict[(nx, ny, nz)][3]
+        neighbor_type = blocks.block_type_at(nx, ny, nz)
+        if neighbor_type is not None:
             # Verbinde mit anderen Bars/Panes oder soliden Blöcken
             if ('bars' in neighbor_type or 'pane' in neighbor_type or 
                 neighbor_type not in ["air", "cave_air", "void_air", "water", "lava"]):
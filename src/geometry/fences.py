@@ -4,13 +4,13 @@ from pyvmf import SolidGenerator, Vertex
 from ..constants import BLOCK_SIZE
 
 
-def get_fence_connections(block_x, block_y, block_z, blocks_dict):
+def get_fence_connections(block_x, block_y, block_z, blocks):
     """
     Prüft Zaun-Verbindungen zu Nachbarblöcken
     
     Args:
         block_x, block_y, block_z: Position des Zauns
-        blocks_dict: Dictionary aller Blöcke {(x,y,z): (x,y,z,type,faces,props)}
+        blocks: ExposedBlockSet aller Blöcke
     
     Returns:
         Dict mit Verbindungen {'north': bool, 'south': bool, 'east': bool, 'west': bool}
@@ -24,8 +24,8 @@ def get_fence_connections(block_x, block_y, block_z, blocks_dict):
     ]
     
     for nx, ny, nz, direction in neighbors:
-        if (nx, ny, nz) in blocks_dict:
-            neighbor_type = blocks_dict[(nx, ny, nz)][3]
+        neighbor_type = blocks.block_type_at(nx, ny, nz)
+        if neighbor_type is not None:
             # Verbinde mit anderen Zäunen oder soliden Blöcken
             if '_fence' in neighbor_type or (neighbor_type not in ["air", "cave_air", "void_air", "water", "lava"]):
                 connections[direction] = True
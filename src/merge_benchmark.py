@@ -0,0 +1,83 @@
+"""Benchmark Greedy Meshing gegen Max-Qualität (exakte Rechteck-Zerlegung)
+
+Vergleicht Brush-Anzahl und Laufzeit der Merge-Stufe für Vollblöcke, Slabs
+und Treppen mit und ohne exact auf den synthetischen Welten aus
+synthetic_worlds.py und optional auf gespeicherten ExposedBlockSets (.npz):
+
+    python -m src.merge_benchmark --chunks 4 --seed 0 [--axis-search] [--workers 2] [scan.npz ...]
+"""
+
+import argparse
+import logging
+import os
+import time
+from . import synthetic_worlds
+from .block_detector import get_exposed_blocks
+from .block_merger import greedy_mesh_3d
+from .exposed_blocks import ExposedBlockSet
+from .slab_merger import greedy_mesh_slabs
+from .stair_merger import greedy_mesh_stairs
+
+log = logging.getLogger(__name__)
+
+WORLDS = ("terrain", "caves", "buildings", "stairs_and_fences")
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    regions, _ = function(*args, **kwargs)
+    return len(regions), time.perf_counter() - start
+
+
+def benchmark(blocks, axis_search=False, workers=1):
+    """
+    Merge-Stufe einmal greedy und einmal mit exact.
+
+    Returns:
+        list of (stage, (greedy_regions, greedy_seconds), (exact_regions, exact_seconds))
+    """
+    return [
+        ("Vollblöcke",
+         _timed(greedy_mesh_3d, blocks, axis_search=axis_search, workers=workers),
+         _timed(greedy_mesh_3d, blocks, axis_search=axis_search, workers=workers, exact=True)),
+        ("Slabs", _timed(greedy_mesh_slabs, blocks), _timed(greedy_mesh_slabs, blocks, exact=True)),
+        ("Treppen", _timed(greedy_mesh_stairs, blocks), _timed(greedy_mesh_stairs, blocks, exact=True)),
+    ]
+
+
+def _sources(chunks, seed, paths):
+    for name in WORLDS:
+        world = getattr(synthetic_worlds, name)(chunks, chunks, seed=seed)
+        size = chunks * 16
+        yield name, lambda world=world: get_exposed_blocks(world, 0, 0, size - 1, size - 1, 0, 127)
+    for path in paths:
+        yield os.path.basename(path), lambda path=path: ExposedBlockSet.load(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scans", nargs="*", help="ExposedBlockSet-Dateien (.npz)")
+    parser.add_argument("--chunks", type=int, default=4, help="Chunks je Seite der synthetischen Welten")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--axis-search", action="store_true", help="Greedy in allen sechs Achsen-Reihenfolgen")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    print(f"{'Welt':<20} {'Stufe':<11} {'Blöcke':>8} {'Greedy':>8} {'Zeit':>8} {'Exakt':>8} {'Zeit':>8} {'Ersparnis':>9}")
+    totals = [0, 0, 0.0, 0.0]
+    for name, load in _sources(args.chunks, args.seed, args.scans):
+        blocks = load()
+        for stage, (greedy, greedy_time), (exact, exact_time) in benchmark(blocks, args.axis_search, args.workers):
+            if greedy == 0:
+                continue
+            print(f"{name:<20} {stage:<11} {len(blocks):>8} {greedy:>8} {greedy_time:>7.2f}s {exact:>8} "
+                  f"{exact_time:>7.2f}s {(1 - exact / greedy) * 100:>8.1f}%")
+            totals = [totals[0] + greedy, totals[1] + exact, totals[2] + greedy_time, totals[3] + exact_time]
+    if totals[0]:
+        print(f"{'Summe':<41} {totals[0]:>8} {totals[2]:>7.2f}s {totals[1]:>8} {totals[3]:>7.2f}s "
+              f"{(1 - totals[1] / totals[0]) * 100:>8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Vorauslesen von Chunks in Sweep-Reihenfolge
+
+Der Scanner fordert die Chunks in einer vorhersagbaren Reihenfolge an (Chunk
+für Chunk, jeweils mit den vier Nachbarn für den Halo). PrefetchingSource
+liest die nächsten Chunks dieser Reihenfolge in einem Thread-Pool, während der
+Scanner noch mit dem aktuellen Chunk beschäftigt ist. Dekomprimieren (zlib)
+und das Entpacken per NumPy geben den GIL frei, sodass sich Lesen und Scannen
+auch ohne Worker-Prozesse überlappen.
+
+In den Threads läuft nur WorldSource.read_chunk; die Übersetzung in State-IDs
+(BlockStateRegistry) bleibt im Scanner-Thread. Es sind höchstens depth Chunks
+gleichzeitig vorausgelesen, das begrenzt den Speicher.
+
+Nur Quellen mit thread_safe = True werden vorausgelesen (AnvilWorld,
+MemoryWorldSource); amulet ist nicht thread-sicher.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from .world_source import WorldSource
+
+log = logging.getLogger(__name__)
+
+
+class PrefetchingSource(WorldSource):
+    """
+    WorldSource-Hülle, die read_chunk-Aufrufe in erwarteter Reihenfolge vorab ausführt.
+
+    Args:
+        world: thread-sichere WorldSource
+        dimension, y_lo, y_hi: Parameter, mit denen der Scanner read_chunk aufruft
+        threads: Anzahl Lese-Threads
+        depth: Maximale Anzahl vorausgelesener Chunks
+        skip: Funktion (cx, cz) -> True, wenn ein Chunk nicht gelesen werden muss
+            (z.B. weil er schon im ChunkCache liegt); fehlende Chunks (has_chunk)
+            werden ebenfalls übersprungen
+    """
+
+    def __init__(self, world, dimension, y_lo, y_hi, threads=4, depth=16, skip=None):
+        self.world = world
+        self.dimension = dimension
+        self.y_lo, self.y_hi = y_lo, y_hi
+        self.depth = max(1, depth)
+        self.skip = skip or (lambda cx, cz: False)
+        self.hits = 0
+        self.misses = 0
+        self._order = []
+        self._next = 0
+        self._cursor = 0
+        # (cx, cz) -> [letzte eingeplante Position in _order, Future]
+        self._pending = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="prefetch")
+
+    def prefetch(self, keys):
+        """Hängt Chunks (cx, cz) in der Reihenfolge an, in der sie angefordert werden"""
+        self._order.extend(keys)
+        self._fill()
+
+    def _fill(self):
+        while len(self._pending) < self.depth and self._next < len(self._order):
+            position = self._next
+            key = self._order[position]
+            self._next += 1
+            if key in self._pending:
+                self._pending[key][0] = position
+            elif not self.skip(*key) and self.world.has_chunk(key[0], key[1], self.dimension):
+                future = self._executor.submit(self.world.read_chunk, key[0], key[1], self.dimension,
+                                               self.y_lo, self.y_hi)
+                self._pending[key] = [position, future]
+
+    def read_chunk(self, cx, cz, dimension, y_lo, y_hi):
+        if (dimension, y_lo, y_hi) != (self.dimension, self.y_lo, self.y_hi):
+            self.misses += 1
+            return self.world.read_chunk(cx, cz, dimension, y_lo, y_hi)
+        # Position der Anforderung in der erwarteten Reihenfolge
+        try:
+            self._cursor = self._order.index((cx, cz), self._cursor, self._next)
+        except ValueError:
+            pass
+        entry = self._pending.pop((cx, cz), None)
+        if entry is None and not self.world.has_chunk(cx, cz, dimension):
+            # Fehlende Chunks werden nicht vorausgelesen, das Lesen kostet nichts
+            return None
+        # Vorausgelesene Chunks, die nur vor dieser Position vorkamen, werden nicht mehr angefordert
+        for key in [key for key, (last, _) in self._pending.items() if last < self._cursor]:
+            self._pending.pop(key)[1].cancel()
+        self._fill()
+        if entry is None:
+            self.misses += 1
+            return self.world.read_chunk(cx, cz, dimension, y_lo, y_hi)
+        self.hits += 1
+        return entry[1].result()
+
+    def has_chunk(self, cx, cz, dimension):
+        return self.world.has_chunk(cx, cz, dimension)
+
+    def chunk_timestamp(self, cx, cz, dimension):
+        return self.world.chunk_timestamp(cx, cz, dimension)
+
+    def release(self, dimension, bounds=None):
+        self.world.release(dimension, bounds)
+
+    def close(self):
+        """Beendet die Lese-Threads (die umhüllte Quelle bleibt offen)"""
+        for _, future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+        total = self.hits + self.misses
+        if total:
+            log.info(f"Prefetch: {self.hits} von {total} Chunks vorausgelesen")
@@ -0,0 +1,231 @@
+"""Minimale Rechteck-Zerlegung - exakte Partition einer Zellfläche in Rechtecke
+
+Greedy Meshing findet auf unregelmäßigen Böden und Wänden oft deutlich mehr
+Rechtecke als nötig. Für eine einzelne Schicht ist das Problem die Zerlegung
+eines rechtwinkligen Polygons (mit Löchern) in möglichst wenige Rechtecke und
+exakt lösbar:
+
+  1. Konkave Ecken sind Gitterpunkte mit genau drei belegten Nachbarzellen.
+     Jede muss von einem Schnitt entlang einer ihrer beiden Kanten-
+     Verlängerungen aufgelöst werden.
+  2. Gute Sehnen verbinden zwei konkave Ecken auf einer Linie durch das
+     Innere; jede löst zwei Ecken mit einem Schnitt auf.
+  3. Die größte Menge sich nicht berührender guter Sehnen ist eine maximale
+     unabhängige Menge im bipartiten Schnittgraphen (waagrecht gegen
+     senkrecht) und folgt aus einem maximalen Matching (König).
+  4. Die übrigen konkaven Ecken werden in einer Richtung bis zum Rand oder
+     zum nächsten Schnitt verlängert.
+
+Das ergibt R - L - H + 1 Rechtecke je Zusammenhangskomponente (R konkave
+Ecken, L gewählte Sehnen, H Löcher), das Minimum.
+"""
+
+import numpy as np
+
+
+def _runs(mask, axis):
+    """
+    Läufe von True entlang axis.
+
+    Returns:
+        (line, start, end): Index der Linie quer zu axis und Lauf [start, end)
+    """
+    mask = np.moveaxis(mask, axis, 1)
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    line, start = np.nonzero(np.diff(padded, axis=1) == 1)
+    _, end = np.nonzero(np.diff(padded, axis=1) == -1)
+    return line, start, end
+
+
+def _chords(cells, inner, axis):
+    """
+    Innere Linien-Segmente entlang axis (0 = u, 1 = v) mit ihren Endpunkten.
+
+    inner[x, q] (axis 0) gibt an, ob die Kante zwischen den Zellen (x, q - 1)
+    und (x, q) im Inneren liegt. Ein Lauf solcher Kanten von x = a bis b - 1
+    ist das Segment zwischen den Gitterpunkten (a, q) und (b, q).
+
+    Returns:
+        (line, start, end, start_reflex, end_reflex)
+    """
+    line, start, end = _runs(inner, axis)
+    if axis == 1:
+        cells = cells.T
+    # Endpunkt konkav: von den beiden Zellen jenseits des Laufs ist genau eine belegt
+    start_reflex = cells[start - 1, line - 1] != cells[start - 1, line]
+    end_reflex = cells[end, line - 1] != cells[end, line]
+    return line, start, end, start_reflex, end_reflex
+
+
+def _max_matching(adjacency, n_right):
+    """Maximales bipartites Matching (Hopcroft-Karp, iterativ)"""
+    n_left = len(adjacency)
+    match_left = [-1] * n_left
+    match_right = [-1] * n_right
+    for left, rights in enumerate(adjacency):
+        for right in rights:
+            if match_right[right] < 0:
+                match_left[left], match_right[right] = right, left
+                break
+    unreached = n_left + 1
+    while True:
+        # Schichten alternierender Pfade ab allen freien linken Knoten
+        layer = [unreached] * n_left
+        queue = [left for left in range(n_left) if match_left[left] < 0]
+        for left in queue:
+            layer[left] = 0
+        found = False
+        for left in queue:
+            for right in adjacency[left]:
+                partner = match_right[right]
+                if partner < 0:
+                    found = True
+                elif layer[partner] == unreached:
+                    layer[partner] = layer[left] + 1
+                    queue.append(partner)
+        if not found:
+            return match_left, match_right
+        # Knotendisjunkte kürzeste augmentierende Pfade entlang der Schichten
+        positions = [0] * n_left
+        for root in range(n_left):
+            if match_left[root] >= 0:
+                continue
+            stack, via = [root], []
+            while stack:
+                left = stack[-1]
+                rights = adjacency[left]
+                if positions[left] == len(rights):
+                    layer[left] = unreached
+                    stack.pop()
+                    if via:
+                        via.pop()
+                    continue
+                right = rights[positions[left]]
+                positions[left] += 1
+                partner = match_right[right]
+                if partner < 0:
+                    via.append(right)
+                    for left, right in zip(stack, via):
+                        match_left[left], match_right[right] = right, left
+                    break
+                if layer[partner] == layer[left] + 1:
+                    via.append(right)
+                    stack.append(partner)
+
+
+def _independent_chords(adjacency, n_right):
+    """
+    Maximale unabhängige Menge im bipartiten Graphen (Komplement der minimalen
+    Knotenüberdeckung nach König).
+
+    Returns:
+        (left, right): bool-Listen der gewählten Knoten
+    """
+    match_left, match_right = _max_matching(adjacency, n_right)
+    reached_left = [m < 0 for m in match_left]
+    reached_right = [False] * n_right
+    queue = [left for left, reached in enumerate(reached_left) if reached]
+    while queue:
+        left = queue.pop()
+        for right in adjacency[left]:
+            if not reached_right[right]:
+                reached_right[right] = True
+                partner = match_right[right]
+                if not reached_left[partner]:
+                    reached_left[partner] = True
+                    queue.append(partner)
+    return reached_left, [not reached for reached in reached_right]
+
+
+def _crossings(h, v):
+    """Adjazenzlisten waagrechter gegen senkrechter Sehnen, die sich schneiden oder berühren"""
+    (hq, ha, hb), (vp, vc, vd) = h, v
+    # Kandidaten: senkrechte Sehnen, deren Linie im u-Bereich der waagrechten liegt
+    order = np.argsort(vp, kind="stable")
+    lo = np.searchsorted(vp[order], ha, "left")
+    counts = np.searchsorted(vp[order], hb, "right") - lo
+    left = np.repeat(np.arange(len(hq)), counts)
+    right = order[np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - lo, counts)]
+    hit = (vc[right] <= hq[left]) & (hq[left] <= vd[right])
+    left, right = left[hit], right[hit]
+    bounds = np.searchsorted(left, np.arange(len(hq) + 1)).tolist()
+    right = right.tolist()
+    return [right[bounds[i]:bounds[i + 1]] for i in range(len(hq))]
+
+
+def min_rectangles(cells):
+    """
+    Zerlegt die belegten Zellen eines 2D-Gitters in möglichst wenige Rechtecke.
+
+    Args:
+        cells: bool np.ndarray (nu, nv)
+
+    Returns:
+        np.ndarray (n, 4) mit u, v, u_end, v_end (inklusive) je Rechteck,
+        sortiert nach (u, v) der Startzelle
+    """
+    nu, nv = cells.shape
+    # Ein Rand aus freien Zellen erspart alle Bereichsprüfungen
+    grid = np.zeros((nu + 2, nv + 2), dtype=bool)
+    grid[1:-1, 1:-1] = cells
+    # inner_u[x, q]: Kante zwischen (x, q - 1) und (x, q); inner_v[p, y]: zwischen (p - 1, y) und (p, y)
+    inner_u = np.zeros((nu + 2, nv + 2), dtype=bool)
+    inner_u[:, 1:] = grid[:, :-1] & grid[:, 1:]
+    inner_v = np.zeros((nu + 2, nv + 2), dtype=bool)
+    inner_v[1:, :] = grid[:-1, :] & grid[1:, :]
+    cut_u = np.zeros_like(inner_u)
+    cut_v = np.zeros_like(inner_v)
+
+    # Konkave Ecken (p, q): drei der Zellen (p - 1, q - 1), (p, q - 1), (p - 1, q), (p, q) belegt
+    quadrants = np.stack([grid[:-1, :-1], grid[1:, :-1], grid[:-1, 1:], grid[1:, 1:]])
+    reflex = quadrants.sum(axis=0) == 3
+    rp, rq = np.nonzero(reflex)
+    # Die freie Zelle liegt auf der Seite, von der die Verlängerung in u wegführt
+    missing = np.argmin(quadrants[:, rp, rq], axis=0)
+    direction = np.where(missing % 2 == 0, 1, -1)
+    rp, rq = rp + 1, rq + 1
+
+    # Gute Sehnen und die Auswahl der größten schnittfreien Menge
+    hq, ha, hb, h_start, h_end = _chords(grid, inner_u, 0)
+    good = h_start & h_end
+    h = hq[good], ha[good], hb[good]
+    vp, vc, vd, v_start, v_end = _chords(grid, inner_v, 1)
+    good = v_start & v_end
+    v = vp[good], vc[good], vd[good]
+    chosen_h, chosen_v = _independent_chords(_crossings(h, v), len(v[0]))
+
+    resolved = set()
+    for (q, a, b), chosen in zip(zip(*(part.tolist() for part in h)), chosen_h):
+        if chosen:
+            cut_u[a:b, q] = True
+            resolved.update(((a, q), (b, q)))
+    for (p, c, d), chosen in zip(zip(*(part.tolist() for part in v)), chosen_v):
+        if chosen:
+            cut_v[p, c:d] = True
+            resolved.update(((p, c), (p, d)))
+
+    # Übrige konkave Ecken in u bis zum Rand oder zum nächsten Schnitt verlängern
+    for p, q, step in zip(rp.tolist(), rq.tolist(), direction.tolist()):
+        if (p, q) in resolved:
+            continue
+        while not (cut_v[p, q - 1] or cut_v[p, q]):
+            x = p if step > 0 else p - 1
+            if not inner_u[x, q] or cut_u[x, q]:
+                break
+            cut_u[x, q] = True
+            p += step
+
+    # Jedes Teilstück ist jetzt ein Rechteck: Startzellen ohne Verbindung nach -u und -v
+    joined_u = inner_v[1:, :] & ~cut_v[1:, :]   # (x, y) mit (x + 1, y)
+    joined_v = inner_u[:, 1:] & ~cut_u[:, 1:]   # (x, y) mit (x, y + 1)
+    corner = grid.copy()
+    corner[1:, :] &= ~joined_u
+    corner[:, 1:] &= ~joined_v
+    cu, cv = np.nonzero(corner)
+    # Ausdehnung: erste Zelle ab der Startzelle ohne Verbindung zur nächsten
+    stops_u = np.flatnonzero(~joined_u.T.ravel())
+    end_u = stops_u[np.searchsorted(stops_u, cv * (nu + 1) + cu)] - cv * (nu + 1)
+    stops_v = np.flatnonzero(~joined_v.ravel())
+    end_v = stops_v[np.searchsorted(stops_v, cu * (nv + 1) + cv)] - cu * (nv + 1)
+    return np.stack([cu, cv, end_u, end_v], axis=1).astype(np.int64) - 1
@@ -0,0 +1,141 @@
+"""Persistenter Cache der Scan-Ergebnisse pro Chunk (inkrementeller Re-Scan)
+
+Wird nach kleinen Änderungen an der Welt erneut exportiert, müssen nur die
+geänderten Chunks und ihre direkten Nachbarn neu gescannt werden: die Faces
+eines Chunks hängen nur von ihm selbst und den vier Nachbar-Chunks ab.
+
+Pro Chunk liegt eine .npz-Datei unter
+    <cache_dir>/<Welt + Dimension>/<Scan-Einstellungen>/c.<cx>.<cz>.npz
+Sie ist gültig, solange
+  - die Zeitstempel des Chunks und seiner vier Nachbarn im Region-Header und
+  - der Ausschnitt der Auswahl rund um den Chunk (inkl. ein Block Rand, mit
+    den Höhenbereichen der Formen, siehe Selection.fingerprint)
+unverändert sind. Einstellungen, die das Ergebnis beeinflussen (forced_faces,
+boundary_mode, reader), bestimmen das Unterverzeichnis.
+
+Quellen ohne Zeitstempel (Bedrock, Strukturen, MemoryWorldSource) und Scans mit
+cull_cavities (Ergebnis hängt von der ganzen Auswahl ab) werden nicht gecacht.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+from .exposed_blocks import ExposedBlockSet
+
+log = logging.getLogger(__name__)
+
+# Bei Änderungen am Scanner erhöhen, damit alte Einträge ungültig werden
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "scans")
+
+# Nachbarn, von denen das Scan-Ergebnis eines Chunks abhängt
+_NEIGHBOURS = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class ScanCache:
+    """
+    Scan-Ergebnisse einer Welt/Dimension für bestimmte Scan-Einstellungen.
+
+    Args:
+        cache_dir: Basisverzeichnis des Caches
+        world_id: Eindeutige Kennung der Welt (absoluter Pfad)
+        settings: Scan-Einstellungen (siehe block_detector.iter_exposed_blocks)
+    """
+
+    def __init__(self, cache_dir, world_id, settings):
+        relevant = {
+            'version': CACHE_VERSION,
+            'forced_faces': settings['forced_faces'],
+            'boundary_mode': settings['boundary_mode'],
+            'reader': settings['reader'],
+        }
+        self.directory = os.path.join(cache_dir, _digest([world_id, settings['dimension']]),
+                                      _digest(relevant))
+        self.settings = settings
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def open(cls, world_path, world, settings):
+        """
+        Öffnet den Cache für einen Scan oder liefert None, wenn nicht gecacht wird.
+
+        Args:
+            world_path: Pfad oder WorldSource, wie an den Scanner übergeben
+            world: geöffnete WorldSource
+        """
+        cache_dir = settings.get('scan_cache')
+        if not cache_dir or settings['cull_cavities']:
+            return None
+        path = world_path if isinstance(world_path, str) else getattr(world, "path", None)
+        if path is None:
+            return None
+        return cls(cache_dir, os.path.abspath(path), settings)
+
+    def key(self, world, cx, cz):
+        """
+        Gültigkeits-Schlüssel eines Chunks: Auswahl um den Chunk und Zeitstempel.
+
+        Returns:
+            np.ndarray (int64) oder None, wenn ein Zeitstempel unbekannt ist
+        """
+        s = self.settings
+        key = np.frombuffer(s['selection'].fingerprint(cx * 16 - 1, cz * 16 - 1, 18, 18)[:16],
+                            dtype=np.int64).tolist()
+        for dx, dz in _NEIGHBOURS:
+            stamp = world.chunk_timestamp(cx + dx, cz + dz, s['dimension'])
+            if stamp is None:
+                return None
+            key.append(stamp)
+        return np.array(key, dtype=np.int64)
+
+    def _path(self, cx, cz):
+        return os.path.join(self.directory, f"c.{cx}.{cz}.npz")
+
+    def load(self, cx, cz, key, table):
+        """
+        Gecachtes Ergebnis eines Chunks als ExposedBlockSet (States in table)
+        oder None, wenn kein gültiger Eintrag existiert.
+        """
+        path = self._path(cx, cz)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if not np.array_equal(data['key'], key):
+                    self.misses += 1
+                    return None
+                states = json.loads(str(data['states']))
+                lookup = np.array([table.add(name, properties) for name, properties in states] or [0],
+                                  dtype=np.uint16)
+                self.hits += 1
+                return ExposedBlockSet(data['xs'], data['ys'], data['zs'], lookup[data['states_idx']],
+                                       data['masks'], table)
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+
+    def store(self, cx, cz, key, blocks):
+        """Speichert das Ergebnis eines Chunks (ExposedBlockSet)"""
+        used, inverse = np.unique(blocks.states, return_inverse=True)
+        table = blocks.state_table
+        states = [[table.names[state], None if table.properties[state] is None else dict(table.properties[state])]
+                  for state in used.tolist()]
+        path = self._path(cx, cz)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, key=key, xs=blocks.xs, ys=blocks.ys, zs=blocks.zs,
+                     states_idx=inverse.astype(np.uint16), masks=blocks.masks,
+                     states=np.array(json.dumps(states)))
+        os.replace(tmp, path)
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        if total:
+            log.info(f"Scan-Cache: {self.hits} von {total} Chunks unverändert übernommen")
@@ -0,0 +1,273 @@
+"""Auswahl - welche Blöcke einer Welt exportiert werden
+
+Eine Auswahl ist eine Vereinigung von Formen mit jeweils eigenem Höhenbereich:
+  - Box: Rechteck x1/z1 bis x2/z2 (inklusive)
+  - Polygon: 2D-Polygon in Block-Koordinaten; eine Spalte gehört dazu, wenn
+    ihr Mittelpunkt (x + 0.5, z + 0.5) innerhalb liegt (Even-Odd-Regel)
+  - ChunkList: ganze Chunks (cx, cz)
+
+Der Scanner liest nur Chunks, die mindestens eine ausgewählte Spalte haben,
+und liefert nur Blöcke, die in einer der Formen liegen.
+
+In der JSON-Konfiguration wird eine Auswahl als Liste von Formen angegeben:
+
+    [
+        {"box": [0, 0, 100, 40], "y_min": 60, "y_max": 120},
+        {"polygon": [[0, 40], [40, 40], [40, 100], [0, 100]]},
+        {"chunks": [[7, 7], [7, 8]], "y_min": -64, "y_max": 0}
+    ]
+
+Fehlt y_min/y_max bei einer Form, gilt der allgemeine Höhenbereich. Ein
+Eintrag {"clip": [x1, z1, x2, z2], "y_min": ..., "y_max": ...} beschneidet die
+ganze Auswahl auf einen Quader (z.B. nach auto_crop.py).
+"""
+
+import hashlib
+import numpy as np
+
+
+class Box:
+    """Rechteck x1/z1 bis x2/z2 (inklusive) mit Höhenbereich"""
+
+    def __init__(self, x1, z1, x2, z2, y_min, y_max):
+        self.x1, self.x2 = min(x1, x2), max(x1, x2)
+        self.z1, self.z2 = min(z1, z2), max(z1, z2)
+        self.y_min, self.y_max = y_min, y_max
+
+    def bounds(self):
+        return self.x1, self.z1, self.x2, self.z2
+
+    def columns(self, x0, z0, sx, sz):
+        xs = np.arange(x0, x0 + sx)
+        zs = np.arange(z0, z0 + sz)
+        return ((xs >= self.x1) & (xs <= self.x2))[:, None] & ((zs >= self.z1) & (zs <= self.z2))[None, :]
+
+    def chunks(self):
+        return [(cx, cz) for cx in range(self.x1 // 16, self.x2 // 16 + 1)
+                for cz in range(self.z1 // 16, self.z2 // 16 + 1)]
+
+    def to_config(self):
+        return {"box": [self.x1, self.z1, self.x2, self.z2], "y_min": self.y_min, "y_max": self.y_max}
+
+
+class Polygon:
+    """2D-Polygon aus Eckpunkten (x, z) in Block-Koordinaten mit Höhenbereich"""
+
+    def __init__(self, points, y_min, y_max):
+        if len(points) < 3:
+            raise ValueError(f"Polygon needs at least 3 points, got {len(points)}")
+        self.points = [(float(x), float(z)) for x, z in points]
+        self.y_min, self.y_max = y_min, y_max
+
+    def bounds(self):
+        xs = [x for x, _ in self.points]
+        zs = [z for _, z in self.points]
+        return (int(np.floor(min(xs))), int(np.floor(min(zs))),
+                int(np.ceil(max(xs))) - 1, int(np.ceil(max(zs))) - 1)
+
+    def columns(self, x0, z0, sx, sz):
+        px = np.arange(x0, x0 + sx, dtype=np.float64)[:, None] + 0.5
+        pz = np.arange(z0, z0 + sz, dtype=np.float64)[None, :] + 0.5
+        inside = np.zeros((sx, sz), dtype=bool)
+        for (xa, za), (xb, zb) in zip(self.points, self.points[1:] + self.points[:1]):
+            if za == zb:
+                continue
+            crosses = (za > pz) != (zb > pz)
+            x_cross = xa + (pz - za) * (xb - xa) / (zb - za)
+            inside ^= crosses & (px < x_cross)
+        return inside
+
+    def chunks(self):
+        x1, z1, x2, z2 = self.bounds()
+        result = []
+        for cx in range(x1 // 16, x2 // 16 + 1):
+            # Ein Streifen von 16 Spalten pro Chunk-Reihe
+            strip = self.columns(cx * 16, (z1 // 16) * 16, 16, (z2 // 16 - z1 // 16 + 1) * 16)
+            used = strip.reshape(16, -1, 16).any(axis=(0, 2))
+            result.extend((cx, z1 // 16 + i) for i in np.nonzero(used)[0].tolist())
+        return result
+
+    def to_config(self):
+        return {"polygon": [[x, z] for x, z in self.points], "y_min": self.y_min, "y_max": self.y_max}
+
+
+class ChunkList:
+    """Ganze Chunks (cx, cz) mit Höhenbereich"""
+
+    def __init__(self, chunks, y_min, y_max):
+        if not chunks:
+            raise ValueError("Chunk list is empty")
+        self.chunk_set = {(int(cx), int(cz)) for cx, cz in chunks}
+        self.y_min, self.y_max = y_min, y_max
+
+    def bounds(self):
+        cxs = [cx for cx, _ in self.chunk_set]
+        czs = [cz for _, cz in self.chunk_set]
+        return min(cxs) * 16, min(czs) * 16, max(cxs) * 16 + 15, max(czs) * 16 + 15
+
+    def columns(self, x0, z0, sx, sz):
+        mask = np.zeros((sx, sz), dtype=bool)
+        for cx in range(x0 // 16, (x0 + sx - 1) // 16 + 1):
+            for cz in range(z0 // 16, (z0 + sz - 1) // 16 + 1):
+                if (cx, cz) in self.chunk_set:
+                    mask[max(0, cx * 16 - x0):cx * 16 + 16 - x0, max(0, cz * 16 - z0):cz * 16 + 16 - z0] = True
+        return mask
+
+    def chunks(self):
+        return sorted(self.chunk_set)
+
+    def to_config(self):
+        return {"chunks": [list(chunk) for chunk in sorted(self.chunk_set)],
+                "y_min": self.y_min, "y_max": self.y_max}
+
+
+class Selection:
+    """
+    Vereinigung von Formen (Box, Polygon, ChunkList), optional beschnitten auf
+    einen Quader (clip, siehe crop).
+
+    Alle Abfragen arbeiten auf Ausschnitten [x0, x0 + sx) x [z0, z0 + sz) und
+    liefern Arrays indiziert [x - x0, z - z0] bzw. [x - x0, z - z0, y - y0].
+    """
+
+    def __init__(self, shapes, clip=None):
+        if not shapes:
+            raise ValueError("Selection needs at least one shape")
+        self.shapes = list(shapes)
+        self.clip = clip
+        self._bounds = [shape.bounds() for shape in self.shapes]
+        self._chunks = None
+
+    @classmethod
+    def box(cls, x1, z1, x2, z2, y_min, y_max):
+        return cls([Box(x1, z1, x2, z2, y_min, y_max)])
+
+    @classmethod
+    def from_config(cls, shapes, y_min=-64, y_max=320):
+        """
+        Auswahl aus der JSON-Form (siehe Modul-Docstring).
+
+        Args:
+            shapes: Liste von dicts mit "box", "polygon" oder "chunks"
+                (und höchstens einem "clip" mit der Form einer Box)
+            y_min, y_max: Höhenbereich für Formen ohne eigenen
+        """
+        result, clip = [], None
+        for shape in shapes:
+            lo, hi = int(shape.get("y_min", y_min)), int(shape.get("y_max", y_max))
+            if "box" in shape:
+                result.append(Box(*(int(v) for v in shape["box"]), lo, hi))
+            elif "polygon" in shape:
+                result.append(Polygon(shape["polygon"], lo, hi))
+            elif "chunks" in shape:
+                result.append(ChunkList(shape["chunks"], lo, hi))
+            elif "clip" in shape:
+                clip = Box(*(int(v) for v in shape["clip"]), lo, hi)
+            else:
+                raise ValueError(f"Unknown selection shape: {shape}")
+        return cls(result, clip)
+
+    def to_config(self):
+        config = [shape.to_config() for shape in self.shapes]
+        if self.clip is not None:
+            config.append({"clip": list(self.clip.bounds()), "y_min": self.clip.y_min, "y_max": self.clip.y_max})
+        return config
+
+    def crop(self, x1, z1, x2, z2, y_min, y_max):
+        """
+        Neue Auswahl, beschnitten auf den Quader x1/z1/y_min bis x2/z2/y_max.
+
+        Returns:
+            Selection oder None, wenn nichts übrig bleibt
+        """
+        if self.clip is not None:
+            old = self.clip
+            x1, z1, x2, z2 = max(old.x1, x1), max(old.z1, z1), min(old.x2, x2), min(old.z2, z2)
+            y_min, y_max = max(old.y_min, y_min), min(old.y_max, y_max)
+        if x1 > x2 or z1 > z2 or y_min > y_max:
+            return None
+        selection = Selection(self.shapes, Box(x1, z1, x2, z2, y_min, y_max))
+        return selection if selection.chunks() else None
+
+    def bounds(self):
+        """Umschließender Quader (x1, z1, x2, z2, y_min, y_max)"""
+        boxes = self._bounds
+        bounds = [min(b[0] for b in boxes), min(b[1] for b in boxes),
+                  max(b[2] for b in boxes), max(b[3] for b in boxes),
+                  min(shape.y_min for shape in self.shapes), max(shape.y_max for shape in self.shapes)]
+        if self.clip is not None:
+            clip = self.clip
+            bounds = [max(bounds[0], clip.x1), max(bounds[1], clip.z1), min(bounds[2], clip.x2),
+                      min(bounds[3], clip.z2), max(bounds[4], clip.y_min), min(bounds[5], clip.y_max)]
+        return tuple(bounds)
+
+    def chunks(self):
+        """Alle Chunks mit ausgewählten Spalten, sortiert (cx außen, cz innen)"""
+        if self._chunks is None:
+            chunks = {chunk for shape in self.shapes for chunk in shape.chunks()}
+            if self.clip is not None:
+                x1, z1, x2, z2, y_min, y_max = self.bounds()
+                chunks = {(cx, cz) for cx, cz in chunks
+                          if x1 // 16 <= cx <= x2 // 16 and z1 // 16 <= cz <= z2 // 16
+                          and y_min <= y_max and self.columns(cx * 16, cz * 16, 16, 16).any()}
+            self._chunks = sorted(chunks)
+        return self._chunks
+
+    def _parts(self, x0, z0, sx, sz):
+        """(y_min, y_max, Spalten-Maske) jeder Form mit Spalten im Ausschnitt, beschnitten auf clip"""
+        for shape, (x1, z1, x2, z2) in zip(self.shapes, self._bounds):
+            if x1 >= x0 + sx or x2 < x0 or z1 >= z0 + sz or z2 < z0:
+                continue
+            y_min, y_max = shape.y_min, shape.y_max
+            columns = shape.columns(x0, z0, sx, sz)
+            if self.clip is not None:
+                y_min, y_max = max(y_min, self.clip.y_min), min(y_max, self.clip.y_max)
+                columns &= self.clip.columns(x0, z0, sx, sz)
+            if y_min <= y_max and columns.any():
+                yield y_min, y_max, columns
+
+    def columns(self, x0, z0, sx, sz):
+        """bool-Maske [x, z] der Spalten, die in mindestens einer Form liegen"""
+        mask = np.zeros((sx, sz), dtype=bool)
+        for _, _, columns in self._parts(x0, z0, sx, sz):
+            mask |= columns
+        return mask
+
+    def mask(self, x0, z0, y0, sx, sz, sy):
+        """bool-Maske [x, z, y] der ausgewählten Blöcke"""
+        mask = np.zeros((sx, sz, sy), dtype=bool)
+        ys = np.arange(y0, y0 + sy)
+        for y_min, y_max, columns in self._parts(x0, z0, sx, sz):
+            in_range = (ys >= y_min) & (ys <= y_max)
+            if in_range.any():
+                mask |= columns[:, :, None] & in_range[None, None, :]
+        return mask
+
+    def y_range(self, x0, z0, sx, sz):
+        """
+        Höhenbereich der Formen mit Spalten im Ausschnitt.
+
+        Returns:
+            (y_min, y_max) oder None, wenn keine Spalte ausgewählt ist
+        """
+        ranges = [(y_min, y_max) for y_min, y_max, _ in self._parts(x0, z0, sx, sz)]
+        if not ranges:
+            return None
+        return min(lo for lo, _ in ranges), max(hi for _, hi in ranges)
+
+    def chunk_window(self, cx, cz):
+        """Lokale Spalten (start_x, end_x, start_z, end_z) des Rechtecks um die Auswahl im Chunk"""
+        columns = self.columns(cx * 16, cz * 16, 16, 16)
+        xs = np.nonzero(columns.any(axis=1))[0]
+        zs = np.nonzero(columns.any(axis=0))[0]
+        if len(xs) == 0:
+            return 0, 0, 0, 0
+        return int(xs[0]), int(xs[-1]) + 1, int(zs[0]), int(zs[-1]) + 1
+
+    def fingerprint(self, x0, z0, sx, sz):
+        """Hash der Auswahl innerhalb eines Ausschnitts (Spalten und Höhenbereiche)"""
+        digest = hashlib.sha1()
+        for y_min, y_max, columns in self._parts(x0, z0, sx, sz):
+            digest.update(np.array([y_min, y_max], dtype=np.int64).tobytes())
+            digest.update(np.packbits(columns).tobytes())
+        return digest.digest()
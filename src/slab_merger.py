@@ -3,6 +3,9 @@
 Führt benachbarte Slabs mit identischen Eigenschaften (bottom/top, Typ) zu Quadern zusammen.
 """
 
+import numpy as np
+from .block_merger import group_blocks, greedy_boxes, layer_boxes
+
 def is_mergeable_slab(block_type, properties):
     if not block_type.endswith("_slab"):
         return False
@@ -11,63 +14,42 @@ def is_mergeable_slab(block_type, properties):
     return properties["type"] in ("top", "bottom")
 
 
-def greedy_mesh_slabs(blocks_info):
+def greedy_mesh_slabs(blocks, exact=False):
     """
     Führt benachbarte Slabs mit identischen Eigenschaften zusammen.
     Args:
-        blocks_info: dict mapping (x, y, z) -> { 'block_type', 'exposed_faces', 'properties' }
+        blocks: ExposedBlockSet
+        exact: Jede Schicht minimal in Rechtecke zerlegen (layer_boxes) statt greedy
     Returns:
         merged_slabs: list of dicts (wie merged_regions)
-        non_mergeable: list of Einzel-Slabs (x, y, z, ...)
+        non_mergeable: np.ndarray der Indizes einzelner Slabs
     """
-    # Gruppiere nach (block_type, slab_type)
-    groups = {}
-    for (x, y, z), info in blocks_info.items():
-        if is_mergeable_slab(info['block_type'], info['properties']):
-            slab_type = info['properties']['type']
-            key = (info['block_type'], slab_type)
-            if key not in groups:
-                groups[key] = {}
-            groups[key][(x, y, z)] = info
-    
+    # Gruppen-Schlüssel (block_type, slab_type) einmal pro Block-State
+    table = blocks.state_table
+    state_keys = [
+        (name, props['type']) if is_mergeable_slab(name, props) else None
+        for name, props in zip(table.names, table.properties)
+    ]
+    candidates = np.nonzero(np.array([key is not None for key in state_keys], dtype=bool)[blocks.states])[0]
+
+    # Gruppiere per State-ID nach (block_type, slab_type); keine Erweiterung in Y (nicht stapelbar)
     merged_slabs = []
-    used = set()
-    for (block_type, slab_type), positions_info in groups.items():
-        remaining = set(positions_info.keys())
-        for pos in sorted(remaining):
-            if pos in used:
-                continue
-            x, y, z = pos
-            # --- Schritt 1: Erweitere in X-Richtung ---
-            x_end = x
-            while (x_end + 1, y, z) in remaining and (x_end + 1, y, z) not in used:
-                x_end += 1
-            # --- Schritt 2: Erweitere in Z-Richtung ---
-            z_end = z
-            while True:
-                can_extend = True
-                for xi in range(x, x_end + 1):
-                    if (xi, y, z_end + 1) not in remaining or (xi, y, z_end + 1) in used:
-                        can_extend = False
-                        break
-                if not can_extend:
-                    break
-                z_end += 1
-            # --- Schritt 3: Erweitere in Y-Richtung (Höhe) ---
-            # Für Slabs: Keine Erweiterung in Y, da sie nicht stapelbar sind
-            y_end = y
-            # Markiere alle als benutzt
-            for xi in range(x, x_end + 1):
-                for yi in range(y, y_end + 1):
-                    for zi in range(z, z_end + 1):
-                        used.add((xi, yi, zi))
-            # Sichtbare Faces
-            constituent_blocks = [(xi, yi, zi) for xi in range(x, x_end + 1) for yi in range(y, y_end + 1) for zi in range(z, z_end + 1)]
-            exposed = set()
-            for bx, by, bz in constituent_blocks:
-                info = positions_info.get((bx, by, bz))
-                if info:
-                    exposed.update(info['exposed_faces'])
+    used = np.zeros(len(blocks), dtype=bool)
+    for (block_type, slab_type), indices in group_blocks(blocks, state_keys):
+        if exact:
+            boxes, members, offsets = layer_boxes(blocks.xs[indices], blocks.ys[indices], blocks.zs[indices],
+                                                  stack=False)
+        else:
+            boxes, members, offsets = greedy_boxes(blocks.xs[indices], blocks.ys[indices], blocks.zs[indices],
+                                                   extend_y=False)
+        members = indices[members]
+        used[members] = True
+        # Sichtbare Faces: alle Faces der einzelnen Blöcke
+        exposed = np.bitwise_or.reduceat(blocks.masks[members], offsets[:-1]).tolist()
+        positions = list(zip(blocks.xs[members].tolist(), blocks.ys[members].tolist(), blocks.zs[members].tolist()))
+        bounds = offsets.tolist()
+        for i, (x, y, z, x_end, y_end, z_end) in enumerate(boxes.tolist()):
+            start = bounds[i]
             merged_slabs.append({
                 'block_type': block_type,
                 'slab_type': slab_type,
@@ -75,14 +57,11 @@ def greedy_mesh_slabs(blocks_info):
                 'size_x': x_end - x + 1,
                 'size_y': y_end - y + 1,
                 'size_z': z_end - z + 1,
-                'exposed_faces': list(exposed),
-                'constituent_blocks': constituent_blocks,
-                'properties': positions_info[pos]['properties']
+                'exposed_faces': int(exposed[i]),
+                'constituent_blocks': positions[start:bounds[i + 1]],
+                'properties': blocks.properties(int(members[start]))
             })
+
     # Nicht-mergebare Slabs
-    non_mergeable = [
-        (x, y, z, info['block_type'], info['exposed_faces'], info['properties'])
-        for (x, y, z), info in blocks_info.items()
-        if is_mergeable_slab(info['block_type'], info['properties']) and (x, y, z) not in used
-    ]
+    non_mergeable = candidates[~used[candidates]]
     return merged_slabs, non_mergeable
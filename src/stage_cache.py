@@ -0,0 +1,266 @@
+"""Persistenter Cache der Konvertierungs-Stufen (Scan, Merge, Build)
+
+convert_to_vmf läuft in drei Stufen, die jeweils nur von einem Teil der
+Einstellungen abhängen:
+  1. scan:  Welt-Inhalt, Auswahl, Höhenbereich, force_ns/ew, cull_cavities,
+            boundary_mode, reader -> ExposedBlockSet
+  2. merge: Ergebnis von scan, merge_by_material, merge_across_types,
+            merge_axis_search, merge_exact -> Greedy-Mesh-Regionen
+            und einzelne Blöcke
+  3. build: Ergebnis von merge (bzw. scan ohne merge_blocks), Material-Pfad,
+            face_mapping, group_mode, Textur-Skalierung -> VMF-Datei
+
+Der Schlüssel jeder Stufe ist ein Hash aus dem Schlüssel der Vorstufe und den
+eigenen Eingaben. Wird z.B. nur texture_scale_x geändert, kommen Scan und
+Merge aus dem Cache und nur das VMF wird neu gebaut.
+
+Der Welt-Inhalt geht über einen Fingerabdruck ein: Änderungszeit und Größe
+der Region-Dateien um die Auswahl (Java) bzw. aller Dateien der Welt (andere
+Formate). Direkt übergebene WorldSources werden nicht gecacht.
+
+Die Einträge liegen als komprimierte .npz bzw. .vmf.gz-Dateien im Cache-
+Verzeichnis; über max_bytes hinaus werden die am längsten nicht genutzten
+Einträge gelöscht. purge() leert ein Cache-Verzeichnis vollständig.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import numpy as np
+from .anvil_reader import region_dir
+from .exposed_blocks import ExposedBlockSet
+
+log = logging.getLogger(__name__)
+
+# Bei Änderungen an Scanner, Merger oder VMF-Ausgabe erhöhen
+CACHE_VERSION = 3
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "stages")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+STAGE_SCAN = "scan"
+STAGE_MERGE = "merge"
+STAGE_BUILD = "build"
+
+_EXTENSIONS = {STAGE_SCAN: ".npz", STAGE_MERGE: ".npz", STAGE_BUILD: ".vmf.gz"}
+
+# Spalten einer Greedy-Mesh-Region (siehe block_merger.greedy_mesh_3d)
+_REGION_COLUMNS = ('mc_x', 'mc_y', 'mc_z', 'size_x', 'size_y', 'size_z', 'exposed_faces')
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+
+def _file_stats(paths):
+    stats = []
+    for path in sorted(paths):
+        try:
+            st = os.stat(path)
+            stats.append([os.path.basename(path), st.st_mtime_ns, st.st_size])
+        except OSError:
+            stats.append([os.path.basename(path), None, None])
+    return stats
+
+
+def world_fingerprint(world_path, dimension, x1, z1, x2, z2):
+    """
+    Fingerabdruck des Welt-Inhalts, der für die Auswahl gelesen wird.
+
+    Returns:
+        JSON-fähige Liste oder None, wenn world_path kein Pfad ist
+    """
+    if not isinstance(world_path, str) or not os.path.exists(world_path):
+        return None
+    directory = region_dir(world_path, dimension)
+    if os.path.isdir(directory):
+        # Auswahl plus ein Chunk Rand (Nachbar-Chunks)
+        regions = {
+            (rx, rz)
+            for rx in range((x1 // 16 - 1) >> 5, ((x2 // 16 + 1) >> 5) + 1)
+            for rz in range((z1 // 16 - 1) >> 5, ((z2 // 16 + 1) >> 5) + 1)
+        }
+        return _file_stats(os.path.join(directory, f"r.{rx}.{rz}.mca") for rx, rz in regions)
+    if os.path.isfile(world_path):
+        return _file_stats([world_path])
+    paths = [os.path.join(root, name) for root, _, names in os.walk(world_path) for name in names]
+    return _file_stats(paths)
+
+
+def stage_keys(world_path, selection, dimension, force_ns, force_ew,
+               cull_cavities, boundary_mode, reader, merge_blocks,
+               mat_path, face_mapping, group_mode, texture_scale_x, texture_scale_y,
+               merge_by_material=False, merge_across_types=False, merge_axis_search=False, merge_exact=False):
+    """
+    Schlüssel der drei Stufen.
+
+    Args:
+        selection: selection.Selection
+
+    Returns:
+        dict Stufe -> Schlüssel (ohne STAGE_MERGE, wenn merge_blocks aus ist)
+        oder None, wenn die Welt nicht gecacht werden kann
+    """
+    x1, z1, x2, z2, _, _ = selection.bounds()
+    fingerprint = world_fingerprint(world_path, dimension, x1, z1, x2, z2)
+    if fingerprint is None:
+        return None
+    keys = {STAGE_SCAN: _digest([
+        STAGE_SCAN, CACHE_VERSION, os.path.abspath(world_path), fingerprint, dimension,
+        selection.to_config(), force_ns, force_ew, cull_cavities, boundary_mode, reader,
+    ])}
+    parent = keys[STAGE_SCAN]
+    if merge_blocks:
+        keys[STAGE_MERGE] = parent = _digest([STAGE_MERGE, CACHE_VERSION, parent, merge_by_material,
+                                              merge_across_types, merge_axis_search, merge_exact])
+    keys[STAGE_BUILD] = _digest([
+        STAGE_BUILD, CACHE_VERSION, parent, merge_blocks, mat_path, face_mapping, group_mode,
+        texture_scale_x, texture_scale_y,
+    ])
+    return keys
+
+
+class StageCache:
+    """
+    Verzeichnis mit den Ergebnissen der Stufen, begrenzt auf max_bytes.
+
+    Args:
+        directory: Cache-Verzeichnis
+        max_bytes: Obergrenze der Gesamtgröße (älteste Einträge werden gelöscht)
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, stage, key):
+        return os.path.join(self.directory, f"{stage}-{key}{_EXTENSIONS[stage]}")
+
+    def _hit(self, stage, key):
+        """Pfad eines vorhandenen Eintrags (Zugriffszeit wird für LRU aktualisiert) oder None"""
+        path = self._path(stage, key)
+        if not os.path.isfile(path):
+            log.info(f"Stage-Cache: {stage} neu berechnen")
+            return None
+        os.utime(path)
+        log.info(f"Stage-Cache: {stage} aus dem Cache")
+        return path
+
+    def _store(self, stage, key, write):
+        path = self._path(stage, key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+        self.enforce_limit()
+
+    # --- scan ---
+
+    def load_scan(self, key):
+        path = self._hit(STAGE_SCAN, key)
+        return None if path is None else ExposedBlockSet.load(path)
+
+    def store_scan(self, key, blocks):
+        self._store(STAGE_SCAN, key, blocks.save)
+
+    # --- merge ---
+
+    def load_merge(self, key):
+        """
+        Returns:
+            (merged_regions, individual) oder None. Die Regionen enthalten die
+            Felder, die der Build braucht (ohne 'constituent_blocks').
+        """
+        path = self._hit(STAGE_MERGE, key)
+        if path is None:
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            columns = {name: data[name].tolist() for name in _REGION_COLUMNS}
+            names = data['block_type'].tolist()
+            textures = [tuple(row) for row in data['face_textures'].tolist()]
+            parts = np.split(data['constituent_indices'], data['offsets'][1:-1])
+            regions = [
+                dict({name: columns[name][i] for name in _REGION_COLUMNS},
+                     block_type=names[i], constituent_indices=parts[i])
+                for i in range(len(names))
+            ]
+            # Textur je Seite nur bei typübergreifend zusammengeführten Regionen
+            for region, row in zip(regions, textures):
+                if any(row):
+                    region['face_textures'] = row
+            return regions, data['individual']
+
+    def store_merge(self, key, regions, individual):
+        def write(f):
+            offsets = np.cumsum([0] + [len(region['constituent_indices']) for region in regions])
+            constituents = [np.asarray(region['constituent_indices'], dtype=np.int64) for region in regions]
+            np.savez_compressed(
+                f,
+                block_type=np.array([region['block_type'] for region in regions], dtype=str),
+                face_textures=np.array([region.get('face_textures', ('',) * 6) for region in regions],
+                                       dtype=str).reshape(-1, 6),
+                constituent_indices=np.concatenate(constituents) if constituents else np.zeros(0, np.int64),
+                offsets=offsets, individual=np.asarray(individual, dtype=np.int64),
+                **{name: np.array([region[name] for region in regions], dtype=np.int64)
+                   for name in _REGION_COLUMNS}
+            )
+        self._store(STAGE_MERGE, key, write)
+
+    # --- build ---
+
+    def load_build(self, key, output_vmf):
+        """Schreibt die gecachte VMF nach output_vmf; False, wenn es keine gibt"""
+        path = self._hit(STAGE_BUILD, key)
+        if path is None:
+            return False
+        with gzip.open(path, "rb") as src, open(output_vmf, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        return True
+
+    def store_build(self, key, output_vmf):
+        def write(f):
+            with open(output_vmf, "rb") as src, gzip.GzipFile(fileobj=f, mode="wb") as dst:
+                shutil.copyfileobj(src, dst)
+        self._store(STAGE_BUILD, key, write)
+
+    # --- Größe ---
+
+    def enforce_limit(self):
+        """Löscht die am längsten nicht genutzten Einträge, bis max_bytes eingehalten wird"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path) and not name.endswith(".tmp"):
+                st = os.stat(path)
+                entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            log.info(f"Stage-Cache: {os.path.basename(path)} entfernt (Limit {self.max_bytes} Bytes)")
+
+
+def purge(directory):
+    """
+    Leert ein Cache-Verzeichnis (Stage- oder Scan-Cache) vollständig.
+
+    Returns:
+        (Anzahl Dateien, freigegebene Bytes)
+    """
+    files = freed = 0
+    if not os.path.isdir(directory):
+        return files, freed
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            freed += os.path.getsize(path)
+            files += 1
+    shutil.rmtree(directory)
+    log.info(f"Cache {directory} geleert: {files} Dateien, {freed} Bytes")
+    return files, freed
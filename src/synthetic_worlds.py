@@ -0,0 +1,161 @@
+"""Synthetische Welten für reproduzierbare Benchmarks und Tests
+
+Alle Generatoren sind deterministisch (seed) und liefern eine MemoryWorldSource
+(siehe world_source.py), die wie ein Pfad an get_exposed_blocks/convert_to_vmf
+übergeben werden kann. Die Welt beginnt bei x = z = 0 und y = 0 und ist
+chunks_x * 16 x chunks_z * 16 Blöcke groß.
+
+  - terrain: Höhenfeld aus überlagerten Wellen mit Stein, Erde, Gras und Wasser
+  - caves: terrain mit eingeschlossenen Höhlen (Testfall für cull_cavities)
+  - buildings: hohle Gebäude mit Geschossdecken, Fenstern und Treppendach
+  - stairs_and_fences: Flächen aus Treppen, Slabs, Zäunen, Gittern und Teppichen
+"""
+
+import numpy as np
+from .world_source import MemoryWorldSource, AIR, block_state
+
+
+def _height_field(rng, size_x, size_z, base, amplitude, waves=4):
+    """Glattes Höhenfeld [x, z] aus zufälligen Sinuswellen"""
+    x = np.arange(size_x)[:, None]
+    z = np.arange(size_z)[None, :]
+    field = np.zeros((size_x, size_z))
+    for i in range(waves):
+        fx, fz = rng.uniform(0.01, 0.08, size=2) * (i + 1)
+        phase = rng.uniform(0, 2 * np.pi)
+        field += np.sin(x * fx + z * fz + phase) / (i + 1)
+    field /= np.abs(field).max() or 1
+    return np.round(base + field * amplitude).astype(np.int64)
+
+
+def _terrain_array(rng, size_x, size_z, height, sea_level):
+    palette = [AIR, block_state("bedrock"), block_state("stone"), block_state("dirt"),
+               block_state("grass_block", snowy="false"), block_state("water", level=0)]
+    bedrock, stone, dirt, grass, water = range(1, 6)
+    heights = np.clip(_height_field(rng, size_x, size_z, sea_level, height // 4), 4, height - 2)
+    y = np.arange(height)[None, None, :]
+    top = heights[:, :, None]
+    blocks = np.zeros((size_x, size_z, height), dtype=np.uint16)
+    blocks[y < top - 3] = stone
+    blocks[(y >= top - 3) & (y < top)] = dirt
+    blocks[(y == top) & (top >= sea_level)] = grass
+    blocks[(y == top) & (top < sea_level)] = dirt
+    blocks[(y > top) & (y <= sea_level)] = water
+    blocks[:, :, 0] = bedrock
+    return blocks, palette, heights
+
+
+def terrain(chunks_x=4, chunks_z=4, seed=0, height=96, sea_level=40):
+    """Hügellandschaft mit Seen"""
+    rng = np.random.default_rng(seed)
+    blocks, palette, _ = _terrain_array(rng, chunks_x * 16, chunks_z * 16, height, sea_level)
+    return MemoryWorldSource.from_array(blocks, palette)
+
+
+def caves(chunks_x=4, chunks_z=4, seed=0, height=96, sea_level=40, caves_per_chunk=3):
+    """
+    Hügellandschaft mit kugelförmigen Höhlen. Die Höhlen bleiben mindestens
+    vier Blöcke unter der Oberfläche und sind damit von außen unerreichbar.
+    """
+    rng = np.random.default_rng(seed)
+    size_x, size_z = chunks_x * 16, chunks_z * 16
+    blocks, palette, heights = _terrain_array(rng, size_x, size_z, height, sea_level)
+    y = np.arange(height)[None, None, :]
+    below_surface = (y < heights[:, :, None] - 4) & (y > 1)
+    for _ in range(chunks_x * chunks_z * caves_per_chunk):
+        radius = int(rng.integers(2, 6))
+        cx, cz = int(rng.integers(0, size_x)), int(rng.integers(0, size_z))
+        cy = int(rng.integers(radius + 2, max(radius + 3, int(heights[cx, cz]) - radius - 4)))
+        xs = slice(max(0, cx - radius), min(size_x, cx + radius + 1))
+        zs = slice(max(0, cz - radius), min(size_z, cz + radius + 1))
+        ys = slice(max(0, cy - radius), min(height, cy + radius + 1))
+        gx, gz, gy = np.ogrid[xs, zs, ys]
+        sphere = (gx - cx) ** 2 + (gz - cz) ** 2 + (gy - cy) ** 2 <= radius * radius
+        blocks[xs, zs, ys][sphere & below_surface[xs, zs, ys]] = 0
+    return MemoryWorldSource.from_array(blocks, palette)
+
+
+def buildings(chunks_x=4, chunks_z=4, seed=0, max_floors=4, floor_height=4):
+    """Ein hohles Gebäude pro Chunk auf flachem Grund"""
+    rng = np.random.default_rng(seed)
+    size_x, size_z = chunks_x * 16, chunks_z * 16
+    height = 6 + max_floors * floor_height + 2
+    palette = [AIR, block_state("stone"), block_state("grass_block", snowy="false"),
+               block_state("stone_bricks"), block_state("oak_planks"),
+               block_state("glass_pane", east="false", north="false", south="false",
+                           waterlogged="false", west="false"),
+               block_state("oak_slab", type="bottom", waterlogged="false")]
+    stone, grass, bricks, planks, pane, slab = range(1, 7)
+    stairs = {facing: len(palette) + i for i, facing in enumerate(("north", "south"))}
+    palette += [block_state("oak_stairs", facing=facing, half="bottom", shape="straight",
+                            waterlogged="false") for facing in stairs]
+
+    blocks = np.zeros((size_x, size_z, height), dtype=np.uint16)
+    blocks[:, :, :4] = stone
+    blocks[:, :, 4] = grass
+    ground = 5
+    for cx in range(chunks_x):
+        for cz in range(chunks_z):
+            w, d = (int(v) for v in rng.integers(7, 14, size=2))
+            x0, z0 = cx * 16 + int(rng.integers(1, 16 - w)), cz * 16 + int(rng.integers(1, 16 - d))
+            x1, z1 = x0 + w - 1, z0 + d - 1
+            top = ground + int(rng.integers(1, max_floors + 1)) * floor_height
+            # Außenwände mit Fensterreihen
+            blocks[x0:x1 + 1, z0:z1 + 1, ground:top] = bricks
+            blocks[x0 + 1:x1, z0 + 1:z1, ground:top] = 0
+            for y in range(ground + 2, top, floor_height):
+                blocks[x0 + 2:x1 - 1:2, (z0, z1), y] = pane
+                blocks[(x0, x1), z0 + 2:z1 - 1:2, y] = pane
+            # Tür
+            blocks[x0 + w // 2, z0, ground:ground + 2] = 0
+            # Geschossdecken
+            for y in range(ground + floor_height, top, floor_height):
+                blocks[x0 + 1:x1, z0 + 1:z1, y] = planks
+            # Dach: Treppen an den Längsseiten, Slabs dazwischen
+            blocks[x0:x1 + 1, z0, top] = stairs["south"]
+            blocks[x0:x1 + 1, z1, top] = stairs["north"]
+            blocks[x0:x1 + 1, z0 + 1:z1, top] = slab
+    return MemoryWorldSource.from_array(blocks, palette)
+
+
+def stairs_and_fences(chunks_x=4, chunks_z=4, seed=0, patch=4, layers=3):
+    """
+    Flacher Boden mit zufälligen patch x patch großen Flächen aus je einem
+    Treppen-, Slab-, Zaun-, Gitter-, Teppich- oder Falltür-State, bis zu
+    layers Ebenen hoch.
+    """
+    rng = np.random.default_rng(seed)
+    size_x, size_z = chunks_x * 16, chunks_z * 16
+    palette = [AIR, block_state("stone")]
+    for facing in ("north", "south", "east", "west"):
+        for half in ("bottom", "top"):
+            palette.append(block_state("oak_stairs", facing=facing, half=half, shape="straight",
+                                       waterlogged="false"))
+            palette.append(block_state("oak_trapdoor", facing=facing, half=half, open="false",
+                                       powered="false", waterlogged="false"))
+    for kind in ("bottom", "top", "double"):
+        palette.append(block_state("stone_slab", type=kind, waterlogged="false"))
+    palette += [
+        block_state("oak_fence", east="false", north="false", south="false", waterlogged="false",
+                    west="false"),
+        block_state("iron_bars", east="false", north="false", south="false", waterlogged="false",
+                    west="false"),
+        block_state("red_carpet"),
+    ]
+
+    blocks = np.zeros((size_x, size_z, layers + 1), dtype=np.uint16)
+    blocks[:, :, 0] = 1
+    for x in range(0, size_x, patch):
+        for z in range(0, size_z, patch):
+            state = int(rng.integers(2, len(palette)))
+            top = int(rng.integers(1, layers + 1))
+            blocks[x:x + patch, z:z + patch, 1:top + 1] = state
+    return MemoryWorldSource.from_array(blocks, palette)
+
+
+GENERATORS = {
+    "terrain": terrain,
+    "caves": caves,
+    "buildings": buildings,
+    "stairs_and_fences": stairs_and_fences,
+}
@@ -585,4 +585,21 @@ def get_texture(block_name):
     
     # Fallback: Gib den ursprünglichen Namen zurück (wird dann toolsnodraw)
     log.warning(f"Keine Textur für Block '{block_name}' gefunden, wird unsichtbar")
-    return block_name
\ No newline at end of file
+    return block_name
+
+def face_textures(block_name):
+    """
+    Texturen eines Blocks je Face-Art, wie apply_materials_to_solid sie vergibt.
+
+    Blöcke mit gleichem Ergebnis sehen als Brush identisch aus und dürfen beim
+    Greedy Meshing zusammengeführt werden (block_merger, by_material).
+
+    Returns:
+        (top, side, bottom): Texturnamen ohne Material-Pfad
+    """
+    if block_name == "grass_block":
+        return "grass_block_top", "grass_block_side", "dirt"
+    base_tex = get_texture(block_name)
+    if block_name.endswith(("_log", "_stem", "_wood")):
+        return f"{base_tex}_top", base_tex, f"{base_tex}_top"
+    return base_tex, base_tex, base_tex
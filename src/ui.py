@@ -6,6 +6,9 @@ import traceback
 import json
 import os
 from .vmf_builder import convert_to_vmf
+from .selection import Selection
+from .scan_cache import DEFAULT_CACHE_DIR
+from .stage_cache import DEFAULT_CACHE_DIR as DEFAULT_STAGE_CACHE_DIR, purge
 
 
 class MinecraftToSourceUI:
@@ -26,14 +29,28 @@ class MinecraftToSourceUI:
         self.z2 = tk.StringVar(value="100")
         self.y_min = tk.StringVar(value="-64")
         self.y_max = tk.StringVar(value="320")
+        # Optionale Auswahl aus Boxen/Polygonen/Chunks (siehe selection.py), ersetzt X1..Z2
+        self.selection = []
+        self.auto_crop = tk.BooleanVar(value=False)
         self.materials_path = tk.StringVar(value="minecraft")
         self.face_mapping = tk.StringVar(value="standard")
         self.force_ns = tk.BooleanVar(value=False)
         self.force_ew = tk.BooleanVar(value=False)
         self.group_mode = tk.StringVar(value="group_blocks")
         self.merge_blocks = tk.BooleanVar(value=True)
+        self.merge_by_material = tk.BooleanVar(value=False)
+        self.merge_across_types = tk.BooleanVar(value=False)
+        self.merge_axis_search = tk.BooleanVar(value=False)
+        self.merge_exact = tk.BooleanVar(value=False)
         self.texture_scale_x = tk.DoubleVar(value=1.0)
         self.texture_scale_y = tk.DoubleVar(value=1.0)
+        self.workers = tk.IntVar(value=1)
+        self.cull_cavities = tk.BooleanVar(value=False)
+        self.boundary_mode = tk.StringVar(value="load_neighbours")
+        self.reader = tk.StringVar(value="amulet")
+        self.incremental_scan = tk.BooleanVar(value=False)
+        self.stage_cache = tk.BooleanVar(value=False)
+        self.stage_cache_mb = tk.IntVar(value=2048)
         # Load saved settings
         self.load_settings()
         self.setup_ui()
@@ -52,14 +69,27 @@ class MinecraftToSourceUI:
                 self.z2.set(settings.get("z2", "100"))
                 self.y_min.set(settings.get("y_min", "-64"))
                 self.y_max.set(settings.get("y_max", "320"))
+                self.selection = settings.get("selection", [])
+                self.auto_crop.set(settings.get("auto_crop", False))
                 self.materials_path.set(settings.get("materials_path", "minecraft"))
                 self.face_mapping.set(settings.get("face_mapping", "standard"))
                 self.force_ns.set(settings.get("force_ns", False))
                 self.force_ew.set(settings.get("force_ew", False))
                 self.group_mode.set(settings.get("group_mode", "group_blocks"))
                 self.merge_blocks.set(settings.get("merge_blocks", True))
+                self.merge_by_material.set(settings.get("merge_by_material", False))
+                self.merge_across_types.set(settings.get("merge_across_types", False))
+                self.merge_axis_search.set(settings.get("merge_axis_search", False))
+                self.merge_exact.set(settings.get("merge_exact", False))
                 self.texture_scale_x.set(settings.get("texture_scale_x", 1.0))
                 self.texture_scale_y.set(settings.get("texture_scale_y", 1.0))
+                self.workers.set(settings.get("workers", 1))
+                self.cull_cavities.set(settings.get("cull_cavities", False))
+                self.boundary_mode.set(settings.get("boundary_mode", "load_neighbours"))
+                self.reader.set(settings.get("reader", "amulet"))
+                self.incremental_scan.set(settings.get("incremental_scan", False))
+                self.stage_cache.set(settings.get("stage_cache", False))
+                self.stage_cache_mb.set(settings.get("stage_cache_mb", 2048))
                 print(f"Settings loaded from {self.config_file}")
             except Exception as e:
                 print(f"Error loading settings: {e}")
@@ -75,14 +105,27 @@ class MinecraftToSourceUI:
             "z2": self.z2.get(),
             "y_min": self.y_min.get(),
             "y_max": self.y_max.get(),
+            "selection": self.selection,
+            "auto_crop": self.auto_crop.get(),
             "materials_path": self.materials_path.get(),
             "face_mapping": self.face_mapping.get(),
             "force_ns": self.force_ns.get(),
             "force_ew": self.force_ew.get(),
             "group_mode": self.group_mode.get(),
             "merge_blocks": self.merge_blocks.get(),
+            "merge_by_material": self.merge_by_material.get(),
+            "merge_across_types": self.merge_across_types.get(),
+            "merge_axis_search": self.merge_axis_search.get(),
+            "merge_exact": self.merge_exact.get(),
             "texture_scale_x": self.texture_scale_x.get(),
-            "texture_scale_y": self.texture_scale_y.get()
+            "texture_scale_y": self.texture_scale_y.get(),
+            "workers": self.workers.get(),
+            "cull_cavities": self.cull_cavities.get(),
+            "boundary_mode": self.boundary_mode.get(),
+            "reader": self.reader.get(),
+            "incremental_scan": self.incremental_scan.get(),
+            "stage_cache": self.stage_cache.get(),
+            "stage_cache_mb": self.stage_cache_mb.get()
         }
         
         try:
@@ -118,6 +161,12 @@ class MinecraftToSourceUI:
         for i, (lbl, var) in enumerate(coords):
             ttk.Label(coord_frame, text=lbl).grid(row=i//2, column=(i%2)*2, padx=5, pady=2)
             ttk.Entry(coord_frame, textvariable=var, width=10).grid(row=i//2, column=(i%2)*2+1, padx=5, pady=2)
+        ttk.Label(coord_frame, text="Shapes (JSON, replaces X1-Z2 if set):").grid(row=2, column=0, columnspan=4, sticky="w", pady=(5,0))
+        self.selection_text = tk.Text(coord_frame, width=40, height=3)
+        self.selection_text.grid(row=3, column=0, columnspan=4, sticky="we", padx=5, pady=2)
+        if self.selection:
+            self.selection_text.insert("1.0", json.dumps(self.selection))
+        ttk.Label(coord_frame, text='e.g. [{"box": [0, 0, 50, 20]}, {"polygon": [[0, 20], [20, 20], [0, 60]], "y_min": 0}]', foreground="gray").grid(row=4, column=0, columnspan=4, sticky="w", padx=5)
 
         # Height
         height_frame = ttk.LabelFrame(left, text="Height", padding="10")
@@ -126,6 +175,7 @@ class MinecraftToSourceUI:
         ttk.Entry(height_frame, textvariable=self.y_min, width=10).grid(row=0, column=1, padx=5)
         ttk.Label(height_frame, text="Y Max:").grid(row=0, column=2, padx=5)
         ttk.Entry(height_frame, textvariable=self.y_max, width=10).grid(row=0, column=3, padx=5)
+        ttk.Checkbutton(height_frame, text="Auto-crop selection to actual content (fast pre-pass)", variable=self.auto_crop).grid(row=1, column=0, columnspan=4, sticky="w", pady=2)
 
         # Materials
         mat_frame = ttk.LabelFrame(left, text="Materials Path", padding="10")
@@ -138,6 +188,14 @@ class MinecraftToSourceUI:
         nodraw_frame.pack(fill="x", pady=5)
         ttk.Checkbutton(nodraw_frame, text="Disable nodraw for North/South", variable=self.force_ns).pack(anchor="w", pady=2)
         ttk.Checkbutton(nodraw_frame, text="Disable nodraw for East/West", variable=self.force_ew).pack(anchor="w", pady=2)
+        ttk.Checkbutton(nodraw_frame, text="Cull sealed caves (flood fill from open boundary)", variable=self.cull_cavities).pack(anchor="w", pady=2)
+
+        # Selection Boundary
+        boundary_frame = ttk.LabelFrame(left, text="Selection Boundary", padding="10")
+        boundary_frame.pack(fill="x", pady=5)
+        ttk.Radiobutton(boundary_frame, text="Load neighbouring chunks", variable=self.boundary_mode, value="load_neighbours").pack(anchor="w", pady=2)
+        ttk.Radiobutton(boundary_frame, text="Treat outside as air (edge faces visible)", variable=self.boundary_mode, value="air").pack(anchor="w", pady=2)
+        ttk.Radiobutton(boundary_frame, text="Treat outside as solid (edge faces nodraw)", variable=self.boundary_mode, value="solid").pack(anchor="w", pady=2)
 
         # Face Mapping
         debug_frame = ttk.LabelFrame(right, text="Face Mapping", padding="10")
@@ -163,6 +221,10 @@ class MinecraftToSourceUI:
         merge_frame.pack(fill="x", pady=5)
         ttk.Checkbutton(merge_frame, text="Enable greedy meshing (merge same blocks into larger rectangles)", variable=self.merge_blocks).pack(anchor="w", pady=2)
         ttk.Label(merge_frame, text="Reduces brush count drastically → fewer portal/T-junction errors, faster compilation", foreground="gray").pack(anchor="w", padx=20)
+        ttk.Checkbutton(merge_frame, text="Merge by texture (e.g. waxed/oxidized copper variants share brushes)", variable=self.merge_by_material).pack(anchor="w", pady=2)
+        ttk.Checkbutton(merge_frame, text="Merge across block types where hidden faces become nodraw", variable=self.merge_across_types).pack(anchor="w", pady=2)
+        ttk.Checkbutton(merge_frame, text="Try all six axis orders and keep the fewest brushes (slower, uses workers)", variable=self.merge_axis_search).pack(anchor="w", pady=2)
+        ttk.Checkbutton(merge_frame, text="Max quality: exact minimum rectangle partition per layer (slow)", variable=self.merge_exact).pack(anchor="w", pady=2)
 
         # Texture Scale
         texture_frame = ttk.LabelFrame(right, text="Texture Scale", padding="10")
@@ -173,6 +235,19 @@ class MinecraftToSourceUI:
         ttk.Entry(texture_frame, textvariable=self.texture_scale_y, width=10).grid(row=0, column=3, padx=5)
         ttk.Label(texture_frame, text="Direct UV scale values (1.0 = 64 units per texture repeat)", foreground="gray").grid(row=1, column=0, columnspan=4, pady=5)
 
+        # Performance
+        perf_frame = ttk.LabelFrame(right, text="Performance", padding="10")
+        perf_frame.pack(fill="x", pady=5)
+        ttk.Label(perf_frame, text="Worker processes:").grid(row=0, column=0, padx=5)
+        ttk.Entry(perf_frame, textvariable=self.workers, width=10).grid(row=0, column=1, padx=5)
+        ttk.Label(perf_frame, text="Scan chunks in parallel (1 = single process)", foreground="gray").grid(row=1, column=0, columnspan=4, pady=5)
+        ttk.Checkbutton(perf_frame, text="Fast Anvil reader (Java 1.16+, falls back to amulet)", variable=self.reader, onvalue="anvil", offvalue="amulet").grid(row=2, column=0, columnspan=4, sticky="w", pady=2)
+        ttk.Checkbutton(perf_frame, text="Incremental rescan (only changed chunks, Java worlds)", variable=self.incremental_scan).grid(row=3, column=0, columnspan=4, sticky="w", pady=2)
+        ttk.Checkbutton(perf_frame, text="Cache scan/merge/build results", variable=self.stage_cache).grid(row=4, column=0, columnspan=2, sticky="w", pady=2)
+        ttk.Label(perf_frame, text="Limit (MB):").grid(row=4, column=2, padx=5)
+        ttk.Entry(perf_frame, textvariable=self.stage_cache_mb, width=8).grid(row=4, column=3, padx=5)
+        ttk.Button(perf_frame, text="Purge Cache", command=self.purge_cache).grid(row=5, column=0, columnspan=4, sticky="w", pady=2)
+
         # Button Frame for Convert and Reset
         button_frame = tk.Frame(self.window)
         button_frame.pack(fill="x", padx=20, pady=10)
@@ -191,6 +266,15 @@ class MinecraftToSourceUI:
         if path:
             self.output_path.set(path)
 
+    def purge_cache(self):
+        """Delete the stage cache and the incremental scan cache"""
+        files = freed = 0
+        for directory in (DEFAULT_STAGE_CACHE_DIR, DEFAULT_CACHE_DIR):
+            n, size = purge(directory)
+            files += n
+            freed += size
+        messagebox.showinfo("Cache", f"Deleted {files} cache files ({freed / 1024 ** 2:.1f} MB)")
+
     def reset_settings(self):
         """Reset all settings to default values"""
         if messagebox.askyesno("Confirmation", "Do you really want to reset all settings?"):
@@ -203,14 +287,28 @@ class MinecraftToSourceUI:
             self.z2.set("100")
             self.y_min.set("-64")
             self.y_max.set("320")
+            self.selection = []
+            self.selection_text.delete("1.0", "end")
+            self.auto_crop.set(False)
             self.materials_path.set("minecraft")
             self.face_mapping.set("standard")
             self.force_ns.set(False)
             self.force_ew.set(False)
             self.group_mode.set("group_blocks")
             self.merge_blocks.set(True)
+            self.merge_by_material.set(False)
+            self.merge_across_types.set(False)
+            self.merge_axis_search.set(False)
+            self.merge_exact.set(False)
             self.texture_scale_x.set(1.0)
             self.texture_scale_y.set(1.0)
+            self.workers.set(1)
+            self.cull_cavities.set(False)
+            self.boundary_mode.set("load_neighbours")
+            self.reader.set("amulet")
+            self.incremental_scan.set(False)
+            self.stage_cache.set(False)
+            self.stage_cache_mb.set(2048)
             # Delete the saved configuration file
             if os.path.exists(self.config_file):
                 try:
@@ -223,8 +321,13 @@ class MinecraftToSourceUI:
     def convert(self):
         """Start the conversion"""
         try:
+            text = self.selection_text.get("1.0", "end").strip()
+            self.selection = json.loads(text) if text else []
             # Save settings BEFORE conversion
             self.save_settings()
+            selection = None
+            if self.selection:
+                selection = Selection.from_config(self.selection, int(self.y_min.get()), int(self.y_max.get()))
             # Perform conversion
             convert_to_vmf(
                 self.world_path.get(),
@@ -242,7 +345,20 @@ class MinecraftToSourceUI:
                 group_mode=self.group_mode.get(),
                 merge_blocks=self.merge_blocks.get(),
                 texture_scale_x=self.texture_scale_x.get(),
-                texture_scale_y=self.texture_scale_y.get()
+                texture_scale_y=self.texture_scale_y.get(),
+                workers=self.workers.get(),
+                cull_cavities=self.cull_cavities.get(),
+                boundary_mode=self.boundary_mode.get(),
+                reader=self.reader.get(),
+                scan_cache=DEFAULT_CACHE_DIR if self.incremental_scan.get() else None,
+                stage_cache=DEFAULT_STAGE_CACHE_DIR if self.stage_cache.get() else None,
+                stage_cache_size=self.stage_cache_mb.get() * 1024 ** 2,
+                selection=selection,
+                auto_crop=self.auto_crop.get(),
+                merge_by_material=self.merge_by_material.get(),
+                merge_across_types=self.merge_across_types.get(),
+                merge_axis_search=self.merge_axis_search.get(),
+                merge_exact=self.merge_exact.get()
             )
             messagebox.showinfo("Success", "Conversion completed!")
         except Exception as e:
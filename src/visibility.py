@@ -0,0 +1,236 @@
+"""Sichtbarkeit - Flood-Fill der von außen erreichbaren Luft
+
+Höhlen und andere abgeschlossene Hohlräume unter der Oberfläche lassen den
+umgebenden Stein als "sichtbar" erscheinen, obwohl ihn kein Spieler je sieht.
+
+Vorgehen:
+  1. Pro Chunk werden die durchlässigen Zellen (alles außer Vollblöcken) in
+     zusammenhängende Komponenten zerlegt (6er-Nachbarschaft). Dazu werden
+     vertikale Läufe gebildet und per Label-Propagation verbunden.
+  2. Die Komponenten benachbarter Chunks werden über die Chunk-Grenzen in einem
+     globalen Union-Find verbunden.
+  3. Erreichbar ist alles, was mit der offenen Auswahlgrenze (Seiten, Oberseite,
+     fehlende Nachbar-Chunks) oder dem Himmel verbunden ist.
+  4. Alle übrigen Komponenten sind abgeschlossene Hohlräume; Faces zu ihnen
+     werden beim Scan verworfen.
+"""
+
+import logging
+import numpy as np
+from .block_registry import OCCLUDER_FULL
+
+log = logging.getLogger(__name__)
+
+# Globaler Knoten für Himmel/offene Grenze
+_OPEN = 0
+
+
+def label_components(passable):
+    """
+    Zerlegt eine Maske in zusammenhängende Komponenten (6er-Nachbarschaft).
+
+    Args:
+        passable: bool-Array [x, z, y]
+
+    Returns:
+        np.ndarray (int64) gleicher Form; 0 für nicht durchlässige Zellen,
+        sonst ein pro Komponente eindeutiges Label > 0
+    """
+    # Vertikale Läufe durchnummerieren
+    starts = passable.copy()
+    starts[:, :, 1:] &= ~passable[:, :, :-1]
+    run_ids = np.cumsum(starts.ravel()).reshape(passable.shape)
+    run_ids[~passable] = 0
+    n_runs = int(run_ids.max()) if run_ids.size else 0
+
+    # Läufe, die sich horizontal berühren
+    both_x = passable[:-1] & passable[1:]
+    both_z = passable[:, :-1] & passable[:, 1:]
+    a = np.concatenate([run_ids[:-1][both_x], run_ids[:, :-1][both_z]])
+    b = np.concatenate([run_ids[1:][both_x], run_ids[:, 1:][both_z]])
+    if len(a):
+        pairs = np.unique(a * (n_runs + 1) + b)
+        a, b = pairs // (n_runs + 1), pairs % (n_runs + 1)
+
+    # Label-Propagation mit Pointer-Jumping bis zum Fixpunkt
+    labels = np.arange(n_runs + 1)
+    while len(a):
+        low = np.minimum(labels[a], labels[b])
+        new = labels.copy()
+        np.minimum.at(new, a, low)
+        np.minimum.at(new, b, low)
+        new = new[new[new]]
+        if np.array_equal(new, labels):
+            break
+        labels = new
+    return labels[run_ids]
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = [_OPEN]
+
+    def add(self):
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # Die offene Grenze bleibt immer Wurzel
+            if rb == _OPEN:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+
+def label_chunk(entry, window, y_min, y_max, registry):
+    """
+    Komponenten-Labels der durchlässigen Zellen eines Chunks innerhalb der Auswahl.
+
+    Der Bereich reicht von y_min bis eine Ebene über den höchsten Block des
+    Chunks (höchstens y_max); darüber ist nur noch Himmel.
+
+    Args:
+        entry: (states, y_base) aus dem Chunk-Cache
+        window: (start_x, end_x, start_z, end_z) lokale Spalten der Auswahl
+
+    Returns:
+        np.ndarray Labels [x - start_x, z - start_z, y - y_min]
+    """
+    states, y_base = entry
+    start_x, end_x, start_z, end_z = window
+    y_top = max(y_min, min(y_max, y_base + states.shape[2]))
+    passable = np.ones((end_x - start_x, end_z - start_z, y_top - y_min + 1), dtype=bool)
+    lo, hi = max(y_min, y_base), min(y_top + 1, y_base + states.shape[2])
+    if hi > lo:
+        part = states[start_x:end_x, start_z:end_z, lo - y_base:hi - y_base]
+        passable[:, :, lo - y_min:hi - y_min] = registry.occluders[part] != OCCLUDER_FULL
+    return label_components(passable)
+
+
+def _pad_height(plane, height):
+    """Randebene eines Label-Arrays [u, y], nach oben mit -1 (Himmel) aufgefüllt"""
+    out = np.full((plane.shape[0], height), -1, dtype=plane.dtype)
+    out[:, :plane.shape[1]] = plane
+    return out
+
+
+def find_cavities(chunks, get_entry, window_of, y_min, y_max, registry, open_boundary=True):
+    """
+    Bestimmt pro Chunk die Labels der abgeschlossenen Hohlräume.
+
+    Args:
+        chunks: Chunks der Auswahl in Sweep-Reihenfolge (cx außen, cz innen)
+        get_entry: Funktion (cx, cz) -> (states, y_base) oder None
+        window_of: Funktion (cx, cz) -> (start_x, end_x, start_z, end_z)
+        y_min, y_max: Höhenbereich der Auswahl
+        open_boundary: Seiten der Auswahl sind offen (sonst gilt außerhalb als massiv)
+
+    Returns:
+        dict (cx, cz) -> np.ndarray der Hohlraum-Labels (nur Chunks mit Hohlräumen)
+    """
+    uf = _UnionFind()
+    in_selection = set(chunks)
+    nodes = {}
+    east_planes, south_planes = {}, {}
+
+    def node(key, label):
+        if (key, label) not in nodes:
+            nodes[(key, label)] = uf.add()
+        return nodes[(key, label)]
+
+    def join(key, own, own_start, other_key, other, other_start):
+        # Die Ebenen können unterschiedlich breit sein (Auswahl nicht rechteckig):
+        # verbunden wird nur der gemeinsame Teil, der Rest grenzt an die Auswahlgrenze
+        lo = max(own_start, other_start)
+        hi = max(lo, min(own_start + len(own), other_start + len(other)))
+        if open_boundary:
+            seed(key, np.concatenate([own[:lo - own_start], own[hi - own_start:]]))
+            seed(other_key, np.concatenate([other[:lo - other_start], other[hi - other_start:]]))
+        own, other = own[lo - own_start:hi - own_start], other[lo - other_start:hi - other_start]
+        height = max(own.shape[1], other.shape[1])
+        own, other = _pad_height(own, height), _pad_height(other, height)
+        pairs = np.unique(np.stack([own.ravel(), other.ravel()], axis=1), axis=0)
+        for a, b in pairs.tolist():
+            if a == 0 or b == 0:
+                continue
+            na = _OPEN if a < 0 else node(key, a)
+            nb = _OPEN if b < 0 else node(other_key, b)
+            uf.union(na, nb)
+
+    def seed(key, labels):
+        for label in np.unique(labels).tolist():
+            if label > 0:
+                uf.union(_OPEN, node(key, label))
+
+    chunk_labels = {}
+    for cx, cz in chunks:
+        entry = get_entry(cx, cz)
+        if entry is None:
+            continue
+        key = (cx, cz)
+        window = window_of(cx, cz)
+        labels = label_chunk(entry, window, y_min, y_max, registry)
+        chunk_labels[key] = np.unique(labels[labels > 0])
+        for label in chunk_labels[key].tolist():
+            node(key, label)
+
+        # Himmel
+        seed(key, labels[:, :, -1])
+        # Seiten: Auswahlgrenze oder fehlender Nachbar -> offen, sonst verbinden.
+        # Verbunden wird mit den Randebenen der vorher bearbeiteten Nachbarn
+        # (West, Nord); diese liegen nur vor, wenn deren Fenster bis an den Rand reicht.
+        for (dx, dz), own, start in (((-1, 0), labels[0], window[2]), ((1, 0), labels[-1], window[2]),
+                                     ((0, -1), labels[:, 0], window[0]), ((0, 1), labels[:, -1], window[0])):
+            neighbor = (cx + dx, cz + dz)
+            at_border = (window[0] > 0 if dx < 0 else window[1] < 16 if dx > 0 else
+                         window[2] > 0 if dz < 0 else window[3] < 16)
+            earlier = east_planes if dx < 0 else south_planes if dz < 0 else {}
+            plane = earlier.pop(neighbor, None)
+            if at_border or neighbor not in in_selection:
+                if open_boundary:
+                    seed(key, own)
+                    if plane is not None:
+                        seed(neighbor, plane[0])
+            elif get_entry(*neighbor) is None:
+                seed(key, own)
+            elif plane is not None:
+                join(key, own, start, neighbor, *plane)
+            elif (dx < 0 or dz < 0) and open_boundary:
+                seed(key, own)
+        if window[1] == 16:
+            east_planes[key] = (labels[-1], window[2])
+        if window[3] == 16:
+            south_planes[key] = (labels[:, -1], window[0])
+
+    open_root = uf.find(_OPEN)
+    cavities = {}
+    total = 0
+    for key, labels in chunk_labels.items():
+        closed = [label for label in labels.tolist() if uf.find(nodes[(key, label)]) != open_root]
+        if closed:
+            cavities[key] = np.array(closed)
+            total += len(closed)
+    log.info(f"Flood-Fill: {total} abgeschlossene Hohlraum-Komponenten in {len(cavities)} Chunks")
+    return cavities
+
+
+def cavity_mask(entry, window, y_min, y_max, registry, cavity_labels):
+    """
+    Maske der Hohlraum-Zellen eines Chunks.
+
+    Returns:
+        np.ndarray bool (16, 16, h) indiziert [x, z, y - y_min]; außerhalb der Auswahl False
+    """
+    labels = label_chunk(entry, window, y_min, y_max, registry)
+    start_x, end_x, start_z, end_z = window
+    mask = np.zeros((16, 16, labels.shape[2]), dtype=bool)
+    mask[start_x:end_x, start_z:end_z] = np.isin(labels, cavity_labels)
+    return mask
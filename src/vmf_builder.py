@@ -1,10 +1,13 @@
 """VMF file creation and material application"""
 
 import logging
+import numpy as np
 from pyvmf import PyVMF, World as VMFWorld, Group, VMF
 from .constants import BLOCK_SIZE
-from .textures import get_texture
+from .textures import get_texture, face_textures
 from .block_detector import get_exposed_blocks
+from .selection import Selection
+from .faces import FACE_BOTTOM, side_faces, to_side_mask
 from .geometry import (
     create_normal_block, create_merged_block, create_stairs, create_slab, 
     create_fence, get_fence_connections,
@@ -15,6 +18,7 @@ from .geometry import (
 from .block_merger import greedy_mesh_3d
 from .slab_merger import greedy_mesh_slabs
 from .stair_merger import greedy_mesh_stairs
+from .stage_cache import StageCache, stage_keys, DEFAULT_MAX_BYTES, STAGE_SCAN, STAGE_MERGE, STAGE_BUILD
 
 log = logging.getLogger(__name__)
 
@@ -35,67 +39,48 @@ def _ensure_group(vmf, attr_name):
         return None
 
 
-def apply_materials_to_solid(solid, block_type, exposed_faces, mat_path, face_mapping, is_lowest=False, texture_scale_x=1.0, texture_scale_y=1.0):
+def apply_materials_to_solid(solid, block_type, exposed_faces, mat_path, face_mapping, is_lowest=False, texture_scale_x=1.0, texture_scale_y=1.0,
+                             face_textures_by_face=None):
     """Applies materials to a solid
     
     Args:
         solid: PyVMF Solid object
         block_type: Minecraft block type
-        exposed_faces: List of visible faces
+        exposed_faces: Bitmask of visible faces (see faces.py)
         mat_path: Material path
         face_mapping: Face mapping mode
         is_lowest: Is this the lowest block at this position?
         texture_scale_x: Texture scale factor for X axis
         texture_scale_y: Texture scale factor for Y axis
+        face_textures_by_face: Texture per face in bit order of faces.py (merged
+            regions across block types); overrides the textures of block_type
     """
     if solid is None:
         raise ValueError(f"Cannot apply materials to None solid for block_type {block_type}")
     
-    base_tex = get_texture(block_type)
+    textures = face_textures(block_type)
     
-    # Face-Mapping Konfiguration
-    if face_mapping == "swap_ns":
-        face_map = {"south": 0, "north": 1, "east": 2, "west": 3, "top": 4, "bottom": 5}
-    elif face_mapping == "swap_ew":
-        face_map = {"north": 0, "south": 1, "west": 2, "east": 3, "top": 4, "bottom": 5}
-    elif face_mapping == "swap_both":
-        face_map = {"south": 0, "north": 1, "west": 2, "east": 3, "top": 4, "bottom": 5}
-    else:
-        face_map = {"north": 0, "south": 1, "east": 2, "west": 3, "top": 4, "bottom": 5}
+    # Face-Mapping Konfiguration: Face je Seite und sichtbare Seiten als Bitmaske
+    sides = side_faces(face_mapping)
+    visible_sides = to_side_mask(exposed_faces, face_mapping)
 
     for i, side in enumerate(solid.side):
-        face_name = next((name for name, idx in face_map.items() if idx == i), None)
-        if face_name:
+        if i < len(sides):
+            # Seite 4 ist oben, 5 unten, 0-3 die Seitenflächen
+            if face_textures_by_face is not None:
+                texture = face_textures_by_face[sides[i].bit_length() - 1]
+            else:
+                texture = textures[0] if i == 4 else textures[2] if i == 5 else textures[1]
             # Never assign nodraw to trapdoors or their neighbors
             if block_type.endswith("_trapdoor") or block_type.endswith("_stairs") or block_type.endswith("_slab"):
                 # Always assign the correct texture
-                if block_type == "grass_block":
-                    if i == 4:
-                        side.material = f"{mat_path}/grass_block_top"
-                    elif i == 5:
-                        side.material = f"{mat_path}/dirt"
-                    else:
-                        side.material = f"{mat_path}/grass_block_side"
-                elif block_type.endswith(("_log", "_stem", "_wood")):
-                    side.material = f"{mat_path}/{base_tex}_top" if i in [4, 5] else f"{mat_path}/{base_tex}"
-                else:
-                    side.material = f"{mat_path}/{base_tex}"
+                side.material = f"{mat_path}/{texture}"
             else:
                 # Wenn unterster Block: Bottom-Face immer auf nodraw setzen
-                if is_lowest and face_name == "bottom":
+                if is_lowest and sides[i] == FACE_BOTTOM:
                     side.material = "tools/toolsnodraw"
-                elif face_name in exposed_faces:
-                    if block_type == "grass_block":
-                        if i == 4:
-                            side.material = f"{mat_path}/grass_block_top"
-                        elif i == 5:
-                            side.material = f"{mat_path}/dirt"
-                        else:
-                            side.material = f"{mat_path}/grass_block_side"
-                    elif block_type.endswith(("_log", "_stem", "_wood")):
-                        side.material = f"{mat_path}/{base_tex}_top" if i in [4, 5] else f"{mat_path}/{base_tex}"
-                    else:
-                        side.material = f"{mat_path}/{base_tex}"
+                elif visible_sides >> i & 1:
+                    side.material = f"{mat_path}/{texture}"
                 else:
                     side.material = "tools/toolsnodraw"
             # UV-Mapping
@@ -110,7 +95,7 @@ def apply_materials_to_solid(solid, block_type, exposed_faces, mat_path, face_ma
 
 
 def create_block(vmf, x, y, z, block_type, exposed_faces, mat_path="minecraft", 
-                properties=None, face_mapping="standard", blocks_dict=None, 
+                properties=None, face_mapping="standard", blocks=None, 
                 block_coords=None, is_lowest=False, group_mode="group_blocks",
                 texture_scale_x=1.0, texture_scale_y=1.0):
     """
@@ -120,11 +105,11 @@ def create_block(vmf, x, y, z, block_type, exposed_faces, mat_path="minecraft",
         vmf: VMF object
         x, y, z: Position in Hammer Units
         block_type: Minecraft block type
-        exposed_faces: List of visible faces
+        exposed_faces: Bitmask of visible faces (see faces.py)
         mat_path: Material path
         properties: Block properties
         face_mapping: Face mapping mode
-        blocks_dict: Dictionary of all blocks for connections
+        blocks: ExposedBlockSet of all blocks for connections
         block_coords: Original Minecraft coordinates (x, y, z)
         is_lowest: Is this the lowest block at this position?
         group_mode: Grouping mode
@@ -144,8 +129,8 @@ def create_block(vmf, x, y, z, block_type, exposed_faces, mat_path="minecraft",
         log.info(f"Creating bars/pane: {block_type} at {block_coords}")
         solids = []
         connections = {'north': False, 'south': False, 'east': False, 'west': False}
-        if blocks_dict and block_coords:
-            connections = get_bars_connections(block_coords[0], block_coords[1], block_coords[2], blocks_dict)
+        if blocks and block_coords:
+            connections = get_bars_connections(block_coords[0], block_coords[1], block_coords[2], blocks)
             log.info(f"  Connections: {connections}")
         create_iron_bars(solids, x, y, z, connections)
         for solid in solids:
@@ -190,8 +175,8 @@ def create_block(vmf, x, y, z, block_type, exposed_faces, mat_path="minecraft",
     if is_fence:
         solids = []
         connections = {'north': False, 'south': False, 'east': False, 'west': False}
-        if blocks_dict and block_coords:
-            connections = get_fence_connections(block_coords[0], block_coords[1], block_coords[2], blocks_dict)
+        if blocks and block_coords:
+            connections = get_fence_connections(block_coords[0], block_coords[1], block_coords[2], blocks)
         create_fence(solids, x, y, z, connections)
         for solid in solids:
             apply_materials_to_solid(solid, block_type, exposed_faces, mat_path, face_mapping, is_lowest, texture_scale_x, texture_scale_y)
@@ -276,24 +261,16 @@ def create_block(vmf, x, y, z, block_type, exposed_faces, mat_path="minecraft",
     solid = create_normal_block(x, y, z)
     
     # Face-Mapping für normale Blöcke
-    if face_mapping == "swap_ns":
-        face_map = {"south": 0, "north": 1, "east": 2, "west": 3, "top": 4, "bottom": 5}
-    elif face_mapping == "swap_ew":
-        face_map = {"north": 0, "south": 1, "west": 2, "east": 3, "top": 4, "bottom": 5}
-    elif face_mapping == "swap_both":
-        face_map = {"south": 0, "north": 1, "west": 2, "east": 3, "top": 4, "bottom": 5}
-    else:
-        face_map = {"north": 0, "south": 1, "east": 2, "west": 3, "top": 4, "bottom": 5}
+    sides = side_faces(face_mapping)
+    visible_sides = to_side_mask(exposed_faces, face_mapping)
 
     base_tex = get_texture(block_type)
     
     for i, side in enumerate(solid.side):
-        face_name = next((name for name, idx in face_map.items() if idx == i), None)
-        
         # Wenn unterster Block: Bottom-Face immer auf nodraw setzen
-        if is_lowest and face_name == "bottom":
+        if is_lowest and i < len(sides) and sides[i] == FACE_BOTTOM:
             side.material = "tools/toolsnodraw"
-        elif face_name and face_name in exposed_faces:
+        elif visible_sides >> i & 1:
             # Spezielle Texturen für bestimmte Blöcke
             if block_type == "grass_block":
                 if i == 4:
@@ -357,7 +334,7 @@ def create_merged_vmf_block(vmf, hx, hy, hz, size_x, size_z, size_y,
         size_z: Anzahl Blöcke in MC Z-Richtung (→ Hammer Y)
         size_y: Anzahl Blöcke in MC Y-Richtung (→ Hammer Z, Höhe)
         block_type: Minecraft Block-Typ
-        exposed_faces: Liste sichtbarer Faces
+        exposed_faces: Bitmaske sichtbarer Faces (siehe faces.py)
         mat_path: Materialpfad
         face_mapping: Face-Mapping-Modus
         is_all_lowest: Alle Bottom-Blöcke sind die untersten an ihrer Position
@@ -371,24 +348,16 @@ def create_merged_vmf_block(vmf, hx, hy, hz, size_x, size_z, size_y,
     solid = create_merged_block(hx, hy, hz, w, h, l)
 
     # Face-Mapping Konfiguration (identisch zu Einzelblöcken)
-    if face_mapping == "swap_ns":
-        face_map = {"south": 0, "north": 1, "east": 2, "west": 3, "top": 4, "bottom": 5}
-    elif face_mapping == "swap_ew":
-        face_map = {"north": 0, "south": 1, "west": 2, "east": 3, "top": 4, "bottom": 5}
-    elif face_mapping == "swap_both":
-        face_map = {"south": 0, "north": 1, "west": 2, "east": 3, "top": 4, "bottom": 5}
-    else:
-        face_map = {"north": 0, "south": 1, "east": 2, "west": 3, "top": 4, "bottom": 5}
+    sides = side_faces(face_mapping)
+    visible_sides = to_side_mask(exposed_faces, face_mapping)
 
     base_tex = get_texture(block_type)
 
     for i, side in enumerate(solid.side):
-        face_name = next((name for name, idx in face_map.items() if idx == i), None)
-
         # Bottom-Face auf nodraw setzen wenn alle Unterseiten-Blöcke die untersten sind
-        if is_all_lowest and face_name == "bottom":
+        if is_all_lowest and i < len(sides) and sides[i] == FACE_BOTTOM:
             side.material = "tools/toolsnodraw"
-        elif face_name and face_name in exposed_faces:
+        elif visible_sides >> i & 1:
             # Spezielle Texturen für bestimmte Blöcke
             if block_type == "grass_block":
                 if i == 4:
@@ -437,140 +406,110 @@ def create_merged_vmf_block(vmf, hx, hy, hz, size_x, size_z, size_y,
     vmf.add_solids([solid])
 
 
-def convert_to_vmf(world_path, x1, z1, x2, z2, output_vmf, y_min=-64, y_max=320, 
-                   mat_path="minecraft", dimension='minecraft:overworld', 
-                   face_mapping="standard", force_ns=False, force_ew=False,
-                   group_mode="group_blocks", merge_blocks=True):
+def merge_exposed_blocks(blocks, by_material=False, cross_type=False, axis_search=False, workers=1,
+                         exact=False):
     """
-    Converts a Minecraft area to VMF
-    
+    Merge-Stufe: Greedy Meshing der Vollblöcke, Slabs und Treppen.
+
     Args:
-        world_path: Path to Minecraft world
-        x1, z1, x2, z2: Coordinates of the area
-        output_vmf: Output VMF file
-        y_min, y_max: Height range
-        mat_path: Material path
-        dimension: Minecraft dimension
-        face_mapping: Face mapping mode
-        force_ns: Force North/South faces visible
-        force_ew: Force East/West faces visible
-        group_mode: Grouping mode
-        merge_blocks: Enable greedy meshing (merge blocks)
+        by_material: Vollblöcke mit gleichen Texturen typübergreifend zusammenführen
+        cross_type: Vollblöcke über Block-Typen hinweg zusammenführen, soweit die
+            dabei verdeckten Faces nodraw sind (greedy_mesh_3d, cross_type); ergibt
+            das mehr Brushes als das Meshing pro Typ, wird dieses verwendet
+        axis_search: Pro Gruppe alle sechs Achsen-Reihenfolgen probieren und die
+            mit den wenigsten Regionen behalten (auf workers Prozessen)
+        exact: Max-Qualität: Slabs und Treppen je Schicht minimal in Rechtecke
+            zerlegen, Vollblöcke zusätzlich schichtweise exakt zerlegen und das
+            Ergebnis mit den wenigsten Regionen behalten
+
+    Returns:
+        (merged_regions, individual): Regionen aus greedy_mesh_3d und die Indizes
+        aller Blöcke, die einzeln erzeugt werden
+    """
+    log.info("Greedy meshing enabled — merging same blocks & slabs...")
+
+    # 1. Normale Blöcke
+    merged_regions, non_mergeable = greedy_mesh_3d(blocks, by_material, cross_type, axis_search, workers, exact)
+    if cross_type:
+        # Greedy ist nicht monoton: typübergreifende Quader können bessere Quader pro Typ verbauen
+        per_type, _ = greedy_mesh_3d(blocks, by_material, axis_search=axis_search, workers=workers, exact=exact)
+        if len(per_type) < len(merged_regions):
+            log.info(f"Typübergreifendes Meshing ergibt {len(merged_regions)} Regionen, "
+                     f"pro Typ {len(per_type)} - verwende Meshing pro Typ")
+            merged_regions = per_type
+
+    # 2. Slabs
+    merged_slabs, non_mergeable_slabs = greedy_mesh_slabs(blocks, exact)
+
+    # 3. Stairs
+    merged_stairs, non_mergeable_stairs = greedy_mesh_stairs(blocks, exact)
+
+    return merged_regions, np.concatenate([non_mergeable, non_mergeable_slabs, non_mergeable_stairs])
+
+
+def build_vmf(blocks, merged, output_vmf, mat_path, face_mapping, group_mode, texture_scale_x, texture_scale_y):
+    """
+    Build-Stufe: erzeugt die Solids und schreibt die VMF.
+
+    Args:
+        blocks: ExposedBlockSet
+        merged: (merged_regions, individual) aus merge_exposed_blocks oder None
+            (jeder Block einzeln)
     """
-    log.info(f"Start conversion from {world_path}")
-    blocks = get_exposed_blocks(world_path, x1, z1, x2, z2, y_min, y_max, dimension, force_ns, force_ew)
-    log.info(f"Found: {len(blocks)} visible blocks")
-    
-    # Dictionary for connection checks
-    blocks_dict = {(x, y, z): (x, y, z, bt, ef, props) for x, y, z, bt, ef, props in blocks}
-    
-    # Find the lowest block for each (x, z) position
-    lowest_blocks = {}
-    for x, y, z, block_type, exposed_faces, properties in blocks:
-        key = (x, z)
-        if key not in lowest_blocks or y < lowest_blocks[key]:
-            lowest_blocks[key] = y
-    
     vmf = VMF()
     vmf.world = VMFWorld()
     
-    if not blocks:
+    if not len(blocks):
         vmf.export(output_vmf)
         log.info(f"VMF saved: {output_vmf}")
         return
 
-    coords = [(x, y, z) for x, y, z, _, _, _ in blocks]
-    min_x = min(x for x, _, _ in coords)
-    min_y = min(y for _, y, _ in coords)
-    min_z = min(z for _, _, z in coords)
-
-    if merge_blocks:
-        # GREEDY MESHING: Merge blocks & slabs
-        log.info("Greedy meshing enabled — merging same blocks & slabs...")
-
-        # Block-Infos für den Merger aufbereiten
-        blocks_info = {}
-        for x, y, z, block_type, exposed_faces, properties in blocks:
-            blocks_info[(x, y, z)] = {
-                'block_type': block_type,
-                'exposed_faces': exposed_faces,
-                'properties': properties
-            }
-
-        # 1. Normale Blöcke
-        merged_regions, non_mergeable = greedy_mesh_3d(blocks_info)
+    # Is each block the lowest one at its (x, z) position?
+    lowest = blocks.lowest_mask()
+    min_x, min_y, min_z = blocks.min_corner()
 
-        # 2. Slabs
-        merged_slabs, non_mergeable_slabs = greedy_mesh_slabs(blocks_info)
+    if merged is not None:
+        merged_regions, individual = merged
 
-        # 3. Stairs
-        merged_stairs, non_mergeable_stairs = greedy_mesh_stairs(blocks_info)
-
-        # Merged blocks created
+        # Zusammengeführte Blöcke erstellen
         for region in merged_regions:
             hx = (region['mc_x'] - min_x) * BLOCK_SIZE
             hy = (region['mc_z'] - min_z) * BLOCK_SIZE
             hz = (region['mc_y'] - min_y) * BLOCK_SIZE
 
             # Prüfe ob ALLE Bottom-Layer-Blöcke die untersten an ihrer Position sind
-            is_all_lowest = True
-            for bx, by, bz in region['constituent_blocks']:
-                if by == region['mc_y']:  # Bottom-Layer der Region
-                    if lowest_blocks.get((bx, bz)) != by:
-                        is_all_lowest = False
-                        break
-
-            create_merged_vmf_block(
-                vmf, hx, hy, hz,
-                region['size_x'], region['size_z'], region['size_y'],
-                region['block_type'], region['exposed_faces'],
-                mat_path, face_mapping, is_all_lowest, group_mode
-            )
-
-        # Non-mergeable blocks created individually (stairs, slabs, etc.)
-        for x, y, z, block_type, exposed_faces, properties in (non_mergeable + non_mergeable_slabs + non_mergeable_stairs):
+            indices = region['constituent_indices']
+            is_all_lowest = bool(lowest[indices[blocks.ys[indices] == region['mc_y']]].all())
+
+            solid = create_merged_block(hx, hy, hz, region['size_x'] * BLOCK_SIZE, region['size_z'] * BLOCK_SIZE, region['size_y'] * BLOCK_SIZE)
+            apply_materials_to_solid(solid, region['block_type'], region['exposed_faces'], mat_path, face_mapping, is_all_lowest, texture_scale_x, texture_scale_y,
+                                     region.get('face_textures'))
+            vmf.add_solids([solid])
+
+        # Nicht-zusammenführbare Blöcke einzeln erstellen (Treppen, Slabs, etc.)
+        for i in individual.tolist():
+            x, y, z = blocks.position(i)
             hx = (x - min_x) * BLOCK_SIZE
             hy = (z - min_z) * BLOCK_SIZE
             hz = (y - min_y) * BLOCK_SIZE
-            is_lowest = (lowest_blocks.get((x, z)) == y)
-
-            # Stairs/Slabs als Detail-Brush markieren
-            solid = None
-            if "_slab" in block_type:
-                solid = create_slab(hx, hy, hz, properties)
-            elif "_stairs" in block_type:
-                solids = []
-                create_stairs(solids, hx, hy, hz, properties)
-                for s in solids:
-                    apply_materials_to_solid(s, block_type, exposed_faces, mat_path, face_mapping, is_lowest)
-                    if hasattr(s, "editor") and s.editor is not None:
-                        s.editor.visgroupid = 9999
-                    vmf.add_solids([s])
-                continue
-            if solid is not None:
-                apply_materials_to_solid(solid, block_type, exposed_faces, mat_path, face_mapping, is_lowest)
-                if hasattr(solid, "editor") and solid.editor is not None:
-                    solid.editor.visgroupid = 9999
-                vmf.add_solids([solid])
-                continue
-            # Normale Spezialblöcke
-            create_block(vmf, hx, hy, hz, block_type, exposed_faces, mat_path,
-                        properties, face_mapping, blocks_dict, (x, y, z), is_lowest, group_mode, texture_scale_x, texture_scale_y)
+
+            create_block(vmf, hx, hy, hz, blocks.block_type(i), blocks.face_mask(i), mat_path,
+                        blocks.properties(i), face_mapping, blocks, (x, y, z), bool(lowest[i]), group_mode, texture_scale_x, texture_scale_y)
 
         log.info(
-            f"Erstellt: {len(merged_regions)} zusammengeführte Blöcke, {len(merged_slabs)} zusammengeführte Slabs, {len(merged_stairs)} zusammengeführte Stairs + "
-            f"{len(non_mergeable) + len(non_mergeable_slabs) + len(non_mergeable_stairs)} einzelne Spezialblöcke"
+            f"Created: {len(merged_regions)} merged blocks + "
+            f"{len(individual)} individual special blocks"
         )
     else:
         # ORIGINAL: Each block individually (1x1x1)
-        for x, y, z, block_type, exposed_faces, properties in blocks:
+        for i in range(len(blocks)):
+            x, y, z = blocks.position(i)
             hx = (x - min_x) * BLOCK_SIZE
             hy = (z - min_z) * BLOCK_SIZE
             hz = (y - min_y) * BLOCK_SIZE
-            is_lowest = (lowest_blocks.get((x, z)) == y)
 
-            create_block(vmf, hx, hy, hz, block_type, exposed_faces, mat_path,
-                        properties, face_mapping, blocks_dict, (x, y, z), is_lowest, group_mode, texture_scale_x, texture_scale_y)
+            create_block(vmf, hx, hy, hz, blocks.block_type(i), blocks.face_mask(i), mat_path,
+                        blocks.properties(i), face_mapping, blocks, (x, y, z), bool(lowest[i]), group_mode, texture_scale_x, texture_scale_y)
     
     vmf.export(output_vmf)
     log.info(f"VMF saved: {output_vmf}")
@@ -579,12 +518,20 @@ def convert_to_vmf(world_path, x1, z1, x2, z2, output_vmf, y_min=-64, y_max=320,
 def convert_to_vmf(world_path, x1, z1, x2, z2, output_vmf, y_min=-64, y_max=320, 
                    mat_path="minecraft", dimension='minecraft:overworld', 
                    face_mapping="standard", force_ns=False, force_ew=False,
-                   group_mode="group_blocks", merge_blocks=True, texture_scale_x=1.0, texture_scale_y=1.0):
+                   group_mode="group_blocks", merge_blocks=True, texture_scale_x=1.0, texture_scale_y=1.0,
+                   workers=1, cull_cavities=False, boundary_mode="load_neighbours", reader="amulet",
+                   scan_cache=None, stage_cache=None, stage_cache_size=DEFAULT_MAX_BYTES, prefetch=16,
+                   selection=None, auto_crop=False, merge_by_material=False, merge_across_types=False,
+                   merge_axis_search=False, merge_exact=False):
     """
     Converts a Minecraft area to VMF
+
+    Die Konvertierung läuft in drei Stufen (Scan, Merge, Build). Mit stage_cache
+    wird das Ergebnis jeder Stufe gespeichert; ein erneuter Lauf beginnt bei der
+    ersten Stufe, deren Eingaben sich geändert haben (siehe stage_cache.py).
     
     Args:
-        world_path: Path to Minecraft world
+        world_path: Path to Minecraft world or a WorldSource
         x1, z1, x2, z2: Coordinates of the area
         output_vmf: Output VMF file
         y_min, y_max: Height range
@@ -597,99 +544,62 @@ def convert_to_vmf(world_path, x1, z1, x2, z2, output_vmf, y_min=-64, y_max=320,
         merge_blocks: Enable greedy meshing (merge blocks)
         texture_scale_x: Texture scale factor for X axis
         texture_scale_y: Texture scale factor for Y axis
+        workers: Number of worker processes for the world scan (1 = serial)
+        cull_cavities: Drop faces facing sealed caves/cavities (flood fill from the open boundary)
+        boundary_mode: Blocks outside the area: "load_neighbours", "air" or "solid"
+        reader: World reader: "amulet" or "anvil" (fast Java 1.16+ region file reader)
+        scan_cache: Directory for per-chunk scan results; re-exports only rescan changed chunks
+        stage_cache: Directory for scan/merge/build results (None = no stage cache)
+        stage_cache_size: Size limit of the stage cache in bytes
+        prefetch: Number of chunks read ahead in background threads (0 = off)
+        selection: Selection of boxes/polygons/chunk lists (see selection.py);
+            replaces x1/z1/x2/z2 and y_min/y_max
+        auto_crop: Shrink the selection to the bounds of its content before scanning
+        merge_by_material: Merge different block types whose faces resolve to the same textures
+        merge_across_types: Merge full blocks across types wherever the faces hidden inside a brush are nodraw
+        merge_axis_search: Try all six greedy axis orders per merge group and keep the one with the
+            fewest brushes (uses the worker processes)
+        merge_exact: Max quality: exact minimum rectangle partition per layer for slabs and stairs,
+            and as an additional candidate per merge group for full blocks (slow)
     """
     log.info(f"Start conversion from {world_path}")
-    blocks = get_exposed_blocks(world_path, x1, z1, x2, z2, y_min, y_max, dimension, force_ns, force_ew)
-    log.info(f"Found: {len(blocks)} visible blocks")
-    
-    # Dictionary for connection checks
-    blocks_dict = {(x, y, z): (x, y, z, bt, ef, props) for x, y, z, bt, ef, props in blocks}
-    
-    # Find the lowest block for each (x, z) position
-    lowest_blocks = {}
-    for x, y, z, block_type, exposed_faces, properties in blocks:
-        key = (x, z)
-        if key not in lowest_blocks or y < lowest_blocks[key]:
-            lowest_blocks[key] = y
-    
-    vmf = VMF()
-    vmf.world = VMFWorld()
-    
-    if not blocks:
-        vmf.export(output_vmf)
+    if selection is None:
+        selection = Selection.box(x1, z1, x2, z2, y_min, y_max)
+    cache = keys = None
+    if stage_cache:
+        keys = stage_keys(world_path, selection, dimension, force_ns, force_ew,
+                          cull_cavities, boundary_mode, reader, merge_blocks,
+                          mat_path, face_mapping, group_mode, texture_scale_x, texture_scale_y,
+                          merge_by_material, merge_across_types, merge_axis_search, merge_exact)
+        if keys is not None:
+            cache = StageCache(stage_cache, stage_cache_size)
+
+    if cache is not None and cache.load_build(keys[STAGE_BUILD], output_vmf):
         log.info(f"VMF saved: {output_vmf}")
         return
 
-    coords = [(x, y, z) for x, y, z, _, _, _ in blocks]
-    min_x = min(x for x, _, _ in coords)
-    min_y = min(y for _, y, _ in coords)
-    min_z = min(z for _, _, z in coords)
-
-    if merge_blocks:
-        # GREEDY MESHING: Merge blocks & slabs
-        log.info("Greedy meshing enabled — merging same blocks & slabs...")
-
-        # Block-Infos für den Merger aufbereiten
-        blocks_info = {}
-        for x, y, z, block_type, exposed_faces, properties in blocks:
-            blocks_info[(x, y, z)] = {
-                'block_type': block_type,
-                'exposed_faces': exposed_faces,
-                'properties': properties
-            }
-
-        # 1. Normale Blöcke
-        merged_regions, non_mergeable = greedy_mesh_3d(blocks_info)
-
-        # 2. Slabs
-        merged_slabs, non_mergeable_slabs = greedy_mesh_slabs(blocks_info)
-
-        # 3. Stairs
-        merged_stairs, non_mergeable_stairs = greedy_mesh_stairs(blocks_info)
-
-        # Zusammengeführte Blöcke erstellen
-        for region in merged_regions:
-            hx = (region['mc_x'] - min_x) * BLOCK_SIZE
-            hy = (region['mc_z'] - min_z) * BLOCK_SIZE
-            hz = (region['mc_y'] - min_y) * BLOCK_SIZE
-
-            # Prüfe ob ALLE Bottom-Layer-Blöcke die untersten an ihrer Position sind
-            is_all_lowest = True
-            for bx, by, bz in region['constituent_blocks']:
-                if by == region['mc_y']:  # Bottom-Layer der Region
-                    if lowest_blocks.get((bx, bz)) != by:
-                        is_all_lowest = False
-                        break
-
-            from .geometry import create_merged_block
-            solid = create_merged_block(hx, hy, hz, region['size_x'] * BLOCK_SIZE, region['size_z'] * BLOCK_SIZE, region['size_y'] * BLOCK_SIZE)
-            apply_materials_to_solid(solid, region['block_type'], region['exposed_faces'], mat_path, face_mapping, is_all_lowest, texture_scale_x, texture_scale_y)
-            vmf.add_solids([solid])
-
-        # Nicht-zusammenführbare Blöcke einzeln erstellen (Treppen, Slabs, etc.)
-        for x, y, z, block_type, exposed_faces, properties in (non_mergeable + non_mergeable_slabs + non_mergeable_stairs):
-            hx = (x - min_x) * BLOCK_SIZE
-            hy = (z - min_z) * BLOCK_SIZE
-            hz = (y - min_y) * BLOCK_SIZE
-            is_lowest = (lowest_blocks.get((x, z)) == y)
-
-            create_block(vmf, hx, hy, hz, block_type, exposed_faces, mat_path,
-                        properties, face_mapping, blocks_dict, (x, y, z), is_lowest, group_mode, texture_scale_x, texture_scale_y)
-
-        log.info(
-            f"Created: {len(merged_regions)} merged blocks + "
-            f"{len(non_mergeable) + len(non_mergeable_slabs) + len(non_mergeable_stairs)} individual special blocks"
-        )
-    else:
-        # ORIGINAL: Each block individually (1x1x1)
-        for x, y, z, block_type, exposed_faces, properties in blocks:
-            hx = (x - min_x) * BLOCK_SIZE
-            hy = (z - min_z) * BLOCK_SIZE
-            hz = (y - min_y) * BLOCK_SIZE
-            is_lowest = (lowest_blocks.get((x, z)) == y)
+    # 1. Scan
+    blocks = cache.load_scan(keys[STAGE_SCAN]) if cache is not None else None
+    if blocks is None:
+        blocks = get_exposed_blocks(world_path, x1, z1, x2, z2, y_min, y_max, dimension, force_ns, force_ew, workers,
+                                    cull_cavities=cull_cavities, boundary_mode=boundary_mode, reader=reader,
+                                    scan_cache=scan_cache, prefetch=prefetch, selection=selection,
+                                    auto_crop=auto_crop)
+        if cache is not None:
+            cache.store_scan(keys[STAGE_SCAN], blocks)
+    log.info(f"Found: {len(blocks)} visible blocks")
 
-            create_block(vmf, hx, hy, hz, block_type, exposed_faces, mat_path,
-                        properties, face_mapping, blocks_dict, (x, y, z), is_lowest, group_mode, texture_scale_x, texture_scale_y)
-    
-    vmf.export(output_vmf)
-    log.info(f"VMF saved: {output_vmf}")
\ No newline at end of file
+    # 2. Merge
+    merged = None
+    if merge_blocks and len(blocks):
+        merged = cache.load_merge(keys[STAGE_MERGE]) if cache is not None else None
+        if merged is None:
+            merged = merge_exposed_blocks(blocks, merge_by_material, merge_across_types, merge_axis_search, workers,
+                                          merge_exact)
+            if cache is not None:
+                cache.store_merge(keys[STAGE_MERGE], *merged)
+
+    # 3. Build
+    build_vmf(blocks, merged, output_vmf, mat_path, face_mapping, group_mode, texture_scale_x, texture_scale_y)
+    if cache is not None:
+        cache.store_build(keys[STAGE_BUILD], output_vmf)
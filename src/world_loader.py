@@ -1,9 +1,18 @@
 """Minecraft Welt laden und verarbeiten"""
 
+import logging
 from amulet import load_format
 from amulet.api.level import World, Structure
 from amulet.api.wrapper.world_format_wrapper import WorldFormatWrapper
 from amulet.api.wrapper.structure_format_wrapper import StructureFormatWrapper
+from .anvil_reader import AnvilWorld
+from .world_source import WorldSource, AmuletWorldSource
+
+log = logging.getLogger(__name__)
+
+# Welt-Leser: amulet (alle Formate) oder der schnelle Anvil-Leser (Java 1.16+)
+READER_AMULET = "amulet"
+READER_ANVIL = "anvil"
 
 
 def load_level(path):
@@ -16,6 +25,28 @@ def load_level(path):
     raise Exception(f"Unsupported format: {format_wrapper.__class__.__name__}")
 
 
+def open_world(path, reader=READER_AMULET):
+    """
+    Öffnet eine Welt zum Lesen mit dem gewünschten Leser.
+
+    Mit reader="anvil" wird der schnelle Region-Datei-Leser verwendet, sofern
+    die Welt eine Java-Welt ab 1.16 ist; sonst wird auf amulet zurückgegriffen.
+
+    Args:
+        path: Pfad zur Welt oder bereits eine WorldSource (wird unverändert zurückgegeben)
+
+    Returns:
+        WorldSource (siehe world_source.py)
+    """
+    if isinstance(path, WorldSource):
+        return path
+    if reader == READER_ANVIL:
+        if AnvilWorld.is_supported(path):
+            return AnvilWorld(path)
+        log.info(f"Fast Anvil reader not applicable to {path}, using amulet")
+    return AmuletWorldSource(load_level(path))
+
+
 def get_full_block_name(block):
     """Extrahiert den vollständigen Block-Namen mit Properties"""
     base_name = block.base_name.replace("minecraft:", "")
@@ -0,0 +1,251 @@
+"""Welt-Quellen - einheitlicher Lesezugriff des Scanners auf Block-Daten
+
+Der Scanner braucht von einer Welt nur die Block-Spalten einzelner Chunks als
+Palette-Indizes. Jede Quelle implementiert dafür:
+  - read_chunk(cx, cz, dimension, y_lo, y_hi) -> (indices, y_base, palette) oder None
+  - has_chunk(cx, cz, dimension)
+  - chunk_timestamp(cx, cz, dimension): letzte Änderung (0 = fehlt, None = unbekannt)
+  - content_extent(cx, cz, dimension, y_lo, y_hi): grobe Ausdehnung des Inhalts
+    ohne vollständiges Dekodieren (None = nicht billig bestimmbar, auto_crop.py)
+  - release(dimension, bounds=None): dekodierte Chunks außerhalb bounds freigeben
+  - close()
+  - thread_safe: darf read_chunk aus mehreren Threads aufgerufen werden? (prefetch.py)
+
+indices ist ein Array (16, 16, n) indiziert [x, z, y - y_base] mit
+y_lo <= y_base und y_base + n - 1 <= y_hi; alles außerhalb ist Luft.
+palette ist mit jedem Wert aus indices indizierbar und liefert amulet Blocks
+oder BlockStates (siehe block_registry.BlockStateRegistry.state_id).
+
+Implementierungen:
+  - AmuletWorldSource: alle von amulet unterstützten Welten und Strukturen
+  - AnvilWorld (anvil_reader.py): schneller Leser für Java-Welten ab 1.16
+  - MemoryWorldSource: NumPy-Arrays im Speicher, z.B. synthetische Welten
+    aus synthetic_worlds.py für reproduzierbare Benchmarks ohne Spielstand
+"""
+
+from collections import namedtuple
+import numpy as np
+from .exposed_blocks import BlockProperties
+
+# Block-State einer Java-Palette (name inkl. Namespace, properties als BlockProperties)
+BlockState = namedtuple("BlockState", "name properties")
+
+AIR = BlockState("minecraft:air", BlockProperties.intern({}))
+
+
+def block_state(name, **properties):
+    """BlockState aus einem Namen (Namespace optional) und Properties als Strings"""
+    if ":" not in name:
+        name = "minecraft:" + name
+    return BlockState(name, BlockProperties.intern({k: str(v) for k, v in properties.items()}))
+
+
+def _surface_top(chunk):
+    """
+    Höchster Nicht-Luft-Block laut gespeicherter WORLD_SURFACE-Heightmap.
+
+    Returns:
+        int oder None, wenn der Chunk keine (gültige) Heightmap hat
+    """
+    surface = chunk.misc.get("height_mapC", {}).get("WORLD_SURFACE")
+    if surface is None or surface.size != 256:
+        return None
+    # amulet liefert die absolute Höhe des ersten Luftblocks über der Oberfläche
+    return int(surface.max()) - 1
+
+
+def read_chunk_column(chunk, y_lo, y_hi):
+    """
+    Liest die Sub-Chunk-Arrays eines Chunks als ein zusammenhängendes Array.
+
+    Es werden nur vorhandene Sub-Chunks gelesen; nach oben begrenzt die
+    WORLD_SURFACE-Heightmap den Bereich. Alles außerhalb des gelieferten
+    Bereichs ist Luft.
+
+    Args:
+        chunk: amulet Chunk
+        y_lo, y_hi: Höhenbereich (inklusive)
+
+    Returns:
+        (indices, y_base): np.ndarray (16, 16, n) mit Palette-Indizes, indiziert
+        [x, z, y - y_base], mit y_lo <= y_base und y_base + n - 1 <= y_hi
+    """
+    blocks = chunk.blocks
+    sections = sorted(cy for cy in blocks.sub_chunks if y_lo >> 4 <= cy <= y_hi >> 4)
+    top = _surface_top(chunk)
+    if top is not None:
+        y_hi = min(y_hi, top)
+    if not sections or y_hi < y_lo:
+        return np.zeros((16, 16, 0), dtype=np.int64), y_lo
+
+    cy_lo, cy_hi = sections[0], min(sections[-1], y_hi >> 4)
+    column = np.zeros((16, 16, (cy_hi - cy_lo + 1) * 16), dtype=np.int64)
+    for cy in sections:
+        if cy <= cy_hi:
+            # amulet speichert Sub-Chunks als [x, y, z]
+            offset = (cy - cy_lo) * 16
+            column[:, :, offset:offset + 16] = blocks.get_sub_chunk(cy).transpose(0, 2, 1)
+    y_base = max(y_lo, cy_lo * 16)
+    y_top = min(y_hi, cy_hi * 16 + 15)
+    start = y_base - cy_lo * 16
+    return column[:, :, start:start + max(0, y_top - y_base + 1)], y_base
+
+
+class WorldSource:
+    """Basisklasse aller Welt-Quellen (siehe Modul-Docstring)"""
+
+    thread_safe = False
+
+    def read_chunk(self, cx, cz, dimension, y_lo, y_hi):
+        """
+        Liest die Block-Spalte eines Chunks.
+
+        Returns:
+            (indices, y_base, palette) oder None, wenn der Chunk nicht existiert
+        """
+        raise NotImplementedError
+
+    def has_chunk(self, cx, cz, dimension):
+        raise NotImplementedError
+
+    def chunk_timestamp(self, cx, cz, dimension):
+        """
+        Zeitpunkt der letzten Änderung eines Chunks (z.B. aus dem Region-Header).
+
+        Returns:
+            int (0, wenn der Chunk fehlt) oder None, wenn die Quelle das nicht weiß
+        """
+        return None
+
+    def content_extent(self, cx, cz, dimension, y_lo, y_hi):
+        """
+        Ausdehnung der Blöcke eines vorhandenen Chunks aus Metadaten (Sub-Chunk-
+        Präsenz, Heightmaps), ohne die Block-States zu übersetzen. Die Angaben
+        dürfen zu groß, aber nie zu klein sein.
+
+        Returns:
+            (columns, y_bottom, y_top): bool-Maske [x, z] der Spalten mit Blöcken
+            und Höhenbereich innerhalb y_lo..y_hi (y_top < y_bottom: leer),
+            oder None, wenn die Quelle das nur durch Lesen des Chunks weiß
+        """
+        return None
+
+    def release(self, dimension, bounds=None):
+        """
+        Gibt zwischengespeicherte Chunks frei.
+
+        Args:
+            bounds: (min_cx, min_cz, max_cx, max_cz) - Chunks darin bleiben erhalten;
+                None gibt alle frei
+        """
+
+    def close(self):
+        pass
+
+
+class AmuletWorldSource(WorldSource):
+    """Welt oder Struktur, die über amulet gelesen wird"""
+
+    def __init__(self, level):
+        self.level = level
+
+    def read_chunk(self, cx, cz, dimension, y_lo, y_hi):
+        from amulet.api.errors import ChunkLoadError
+        try:
+            chunk = self.level.get_chunk(cx, cz, dimension)
+        except ChunkLoadError:
+            return None
+        indices, y_base = read_chunk_column(chunk, y_lo, y_hi)
+        return indices, y_base, chunk.block_palette
+
+    def has_chunk(self, cx, cz, dimension):
+        return self.level.has_chunk(cx, cz, dimension)
+
+    def chunk_timestamp(self, cx, cz, dimension):
+        # Nur Java-Welten haben Region-Dateien mit Zeitstempeln
+        from .anvil_reader import region_timestamp
+        return region_timestamp(self.level.level_path, dimension, cx, cz)
+
+    def release(self, dimension, bounds=None):
+        if bounds is None:
+            self.level.chunks.unload()
+        else:
+            self.level.chunks.unload((dimension,) + tuple(bounds))
+
+    def close(self):
+        self.level.close()
+
+
+class MemoryWorldSource(WorldSource):
+    """
+    Welt aus NumPy-Arrays im Speicher.
+
+    Jeder Chunk ist ein Array (16, 16, n) mit Indizes in eine gemeinsame
+    Palette aus BlockStates; Index 0 ist Luft. Die Quelle ist picklebar und
+    kann damit auch an Worker-Prozesse übergeben werden.
+    """
+
+    thread_safe = True
+
+    def __init__(self, palette=None):
+        self.palette = list(palette) if palette is not None else [AIR]
+        self._palette_ids = {state: i for i, state in enumerate(self.palette)}
+        self._chunks = {}
+
+    def block_id(self, name, **properties):
+        """Palette-Index eines Blocks (wird bei Bedarf angelegt)"""
+        state = block_state(name, **properties)
+        index = self._palette_ids.get(state)
+        if index is None:
+            index = len(self.palette)
+            self.palette.append(state)
+            self._palette_ids[state] = index
+        return index
+
+    def set_chunk(self, cx, cz, indices, y_base, dimension="minecraft:overworld"):
+        """Legt die Block-Spalte eines Chunks ab (indices: (16, 16, n), [x, z, y - y_base])"""
+        indices = np.asarray(indices, dtype=np.uint16)
+        if indices.shape[:2] != (16, 16):
+            raise ValueError(f"Chunk array must have shape (16, 16, n), got {indices.shape}")
+        self._chunks[(dimension, cx, cz)] = (indices, y_base)
+
+    @classmethod
+    def from_array(cls, blocks, palette, origin=(0, 0, 0), dimension="minecraft:overworld"):
+        """
+        Zerlegt ein dichtes Array in Chunks.
+
+        Args:
+            blocks: Palette-Indizes, indiziert [x, z, y]
+            palette: Liste von BlockStates (Index 0 sollte Luft sein)
+            origin: Welt-Koordinate (x, y, z) von blocks[0, 0, 0]
+        """
+        source = cls(palette)
+        ox, oy, oz = origin
+        sx, sz, sy = blocks.shape
+        for cx in range(ox // 16, (ox + sx - 1) // 16 + 1):
+            for cz in range(oz // 16, (oz + sz - 1) // 16 + 1):
+                column = np.zeros((16, 16, sy), dtype=np.uint16)
+                x0, z0 = max(ox, cx * 16), max(oz, cz * 16)
+                x1, z1 = min(ox + sx, cx * 16 + 16), min(oz + sz, cz * 16 + 16)
+                column[x0 - cx * 16:x1 - cx * 16, z0 - cz * 16:z1 - cz * 16] = \
+                    blocks[x0 - ox:x1 - ox, z0 - oz:z1 - oz]
+                source.set_chunk(cx, cz, column, oy, dimension)
+        return source
+
+    def chunk_coords(self, dimension="minecraft:overworld"):
+        """Alle vorhandenen Chunks einer Dimension als (cx, cz)"""
+        return sorted((cx, cz) for dim, cx, cz in self._chunks if dim == dimension)
+
+    def has_chunk(self, cx, cz, dimension):
+        return (dimension, cx, cz) in self._chunks
+
+    def read_chunk(self, cx, cz, dimension, y_lo, y_hi):
+        entry = self._chunks.get((dimension, cx, cz))
+        if entry is None:
+            return None
+        indices, y_base = entry
+        lo = max(y_lo, y_base)
+        hi = min(y_hi + 1, y_base + indices.shape[2])
+        if hi <= lo:
+            return indices[:, :, :0], y_lo, self.palette
+        return indices[:, :, lo - y_base:hi - y_base], lo, self.palette